@@ -0,0 +1,509 @@
+"""
+End-to-end load test: drives chaimcp over stdio, SSE and streamable HTTP against the local mock
+Chia node (chaimcp.mock_node) with N concurrent MCP sessions calling a weighted mix of tools,
+and saves throughput, latency percentiles and server RSS per transport as JSON.
+
+    PYTHONPATH=src python benchmark.py --transports stdio,sse,http --sessions 8 --duration 10
+
+With --compare the run (or an existing --results file) is checked against a committed baseline:
+per transport and tool, a one-sided Mann-Whitney U test on the latency samples flags regressions
+that are both significant (p < --alpha) and larger than --tolerance. The comparison is saved for
+generate_report.py's HTML report and the exit code is 1 if anything regressed. Calls within a run
+are not independent (the whole run drifts with machine load), so the tolerance has to cover
+run-to-run noise; tighten it on quiet dedicated runners.
+
+Baselines only compare like with like, so none is committed: record one on the machine that runs
+the gate, with the same settings the gate uses. Runs whose settings differ (COMPARED_META: CPUs,
+sessions, duration, mix, mock node knobs, MCP_* server variables) or that lack a baseline transport
+fail the gate too, unless --allow-mismatch turns that into a warning.
+
+    PYTHONPATH=src python benchmark.py --output benchmark_baseline.json
+    PYTHONPATH=src python benchmark.py --compare benchmark_baseline.json --tolerance 0.1
+
+stdio serves one client per process, so each stdio session gets its own server process; SSE and
+streamable HTTP sessions share one server. Server tuning (MCP_* variables) is taken from the
+environment. Needs `pip install chaimcp[bench]` for the mock node's certificates.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess # nosec
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from chaimcp.config import get_mcp_workers # noqa: E402
+from chaimcp.mock_node import SyntheticChain, SyntheticDataLayer # noqa: E402
+
+TRANSPORTS = ("stdio", "sse", "http")
+
+# Run settings that must match between a baseline and the run compared with it
+COMPARED_META = ("cpus", "sessions", "duration", "warmup", "mix", "node", "server_env")
+
+# Fewer samples than this per side can't show a significant difference
+MIN_SAMPLES = 8
+
+# Tool name -> relative weight
+DEFAULT_MIX = {
+    "get_blockchain_state": 4,
+    "get_block_record_by_height": 3,
+    "get_coin_records_by_puzzle_hash": 3,
+    "get_block_records": 1,
+    "get_wallet_balance": 2,
+    "get_transactions": 1,
+    "get_keys": 1,
+}
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "tool=weight,tool=weight" (a bare tool name has weight 1)."""
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+class Workload:
+    """What the mock node serves (rebuilt here from the same seed), to pick valid tool arguments."""
+    def __init__(self, root: Path, chain: SyntheticChain):
+        self.root = root
+        self.chain = chain
+        self.store_ids = list(SyntheticDataLayer(chain).stores)
+
+def tool_arguments(tool: str, rng: random.Random, workload: Workload) -> Dict[str, Any]:
+    """Random but valid arguments for a tool against the mock node."""
+    peak = workload.chain.peak_height
+    if tool == "get_block_record_by_height":
+        return {"height": rng.randrange(0, peak)}
+    if tool == "get_block_records":
+        start = rng.randrange(0, peak - 32)
+        return {"start": start, "end": start + 32}
+    if tool in ("get_coin_records_by_puzzle_hash", "scan_coin_records_by_puzzle_hash"):
+        return {"puzzle_hash": f"0x{rng.getrandbits(256):064x}", "include_spent_coins": True}
+    if tool == "get_wallet_balance":
+        return {"wallet_id": rng.choice([1, 2])}
+    if tool == "get_transactions":
+        return {"wallet_id": 1, "start": 0, "end": 25}
+    if tool in ("get_keys", "get_root"):
+        return {"store_id": rng.choice(workload.store_ids)}
+    return {}
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of samples (q in 0-100), or None if there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered), max(1, math.ceil(q / 100 * len(ordered)))) - 1]
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> Dict[str, Any]:
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / seconds if seconds > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+    }
+
+def mann_whitney_greater(baseline: List[float], current: List[float]) -> float:
+    """
+    One-sided Mann-Whitney U test (normal approximation, corrected for ties): the p-value of
+    current's values being stochastically greater than baseline's.
+    """
+    n1, n2 = len(baseline), len(current)
+    combined = sorted([(v, 0) for v in baseline] + [(v, 1) for v in current])
+    rank_sum = 0.0
+    ties = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        # Tied values share the average of their ranks
+        rank = (i + j) / 2 + 1
+        rank_sum += rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 1)
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+    n = n1 + n2
+    u = rank_sum - n2 * (n2 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def compare_samples(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float, alpha: float) -> Dict[str, Any]:
+    """Compare one tool's results: p50 change, significance, and whether it regressed or improved."""
+    base_samples, samples = baseline.get("samples_ms") or [], current.get("samples_ms") or []
+    base_p50, p50 = percentile(base_samples, 50), percentile(samples, 50)
+    result = {
+        "baseline_p50_ms": base_p50, "current_p50_ms": p50,
+        "baseline_p95_ms": percentile(base_samples, 95), "current_p95_ms": percentile(samples, 95),
+        "change": p50 / base_p50 - 1 if base_p50 and p50 is not None else None,
+        "p_value": None,
+        "baseline_errors": baseline.get("errors", 0), "current_errors": current.get("errors", 0),
+    }
+    if result["current_errors"] and not result["baseline_errors"]:
+        result["status"] = "regressed"
+    elif len(base_samples) < MIN_SAMPLES or len(samples) < MIN_SAMPLES:
+        result["status"] = "insufficient"
+    else:
+        slower = mann_whitney_greater(base_samples, samples)
+        faster = mann_whitney_greater(samples, base_samples)
+        result["p_value"] = min(slower, faster)
+        if slower < alpha and (result["change"] or 0) > tolerance:
+            result["status"] = "regressed"
+        elif faster < alpha and (result["change"] or 0) < -tolerance:
+            result["status"] = "improved"
+        else:
+            result["status"] = "unchanged"
+    return result
+
+def meta_mismatches(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """The COMPARED_META settings that differ between two runs' meta, described for humans."""
+    return [f"{key}: baseline {baseline.get(key)!r}, current {current.get(key)!r}"
+            for key in COMPARED_META if baseline.get(key) != current.get(key)]
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.2, alpha: float = 0.01) -> Dict[str, Any]:
+    """
+    Compare a benchmark run with a baseline run, per transport and tool. Differing run settings
+    are listed under mismatches and baseline transports the run lacks under missing.
+    """
+    transports = {}
+    regressions = []
+    for transport, run in current["transports"].items():
+        base = baseline["transports"].get(transport)
+        if base is None:
+            transports[transport] = {"status": "new", "throughput": run["throughput"], "tools": {}}
+            continue
+        tools = {}
+        for tool, results in run["tools"].items():
+            if tool in base["tools"]:
+                tools[tool] = compare_samples(base["tools"][tool], results, tolerance, alpha)
+            else:
+                tools[tool] = {"status": "new", "current_p50_ms": results["p50_ms"]}
+            if tools[tool]["status"] == "regressed":
+                regressions.append(f"{transport}/{tool}")
+        transports[transport] = {
+            "baseline_throughput": base["throughput"],
+            "throughput": run["throughput"],
+            "throughput_change": run["throughput"] / base["throughput"] - 1 if base["throughput"] else None,
+            "baseline_rss_bytes": base.get("rss_bytes"),
+            "rss_bytes": run.get("rss_bytes"),
+            "tools": tools,
+        }
+    return {
+        "baseline": baseline.get("meta", {}),
+        "current": current.get("meta", {}),
+        "tolerance": tolerance,
+        "alpha": alpha,
+        "mismatches": meta_mismatches(baseline.get("meta", {}), current.get("meta", {})),
+        "missing": [t for t in baseline["transports"] if t not in current["transports"]],
+        "regressions": regressions,
+        "transports": transports,
+    }
+
+def rss_bytes(pid: int) -> Dict[str, Optional[int]]:
+    """Current and peak resident set size of a process (Linux only; None elsewhere)."""
+    rss = {"rss": None, "peak_rss": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss["rss"] = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    rss["peak_rss"] = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return rss
+
+def child_server_pids() -> List[int]:
+    """Pids of chaimcp servers started by this process (stdio sessions spawn their own)."""
+    pids = []
+    for entry in Path("/proc").glob("[0-9]*"):
+        try:
+            ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+            cmdline = (entry / "cmdline").read_bytes()
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == os.getpid() and b"chaimcp.main" in cmdline:
+            pids.append(int(entry.name))
+    return pids
+
+def python_env() -> Dict[str, str]:
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(Path(__file__).parent / "src"), env.get("PYTHONPATH")]))
+    return env
+
+def server_settings() -> Dict[str, str]:
+    """The MCP_* server tuning taken from the environment (secrets left out), recorded with each run."""
+    return {k: v for k, v in sorted(os.environ.items()) if k.startswith("MCP_") and "TOKEN" not in k}
+
+def server_env(workload: Workload, transport: str, port: int = None) -> Dict[str, str]:
+    env = python_env()
+    env.update({
+        "CHIA_ROOT": str(workload.root),
+        "MCP_TRANSPORT": transport,
+        "MCP_AUTH_ENABLED": "false",
+        # The mock node has no daemon to push events
+        "MCP_EVENTS_ENABLED": "false",
+        "SSL_KEY_FILE": "",
+        "SSL_CERT_FILE": "",
+    })
+    if port is not None:
+        env["MCP_PORT"] = str(port)
+    return env
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def wait_for_port(port: int, timeout: float = 30, server: subprocess.Popen = None):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if server is not None and server.poll() is not None:
+                raise RuntimeError(f"Server on port {port} exited with code {server.returncode} before listening")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server on port {port} did not start")
+            await asyncio.sleep(0.1)
+
+@contextlib.asynccontextmanager
+async def open_session(transport: str, workload: Workload, port: int = None):
+    """An initialized MCP client session over the given transport."""
+    if transport == "stdio":
+        params = StdioServerParameters(command=sys.executable, args=["-m", "chaimcp.main"], env=server_env(workload, "stdio"))
+        streams = stdio_client(params, errlog=subprocess.DEVNULL)
+    elif transport == "sse":
+        streams = sse_client(f"http://127.0.0.1:{port}/sse")
+    else:
+        streams = streamablehttp_client(f"http://127.0.0.1:{port}/mcp")
+    async with streams as (read, write, *_):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session
+
+async def run_session(session: ClientSession, mix: Dict[str, float], workload: Workload, rng: random.Random,
+                      deadline: float, warmup: int, samples: Dict[str, List[float]], errors: Dict[str, int]):
+    tools, weights = list(mix), list(mix.values())
+    calls = 0
+    while time.monotonic() < deadline:
+        tool = rng.choices(tools, weights)[0]
+        arguments = tool_arguments(tool, rng, workload)
+        started = time.perf_counter()
+        result = await session.call_tool(tool, arguments)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        calls += 1
+        if calls <= warmup:
+            continue
+        failed = result.isError
+        if not failed:
+            try:
+                failed = json.loads(result.content[0].text).get("success") is False
+            except (ValueError, IndexError, AttributeError):
+                failed = True
+        samples.setdefault(tool, []).append(elapsed_ms)
+        if failed:
+            errors[tool] = errors.get(tool, 0) + 1
+
+async def bench_transport(transport: str, workload: Workload, args) -> Dict[str, Any]:
+    """Run args.sessions concurrent sessions for args.duration seconds and summarize them."""
+    server = None
+    port = None
+    if transport != "stdio":
+        port = free_port()
+        server = subprocess.Popen([sys.executable, "-m", "chaimcp.main"], env=server_env(workload, transport, port), # nosec
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    rss = {"rss": None, "peak_rss": None}
+    try:
+        if port is not None:
+            await wait_for_port(port, server=server)
+        async with contextlib.AsyncExitStack() as stack:
+            sessions = [await stack.enter_async_context(open_session(transport, workload, port)) for _ in range(args.sessions)]
+            started = time.monotonic()
+            deadline = started + args.duration
+            await asyncio.gather(*(
+                run_session(session, args.mix, workload, random.Random(args.seed + i), deadline, args.warmup, samples, errors)
+                for i, session in enumerate(sessions)
+            ))
+            elapsed = time.monotonic() - started
+            pids = [server.pid] if server is not None else child_server_pids()
+            usage = [rss_bytes(pid) for pid in pids]
+            if usage and all(u["rss"] is not None for u in usage):
+                rss = {"rss": sum(u["rss"] for u in usage), "peak_rss": sum(u["peak_rss"] for u in usage)}
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    every = [s for tool_samples in samples.values() for s in tool_samples]
+    return {
+        **summarize(every, sum(errors.values()), elapsed),
+        "seconds": elapsed,
+        "sessions": args.sessions,
+        "server_processes": args.sessions if transport == "stdio" else 1,
+        "rss_bytes": rss["rss"],
+        "peak_rss_bytes": rss["peak_rss"],
+        "tools": {
+            tool: {**summarize(tool_samples, errors.get(tool, 0), elapsed), "samples_ms": [round(s, 3) for s in tool_samples]}
+            for tool, tool_samples in sorted(samples.items())
+        },
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip() # nosec
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+@contextlib.contextmanager
+def mock_node(root: Path, args):
+    """Run the mock Chia node in its own process, so it doesn't compete with the clients for the GIL."""
+    process = subprocess.Popen([ # nosec
+        sys.executable, "-m", "chaimcp.mock_node", "--root", str(root),
+        "--full-node-port", "0", "--wallet-port", "0", "--data-layer-port", "0",
+        "--latency", str(args.latency), "--jitter", str(args.jitter), "--height", str(args.height),
+        "--coins-per-puzzle-hash", str(args.coins_per_puzzle_hash), "--padding", str(args.padding),
+    ], env=python_env(), stdout=subprocess.PIPE, text=True)
+    try:
+        # The node announces itself once every service is up and config.yaml is written
+        if not process.stdout.readline():
+            raise RuntimeError("Mock Chia node failed to start")
+        yield
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+async def run(args) -> Dict[str, Any]:
+    chain = SyntheticChain(height=args.height, coins_per_puzzle_hash=args.coins_per_puzzle_hash, padding=args.padding)
+    with tempfile.TemporaryDirectory() as root:
+        workload = Workload(Path(root), chain)
+        with mock_node(workload.root, args):
+            results = {}
+            for transport in args.transports:
+                print(f"Benchmarking {transport}: {args.sessions} sessions for {args.duration}s...", flush=True)
+                results[transport] = await bench_transport(transport, workload, args)
+                r = results[transport]
+                print(f"  {r['throughput']:.1f} calls/s, p50 {r['p50_ms']:.2f} ms, p95 {r['p95_ms']:.2f} ms, "
+                      f"p99 {r['p99_ms']:.2f} ms, errors {r['errors']}", flush=True)
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "sessions": args.sessions,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "mix": args.mix,
+            "node": {"latency": args.latency, "jitter": args.jitter, "height": args.height,
+                     "coins_per_puzzle_hash": args.coins_per_puzzle_hash, "padding": args.padding},
+            "server_env": server_settings(),
+        },
+        "transports": results,
+    }
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load-test chaimcp over MCP transports against the mock Chia node.")
+    parser.add_argument("--transports", default=",".join(TRANSPORTS), help="comma-separated: stdio, sse, http")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent MCP sessions per transport")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load per transport")
+    parser.add_argument("--warmup", type=int, default=5, help="calls per session left out of the results")
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX), help='tool mix, e.g. "get_blockchain_state=4,get_keys=1"')
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.002, help="mock node latency per RPC, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.001, help="mock node random extra latency, in seconds")
+    parser.add_argument("--height", type=int, default=100_000, help="mock chain peak height")
+    parser.add_argument("--coins-per-puzzle-hash", type=int, default=10)
+    parser.add_argument("--padding", type=int, default=0, help="mock node filler bytes per record")
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--compare", type=Path, help="baseline results to check this run against")
+    parser.add_argument("--results", type=Path, help="with --compare: compare this saved run instead of running the benchmark")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="p50 slowdown ignored even if significant (0.2 = 20%%)")
+    parser.add_argument("--alpha", type=float, default=0.01, help="significance level of the per-tool test")
+    parser.add_argument("--comparison-output", type=Path, default=Path("benchmark-comparison.json"))
+    parser.add_argument("--allow-mismatch", action="store_true",
+                        help="only warn when run settings differ from the baseline or baseline transports are missing")
+    args = parser.parse_args(argv)
+    args.transports = [t.strip() for t in args.transports.split(",") if t.strip()]
+    unknown = set(args.transports) - set(TRANSPORTS)
+    if unknown:
+        parser.error(f"unknown transports: {', '.join(sorted(unknown))}")
+    if "sse" in args.transports and args.results is None and get_mcp_workers() > 1:
+        # The server refuses this combination (see chaimcp.main.main) rather than lose sessions
+        parser.error("MCP_WORKERS > 1 only serves the http transport; leave sse out of --transports or unset MCP_WORKERS")
+    return args
+
+def print_comparison(comparison: Dict[str, Any]):
+    for mismatch in comparison["mismatches"]:
+        print(f"SETTINGS DIFFER FROM BASELINE: {mismatch}")
+    for transport in comparison["missing"]:
+        print(f"MISSING: {transport} is in the baseline but was not run")
+    for transport, result in comparison["transports"].items():
+        if result.get("status") == "new":
+            print(f"{transport}: not in baseline")
+            continue
+        change = result["throughput_change"]
+        print(f"{transport}: {result['throughput']:.1f} calls/s ({change:+.1%} vs baseline)" if change is not None else transport)
+        for tool, tool_result in result["tools"].items():
+            if tool_result.get("change") is None:
+                print(f"  {tool}: {tool_result['status']}")
+                continue
+            p_value = "" if tool_result["p_value"] is None else f", p={tool_result['p_value']:.3g}"
+            print(f"  {tool}: p50 {tool_result['baseline_p50_ms']:.2f} -> {tool_result['current_p50_ms']:.2f} ms "
+                  f"({tool_result['change']:+.1%}{p_value}) {tool_result['status']}")
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.compare is not None and args.results is not None:
+        results = json.loads(args.results.read_text())
+    else:
+        results = asyncio.run(run(args))
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Results saved: {args.output}")
+    if args.compare is None:
+        return
+
+    comparison = compare(json.loads(args.compare.read_text()), results, args.tolerance, args.alpha)
+    args.comparison_output.write_text(json.dumps(comparison, indent=2))
+    print_comparison(comparison)
+    print(f"Comparison saved: {args.comparison_output}")
+    failed = False
+    if comparison["mismatches"] or comparison["missing"]:
+        if args.allow_mismatch:
+            print("WARNING: this run is not comparable with the baseline; results are indicative only")
+        else:
+            print("Not comparable with the baseline: rerun with the baseline's settings or record a new baseline")
+            failed = True
+    if comparison["regressions"]:
+        print(f"Performance regressions: {', '.join(comparison['regressions'])}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
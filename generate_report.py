@@ -3,6 +3,7 @@ import json
 import os
 import sys
 import ast
+import html
 from datetime import datetime
 
 def get_test_info(nodeid):
@@ -46,7 +47,91 @@ def get_test_info(nodeid):
     except Exception as e:
         return None, f"Error extracting source: {e}"
 
-def generate_html_report(test_results, coverage_results):
+BENCHMARK_STATUS_COLORS = {
+    "regressed": "#F87171",
+    "improved": "#4ADE80",
+    "unchanged": "#A8A29E",
+    "insufficient": "#FBBF24",
+    "new": "#60A5FA",
+}
+
+def format_ms(value):
+    return f"{value:.2f} ms" if value is not None else "–"
+
+def format_change(value):
+    return f"{value:+.1%}" if value is not None else "–"
+
+def generate_benchmark_section(comparison):
+    """
+    Renders a benchmark comparison (benchmark.py --compare) as a report card:
+    throughput per transport and per-tool p50/p95 against the baseline.
+    """
+    regressions = comparison.get("regressions", [])
+    problems = comparison.get("mismatches", []) + [f"{t}: in the baseline but not run" for t in comparison.get("missing", [])]
+    verdict_color = "#F87171" if regressions or problems else "#4ADE80"
+    verdict = f"{len(regressions)} regression{'s' if len(regressions) != 1 else ''}" if regressions else "No regressions"
+    if problems:
+        verdict += " · not comparable with baseline"
+    baseline_commit = (comparison.get("baseline", {}).get("commit") or "unknown")[:10]
+
+    rows = ""
+    for problem in problems:
+        rows += f"""
+                    <tr><td colspan="6" style="font-family: 'JetBrains Mono'; color: #F87171;">{html.escape(problem)}</td></tr>"""
+    for transport, result in comparison.get("transports", {}).items():
+        if result.get("status") == "new":
+            rows += f"""
+                    <tr><td colspan="6" style="font-family: 'JetBrains Mono'; color: #60A5FA;">{transport}: not in baseline</td></tr>"""
+            continue
+        rows += f"""
+                    <tr>
+                        <td colspan="6" style="font-family: 'JetBrains Mono'; font-weight: 600; color: white;">
+                            {transport}
+                            <span style="color: var(--color-text-dim); font-weight: 400; margin-left: 1rem;">
+                                {result['throughput']:.1f} calls/s ({format_change(result.get('throughput_change'))})
+                            </span>
+                        </td>
+                    </tr>"""
+        for tool, tool_result in result.get("tools", {}).items():
+            status = tool_result["status"]
+            p_value = tool_result.get("p_value")
+            rows += f"""
+                    <tr>
+                        <td style="font-family: 'JetBrains Mono'; padding-left: 3rem;">{tool}</td>
+                        <td style="font-family: 'JetBrains Mono';">{format_ms(tool_result.get('baseline_p50_ms'))} → {format_ms(tool_result.get('current_p50_ms'))}</td>
+                        <td style="font-family: 'JetBrains Mono';">{format_ms(tool_result.get('baseline_p95_ms'))} → {format_ms(tool_result.get('current_p95_ms'))}</td>
+                        <td style="font-family: 'JetBrains Mono';">{format_change(tool_result.get('change'))}</td>
+                        <td style="font-family: 'JetBrains Mono';">{f"{p_value:.3g}" if p_value is not None else "–"}</td>
+                        <td style="color: {BENCHMARK_STATUS_COLORS.get(status, '#A8A29E')}; font-weight: 600;">{status.upper()}</td>
+                    </tr>"""
+
+    return f"""
+        <div class="card" style="padding: 0; overflow: hidden; margin-bottom: 2rem;">
+            <div style="padding: 2rem; border-bottom: 1px solid var(--color-border); display: flex; justify-content: space-between; align-items: center;">
+                <h3 style="margin: 0;">Performance vs Baseline</h3>
+                <div style="font-family: 'JetBrains Mono'; font-size: 0.8rem; color: var(--color-text-dim);">
+                    baseline {baseline_commit} · tolerance {comparison.get('tolerance', 0):.0%} · α {comparison.get('alpha', 0)}
+                    <span style="color: {verdict_color}; font-weight: 600; margin-left: 1rem;">{verdict}</span>
+                </div>
+            </div>
+            <table class="test-table">
+                <thead>
+                    <tr>
+                        <th style="width: 30%;">Tool</th>
+                        <th style="width: 20%;">p50</th>
+                        <th style="width: 20%;">p95</th>
+                        <th style="width: 10%;">Change</th>
+                        <th style="width: 10%;">p-value</th>
+                        <th style="width: 10%;">Status</th>
+                    </tr>
+                </thead>
+                <tbody>{rows}
+                </tbody>
+            </table>
+        </div>
+"""
+
+def generate_html_report(test_results, coverage_results, benchmark_comparison=None):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     # Calculate stats
@@ -57,6 +142,7 @@ def generate_html_report(test_results, coverage_results):
     
     pass_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
     coverage_percent = coverage_results['totals']['percent_covered']
+    benchmark_html = generate_benchmark_section(benchmark_comparison) if benchmark_comparison else ""
     
     html_content = f"""<!DOCTYPE html>
 <html lang="en">
@@ -542,6 +628,7 @@ def generate_html_report(test_results, coverage_results):
             </div>
         </div>
 
+        {benchmark_html}
         <div class="card" style="padding: 0; overflow: hidden;">
             <div style="padding: 2rem; border-bottom: 1px solid var(--color-border); display: flex; justify-content: space-between; align-items: center;">
                 <h3 style="margin: 0;">Detailed Results</h3>
@@ -773,9 +860,15 @@ def main():
         
         with open('coverage.json', 'r') as f:
             coverage_results = json.load(f)
+
+        # Written by `benchmark.py --compare`, if it has been run
+        benchmark_comparison = None
+        if os.path.exists('benchmark-comparison.json'):
+            with open('benchmark-comparison.json', 'r') as f:
+                benchmark_comparison = json.load(f)
             
         # 3. Generate HTML
-        generate_html_report(test_results, coverage_results)
+        generate_html_report(test_results, coverage_results, benchmark_comparison)
         
         if test_results['summary'].get('failed', 0) > 0 or test_results['summary'].get('error', 0) > 0:
             print("Tests failed. Exiting with 1.")
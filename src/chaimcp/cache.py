@@ -0,0 +1,367 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+from .serialization import RawJson
+from .metrics import REGISTRY, hit_ratio
+from .config import (
+    get_cache_max_entries, get_cache_max_bytes, get_cache_peak_ttl,
+    get_disk_cache_dir, get_disk_cache_max_bytes, get_reorg_depth,
+)
+
+# Full node reads whose answer can only change when the chain peak moves
+CACHEABLE_ENDPOINTS = frozenset({
+    "get_blockchain_state",
+    "get_network_info",
+    "get_block_record",
+    "get_block_record_by_height",
+    "get_block_records",
+    "get_coin_records_by_puzzle_hash",
+    "get_coin_records_by_puzzle_hashes",
+    "get_coin_records_by_parent_ids",
+    "get_coin_record_by_name",
+})
+
+# Reads whose answer never changes once the block is final
+IMMUTABLE_ENDPOINTS = frozenset({
+    "get_block_record",
+    "get_block_record_by_height",
+})
+
+RpcRequest = Callable[[str, Optional[Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+
+def cache_key(endpoint: str, data: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+    """Build a cache key from the endpoint and its normalized (key-sorted, compact) params."""
+    return endpoint, json.dumps(data or {}, sort_keys=True, separators=(",", ":"))
+
+def get_peak(state: Dict[str, Any]) -> Optional[Tuple[int, Optional[str]]]:
+    """Extract (height, header_hash) of the peak from a get_blockchain_state response."""
+    peak = (state.get("blockchain_state") or {}).get("peak") or {}
+    if peak.get("height") is None:
+        return None
+    return peak["height"], peak.get("header_hash")
+
+def _stored_form(response: Dict[str, Any]) -> Tuple[Any, int]:
+    """What the response cache keeps for a response, and its size: the upstream body alone if it has one."""
+    raw = getattr(response, "raw", None)
+    if raw is not None:
+        return raw, len(raw)
+    return response, len(json.dumps(response, separators=(",", ":")))
+
+class ResponseCache:
+    """
+    LRU cache of successful full-node read responses, bounded by entry count and by max_bytes of
+    response bodies; a single response over ENTRY_SHARE of max_bytes (a wide range or scan window)
+    is not cached at all, so one sweep can't flush everything else. Upstream responses are kept as
+    their body bytes only, and each hit gets its own lazily decoded RawJson.
+    Every entry belongs to the peak it was fetched at; when the peak advances (or reorgs to a new
+    header hash) the whole cache is dropped. Lower peaks are ignored: with reads balanced across
+    full nodes they come from a node that is slightly behind, not from a new chain. The peak itself
+    is re-checked at most every peak_ttl seconds, so cached answers are never more than peak_ttl
+    behind the node. While new peaks are pushed to it (set_live/push_state, see
+    events.invalidate_on_events) the TTL re-check is skipped.
+    Cached responses are shared between callers and must be treated as read-only.
+    """
+    ENTRY_SHARE = 0.125
+
+    def __init__(self, max_entries: int = None, peak_ttl: float = None, max_bytes: int = None):
+        self.max_entries = max_entries if max_entries is not None else get_cache_max_entries()
+        self.max_bytes = max_bytes if max_bytes is not None else get_cache_max_bytes()
+        self.peak_ttl = peak_ttl if peak_ttl is not None else get_cache_peak_ttl()
+        self.hits = 0
+        self.misses = 0
+        # key -> (body bytes or response dict, size in bytes)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._peak: Optional[Tuple[int, Optional[str]]] = None
+        self._peak_checked = float("-inf")
+        self.live = False
+        self._lock = threading.Lock()
+
+    @property
+    def peak(self) -> Optional[Tuple[int, Optional[str]]]:
+        return self._peak
+
+    def _peak_fresh(self) -> bool:
+        return (self.live and self._peak is not None) or time.monotonic() - self._peak_checked < self.peak_ttl
+
+    def get(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        key = cache_key(endpoint, data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        stored = entry[0]
+        return RawJson(stored) if isinstance(stored, bytes) else stored
+
+    def peek(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Like get(), but only while the known peak is still trusted; never contacts the node."""
+        if not self._peak_fresh():
+            return None
+        return self.get(endpoint, data)
+
+    def put(self, endpoint: str, data: Optional[Dict[str, Any]], response: Dict[str, Any]):
+        key = cache_key(endpoint, data)
+        stored, size = _stored_form(response)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes * self.ENTRY_SHARE:
+                return
+            self._entries[key] = (stored, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._bytes -= self._entries.popitem(last=False)[1][1]
+
+    def set_peak(self, peak: Optional[Tuple[int, Optional[str]]]) -> bool:
+        """
+        Record the current peak, dropping all entries if it moved forward or reorged at the same height.
+        A lagging node's lower (or missing) peak leaves the cache alone. Returns True if it changed.
+        """
+        with self._lock:
+            self._peak_checked = time.monotonic()
+            if peak == self._peak:
+                return False
+            if self._peak is not None and (peak is None or peak[0] < self._peak[0]):
+                return False
+            self._peak = peak
+            self._entries.clear()
+            self._bytes = 0
+            return True
+
+    def set_live(self, live: bool):
+        """Mark whether peak changes are being pushed; going offline forces a re-check on the next fetch."""
+        with self._lock:
+            self.live = live
+            if not live:
+                self._peak_checked = float("-inf")
+
+    def push_state(self, state: Dict[str, Any]):
+        """Take a pushed get_blockchain_state response as the current peak and cache it."""
+        peak = get_peak(state)
+        if peak is None:
+            return
+        self.set_peak(peak)
+        if peak == self._peak:
+            self.put("get_blockchain_state", None, {"success": True, **state})
+
+    def invalidate(self):
+        """Drop all entries and force a peak re-check on the next fetch."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._peak = None
+            self._peak_checked = float("-inf")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "bytes": self._bytes, "peak": self._peak}
+
+    async def fetch(self, endpoint: str, data: Optional[Dict[str, Any]], request: RpcRequest) -> Dict[str, Any]:
+        """Serve endpoint from the cache, falling back to request() and caching its successful result."""
+        if not self._peak_fresh():
+            state = await request("get_blockchain_state", None)
+            if not state.get("success"):
+                # Node unhealthy or unreachable: don't serve anything we can't validate
+                return state if endpoint == "get_blockchain_state" else await request(endpoint, data)
+            self.set_peak(get_peak(state))
+            if self._peak is not None and get_peak(state) == self._peak:
+                self.put("get_blockchain_state", None, state)
+            if endpoint == "get_blockchain_state":
+                return state
+
+        cached = self.get(endpoint, data)
+        if cached is not None:
+            return cached
+
+        peak = self._peak
+        response = await request(endpoint, data)
+        # Only keep answers that are known to belong to the peak that is still current
+        if response.get("success") and peak is not None and peak == self._peak:
+            self.put(endpoint, data, response)
+        return response
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the process-wide full-node response cache, or None if disabled (MCP_CACHE_MAX_ENTRIES=0)."""
+    global _response_cache
+    if _response_cache is None and get_cache_max_entries() > 0:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+class DiskCache:
+    """
+    Persistent SQLite cache for immutable chain data (block records), evicted least-recently-used
+    once the stored payloads exceed max_bytes. Survives restarts, so historical lookups become
+    local disk reads instead of node RPCs. Safe to share between worker processes (MCP_WORKERS):
+    each keeps a running total of the stored size and re-reads it every SYNC_EVERY writes.
+    Calls block on SQLite, so async callers run them in a worker thread.
+    """
+    # Writes between re-reads of the stored size, which other processes may have changed
+    SYNC_EVERY = 256
+    # Hits whose access times are written back together, instead of one UPDATE per hit
+    TOUCH_BATCH = 64
+
+    def __init__(self, path: Path, max_bytes: int = None, reorg_depth: int = None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes if max_bytes is not None else get_disk_cache_max_bytes()
+        self.reorg_depth = reorg_depth if reorg_depth is not None else get_reorg_depth()
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._writes = 0
+        self._touched: Dict[str, float] = {}
+        self._sync_size()
+
+    @staticmethod
+    def _key(endpoint: str, data: Optional[Dict[str, Any]]) -> str:
+        return "/".join(cache_key(endpoint, data))
+
+    def _sync_size(self):
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        key = self._key(endpoint, data)
+        with self._lock:
+            row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.TOUCH_BATCH:
+                self._flush_touched()
+            self.hits += 1
+        # Stored as the upstream body (or compact), so the stored text can be passed through as-is
+        return RawJson.from_bytes(row[0])
+
+    def put(self, endpoint: str, data: Optional[Dict[str, Any]], response: Dict[str, Any]):
+        key = self._key(endpoint, data)
+        raw = getattr(response, "raw", None)
+        value = raw.decode() if raw is not None else json.dumps(response, separators=(",", ":"))
+        with self._lock:
+            self._touched.pop(key, None)
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            self._size += len(value) - (old[0] if old else 0)
+            self._writes += 1
+            if self._writes % self.SYNC_EVERY == 0 or self._size > self.max_bytes:
+                # Other workers may have written or evicted since, so count what is actually stored
+                self._sync_size()
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _flush_touched(self):
+        # Called with self._lock held
+        if not self._touched:
+            return
+        self._db.execute("BEGIN")
+        self._db.executemany("UPDATE responses SET accessed = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()])
+        self._db.execute("COMMIT")
+        self._touched.clear()
+
+    def _evict(self):
+        # Called with self._lock held. Trim to 90% so we don't evict on every insert at the limit.
+        self._flush_touched()
+        target = self.max_bytes * 0.9
+        # Walk the access-time index only as far as needed, rather than loading every row
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed")
+        evicted = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            evicted.append((key,))
+            self._size -= size
+        rows.close()
+        self._db.execute("BEGIN")
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._db.execute("COMMIT")
+
+    def is_final(self, endpoint: str, response: Dict[str, Any], peak_height: Optional[int]) -> bool:
+        """Decide whether a successful response can never change and is safe to persist."""
+        record = response.get("block_record") if response.get("success") else None
+        if not record:
+            return False
+        if endpoint == "get_block_record":
+            # A header hash pins the block's contents
+            return True
+        # By height, the block at that height can still be reorged until it is buried deep enough
+        return peak_height is not None and record.get("height", peak_height) <= peak_height - self.reorg_depth
+
+    def store(self, endpoint: str, data: Optional[Dict[str, Any]], response: Dict[str, Any]):
+        """Persist a final response, also indexing block records by header hash."""
+        self.put(endpoint, data, response)
+        header_hash = response["block_record"].get("header_hash")
+        if endpoint == "get_block_record_by_height" and header_hash:
+            self.put("get_block_record", {"header_hash": header_hash}, response)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes": self._size}
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.close()
+
+_disk_caches: Dict[str, DiskCache] = {}
+_disk_cache_lock = threading.Lock()
+
+def get_disk_cache(network: str) -> Optional[DiskCache]:
+    """Get the persistent block cache for a network, or None if MCP_DISK_CACHE_DIR is unset."""
+    cache_dir = get_disk_cache_dir()
+    if cache_dir is None:
+        return None
+    with _disk_cache_lock:
+        cache = _disk_caches.get(network)
+        if cache is None:
+            # One file per network: heights (and the data behind them) differ between mainnet and testnets
+            cache = _disk_caches[network] = DiskCache(cache_dir / f"blocks-{network}.sqlite")
+        return cache
+
+def close_disk_caches():
+    """Flush pending access times and close every open disk cache; the next get_disk_cache() reopens."""
+    with _disk_cache_lock:
+        caches = list(_disk_caches.values())
+        _disk_caches.clear()
+    for cache in caches:
+        cache.close()
+
+def _collect_metrics():
+    """Scrape-time hit/miss counts and hit ratios of the response and disk caches."""
+    stats = []
+    if _response_cache is not None:
+        stats.append(("response", _response_cache.stats()))
+    with _disk_cache_lock:
+        stats.extend((f"disk-{network}", cache.stats()) for network, cache in _disk_caches.items())
+    yield ("chaimcp_cache_hits_total", "counter", "Cache hits.", [({"cache": name}, s["hits"]) for name, s in stats])
+    yield ("chaimcp_cache_misses_total", "counter", "Cache misses.", [({"cache": name}, s["misses"]) for name, s in stats])
+    yield ("chaimcp_cache_hit_ratio", "gauge", "Cache hits over lookups since start.",
+           [({"cache": name}, hit_ratio(s["hits"], s["misses"])) for name, s in stats])
+    yield ("chaimcp_cache_bytes", "gauge", "Response bytes held by the cache.", [({"cache": name}, s["bytes"]) for name, s in stats])
+
+REGISTRY.register_collector(_collect_metrics)
@@ -1,58 +1,782 @@
+import asyncio
+import json
+import ssl
+import threading
+import time
+import weakref
+import httpx
 import requests
 import urllib3
-from typing import Dict, Any, Optional
-from .config import get_chia_root, load_chia_config, get_ssl_paths
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, Tuple, List, Callable, Awaitable
+from .circuit import CircuitBreaker
+from .latency import LatencyTracker
+from .retry import backoff_delay, get_retry_budget
+from .metrics import REGISTRY, RPC_DURATION, RPC_RESPONSE_BYTES, RPC_ERRORS, hit_ratio
+from .cache import ResponseCache, DiskCache, CACHEABLE_ENDPOINTS, IMMUTABLE_ENDPOINTS, cache_key, get_peak, get_response_cache, get_disk_cache
+from .projection import Projection, compile_fields, project, project_raw
+from .serialization import RawJson, loads
+from .singleflight import SingleFlight
+from .tracing import span, current_span
+from .config import (
+    get_chia_root, load_chia_config, get_ssl_paths, get_service_endpoints, get_health_interval,
+    get_hedge_enabled, get_hedge_percentile, get_hedge_min_delay,
+    get_rpc_max_retries, get_retry_base_delay, get_rpc_max_timeout,
+    get_rpc_pool_size, get_rpc_idle_timeout, get_rpc_max_concurrency,
+    get_block_range_chunk, get_block_range_max, get_puzzle_hash_chunk, get_coin_scan_window, get_scan_max_records,
+    get_batch_parallelism,
+)
 
 # Suppress insecure request warnings if verifying is disabled (though we should try to verify)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-class ChiaRpcClient:
-    def __init__(self, service_name: str, port: int = None):
+DEFAULT_RPC_TIMEOUT = 10
+
+# Starting timeouts for RPCs whose cost differs a lot from the default, until latencies have been learned
+ENDPOINT_TIMEOUTS = {
+    "get_network_info": 2,
+    "get_blockchain_state": 5,
+    "get_block_records": 30,
+    "get_coin_records_by_puzzle_hash": 30,
+    "get_coin_records_by_puzzle_hashes": 30,
+    "get_coin_records_by_parent_ids": 30,
+}
+
+# Learned timeouts are this multiple of a backend's p99 latency for the RPC, never below MIN_RPC_TIMEOUT
+TIMEOUT_PERCENTILE = 99
+TIMEOUT_MULTIPLIER = 3
+MIN_RPC_TIMEOUT = 1
+
+# RPCs whose cost scales with the requested range or list: many cheap calls say nothing about the
+# next wide one, so their learned timeouts never drop below the ENDPOINT_TIMEOUTS entry
+VARIABLE_COST_ENDPOINTS = frozenset({
+    "get_block_records",
+    "get_coin_records_by_puzzle_hash",
+    "get_coin_records_by_puzzle_hashes",
+    "get_coin_records_by_parent_ids",
+})
+
+# Projected bodies at least this big are scanned by project_raw in a worker thread, which keeps memory
+# near the size of the projected output; smaller ones are decoded whole and projected, which is faster
+PROJECT_RAW_MIN_BYTES = 4 * 1024 * 1024
+
+# Served by every Chia RPC server; used by the background health probes
+HEALTH_ENDPOINT = "healthz"
+
+DEFAULT_RPC_PORTS = {
+    "full_node": 8555,
+    "wallet": 9256,
+    "data_layer": 8562,
+}
+
+# RPCs without side effects: safe to coalesce, and to send more than once
+READ_ONLY_ENDPOINTS = frozenset({
+    # Full node
+    "get_blockchain_state", "get_network_info", "get_block_record", "get_block_record_by_height", "get_block_records",
+    "get_coin_records_by_puzzle_hash", "get_coin_records_by_puzzle_hashes", "get_coin_records_by_parent_ids",
+    "get_coin_record_by_name", "get_all_mempool_tx_ids", "get_mempool_item_by_tx_id",
+    # Wallet
+    "get_wallet_balance", "get_wallets", "get_transactions", "get_transaction", "get_farmed_amount",
+    # Datalayer
+    "get_value", "get_keys", "get_root", "get_kv_diff",
+})
+
+# Services whose backends are interchangeable replicas: every full node serves the same chain, while
+# each wallet or DataLayer backend has its own keys and data, so calls there never leave the primary
+REPLICATED_SERVICES = frozenset({"full_node"})
+
+# Process-wide singleflight counters, shared by every async client
+coalescing_stats = {"calls": 0, "collapsed": 0}
+
+# Process-wide hedging counters: hedge rate is hedged/requests, hedge-win rate is hedge_wins/hedged
+hedging_stats = {"requests": 0, "hedged": 0, "hedge_wins": 0}
+
+def endpoint_timeout(endpoint: str) -> float:
+    """The starting timeout in seconds for an RPC endpoint."""
+    return ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_RPC_TIMEOUT)
+
+def get_rpc_port(service_name: str, config: Dict[str, Any]) -> int:
+    """Resolve the RPC port for a service from the Chia config, falling back to the Chia defaults."""
+    if service_name not in DEFAULT_RPC_PORTS:
+        raise ValueError(f"Unknown default port for service: {service_name}")
+    return config.get(service_name, {}).get("rpc_port", DEFAULT_RPC_PORTS[service_name])
+
+def resolve_addresses(service_name: str, config: Dict[str, Any], port: int = None, host: str = None) -> List[Tuple[str, int]]:
+    """
+    Resolve the (host, port) backends of a service. An explicit host pins a single backend;
+    otherwise they come from CHIA_<SERVICE>_HOST/PORT (see config.get_service_endpoints).
+    An explicit port overrides every other port setting.
+    """
+    if port is None:
+        default_port = get_rpc_port(service_name, config)
+        if host is not None:
+            return [(host, default_port)]
+        return get_service_endpoints(service_name, default_port)
+    if host is not None:
+        return [(host, port)]
+    return [(h, port) for h, _ in get_service_endpoints(service_name, port)]
+
+async def gather_limited(calls: List[Callable[[], Awaitable[Any]]], parallelism: int) -> List[Any]:
+    """Run async callables with at most `parallelism` in flight, returning results in call order."""
+    semaphore = asyncio.Semaphore(max(1, parallelism))
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(*(run(call) for call in calls))
+
+def create_ssl_context(ssl_paths: Dict[str, str]) -> ssl.SSLContext:
+    """Build a mutual TLS client context for a Chia service."""
+    context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+    # Same trust model as the requests client: authenticate ourselves, accept the self-signed node cert
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE # nosec
+    context.load_cert_chain(ssl_paths["cert"], ssl_paths["key"])
+    return context
+
+class _BaseRpcClient:
+    """Shared endpoint resolution and convenience methods for the sync and async clients."""
+    def __init__(self, service_name: str, port: int = None, host: str = None):
         self.service_name = service_name
         self.root_path = get_chia_root()
         self.config = load_chia_config(self.root_path)
         self.ssl_paths = get_ssl_paths(service_name, self.root_path)
-        
-        # Determine port if not provided
-        if port is None:
-            if service_name == "full_node":
-                self.port = self.config.get("full_node", {}).get("rpc_port", 8555)
-            elif service_name == "wallet":
-                self.port = self.config.get("wallet", {}).get("rpc_port", 9256)
-            elif service_name == "data_layer":
-                self.port = self.config.get("data_layer", {}).get("rpc_port", 8562)
-            else:
-                raise ValueError(f"Unknown default port for service: {service_name}")
-        else:
-            self.port = port
-            
-        self.base_url = f"https://localhost:{self.port}"
+
+        # Every configured backend; the first one is the primary
+        self.addresses = resolve_addresses(service_name, self.config, port, host)
+        self.host, self.port = self.addresses[0]
+        self.base_url = f"https://{self.host}:{self.port}"
+
+    def _connection_error(self, host: str = None, port: int = None) -> Dict[str, Any]:
+        return {"success": False, "error": f"Connection refused to {self.service_name} at {host or self.host}:{port or self.port}. Is it running?"}
+
+    def _unavailable_error(self) -> Dict[str, Any]:
+        return {"success": False, "error": f"No healthy {self.service_name} backend available (circuit open). Retry later."}
+
+    # --- Common Full Node Methods ---
+    def get_blockchain_state(self):
+        return self.get("get_blockchain_state")
+
+    def get_network_info(self):
+        return self.get("get_network_info")
+
+    # --- Common Wallet Methods ---
+    def get_wallets(self):
+        return self.get("get_wallets")
+
+    def get_wallet_balance(self, wallet_id: int):
+        return self.get("get_wallet_balance", {"wallet_id": wallet_id})
+
+class ChiaRpcClient(_BaseRpcClient):
+    """
+    Blocking client for scripts and other synchronous callers; the server itself only uses
+    AsyncChiaRpcClient. Kept deliberately simple: it talks to the primary backend only, with
+    no caching, failover or tracing.
+    """
+    def __init__(self, service_name: str, port: int = None, host: str = None, pool_size: int = None):
+        super().__init__(service_name, port, host)
         self.session = requests.Session()
         self.session.cert = (self.ssl_paths["cert"], self.ssl_paths["key"])
         self.session.verify = False # Self-signed certs are the norm for localhost Chia, usually verified against CA but False is easier for MVP
+        # Every client talks to a single backend, so one pool sized for concurrent callers is enough
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or get_rpc_pool_size())
+        self.session.mount("https://", adapter)
 
     def get(self, endpoint: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """Generic RPC POST request (Chia RPCs use POST)."""
         url = f"{self.base_url}/{endpoint}"
         try:
-            response = self.session.post(url, json=data or {}, timeout=10)
+            response = self.session.post(url, json=data or {}, timeout=min(get_rpc_max_timeout(), endpoint_timeout(endpoint)))
             response.raise_for_status()
             return response.json()
         except requests.exceptions.ConnectionError:
-            return {"success": False, "error": f"Connection refused to {self.service_name} at port {self.port}. Is it running?"}
+            return self._connection_error()
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    # --- Common Full Node Methods ---
-    def get_blockchain_state(self):
-        return self.get("get_blockchain_state")
-        
-    def get_network_info(self):
-        return self.get("get_network_info")
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
 
-    # --- Common Wallet Methods ---
-    def get_wallets(self):
-        return self.get("get_wallets")
-        
-    def get_wallet_balance(self, wallet_id: int):
-        return self.get("get_wallet_balance", {"wallet_id": wallet_id})
+class RpcEndpoint:
+    """One backend of a service, with its own lazily created connection pool."""
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.address = f"{host}:{port}"
+        self.base_url = f"https://{host}:{port}"
+        self.inflight = 0
+        # Height of the last peak this backend reported, so reads can avoid a node that is behind
+        self.peak_height: Optional[int] = None
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.http: Optional[httpx.AsyncClient] = None
+
+    def __repr__(self) -> str:
+        return f"RpcEndpoint({self.host}:{self.port})"
+
+    async def close(self):
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+class AsyncChiaRpcClient(_BaseRpcClient):
+    """
+    Asyncio counterpart of ChiaRpcClient built on httpx.
+    The HTTP client (and its TLS context) is created lazily on the first request, inside the event loop.
+    If a ResponseCache is given, reads in CACHEABLE_ENDPOINTS are served through it; if a DiskCache
+    is given, final answers of IMMUTABLE_ENDPOINTS are persisted and served from disk first.
+    Concurrent identical READ_ONLY_ENDPOINTS calls share a single upstream request.
+    Passing fields to get() projects the response (see projection.compile_fields; bodies of
+    PROJECT_RAW_MIN_BYTES or more are projected from the raw text in a worker thread); projected
+    answers are served from the caches when possible but never stored.
+    Only READ_ONLY_ENDPOINTS calls to REPLICATED_SERVICES (full nodes) use more than one backend;
+    writes and every wallet or DataLayer call go to the primary alone. With balance_reads, those
+    reads go to the least busy backend (backends whose last reported peak is behind the response
+    cache's go last). Each backend has a circuit breaker: backends with an open circuit are skipped,
+    reads fail over to the next healthy backend, and with no healthy backend left calls fail fast.
+    With hedging (MCP_HEDGE_ENABLED) a balanced read that is still unanswered after the backend's
+    usual latency percentile for that RPC is also sent to a second backend; the first answer wins.
+    Timeouts are learned per backend and RPC from observed latencies (starting from ENDPOINT_TIMEOUTS),
+    and READ_ONLY_ENDPOINTS calls that failed upstream are retried with jittered exponential backoff
+    while the process-wide retry budget allows.
+    """
+    def __init__(self, service_name: str, port: int = None, host: str = None,
+                 pool_size: int = None, semaphore: Optional[asyncio.Semaphore] = None,
+                 cache: Optional[ResponseCache] = None, disk_cache: Optional[DiskCache] = None,
+                 balance_reads: bool = False):
+        super().__init__(service_name, port, host)
+        self.endpoints = [RpcEndpoint(h, p) for h, p in self.addresses]
+        self.balance_reads = balance_reads
+        self.pool_size = pool_size or get_rpc_pool_size()
+        self.idle_timeout = get_rpc_idle_timeout()
+        self.semaphore = semaphore or asyncio.Semaphore(get_rpc_max_concurrency())
+        self.cache = cache
+        self.disk_cache = disk_cache
+        self.singleflight = SingleFlight(coalescing_stats)
+        self.hedge = get_hedge_enabled()
+        self.hedge_percentile = get_hedge_percentile()
+        self.hedge_min_delay = get_hedge_min_delay()
+        self.max_retries = get_rpc_max_retries()
+        self.retry_base_delay = get_retry_base_delay()
+        self.max_timeout = get_rpc_max_timeout()
+        self._rotation = 0
+        self._health_task: Optional[asyncio.Task] = None
+
+    def _replicated(self, endpoint: str) -> bool:
+        """Whether a call may go to (or be repeated on) any backend: read-only calls to a replicated service."""
+        return self.service_name in REPLICATED_SERVICES and endpoint in READ_ONLY_ENDPOINTS
+
+    def _candidates(self, endpoint: str) -> List[RpcEndpoint]:
+        """Backends to try for a call, in order of preference."""
+        if not self._replicated(endpoint):
+            # A write could run twice, and another wallet would answer with different keys
+            return self.endpoints[:1]
+        if not self.balance_reads or len(self.endpoints) == 1:
+            return self.endpoints
+        # Least in-flight requests first; rotating the starting point spreads ties evenly
+        self._rotation = (self._rotation + 1) % len(self.endpoints)
+        ordered = self.endpoints[self._rotation:] + self.endpoints[:self._rotation]
+        peak = self.cache.peak if self.cache is not None and endpoint in CACHEABLE_ENDPOINTS else None
+        if peak is None or endpoint == "get_blockchain_state":
+            # Peak checks still go everywhere, which is how a lagging backend is seen catching up
+            return sorted(ordered, key=lambda e: e.inflight)
+        # A lagging backend's answer would be cached under the newer peak
+        return sorted(ordered, key=lambda e: (e.peak_height is not None and e.peak_height < peak[0], e.inflight))
+
+    def _client(self, target: RpcEndpoint = None) -> httpx.AsyncClient:
+        target = target or self.endpoints[0]
+        if target.http is None:
+            target.http = httpx.AsyncClient(
+                base_url=target.base_url,
+                verify=create_ssl_context(self.ssl_paths),
+                # Keep-alive expiry doubles as idle-connection reaping
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=self.idle_timeout,
+                ),
+                timeout=DEFAULT_RPC_TIMEOUT,
+            )
+        return target.http
+
+    async def get(self, endpoint: str, data: Dict[str, Any] = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Generic RPC POST request (Chia RPCs use POST).
+        Traced as an "rpc" span whose cache attribute is disk, hit, miss, coalesced or bypass.
+        """
+        with span("rpc", service=self.service_name, endpoint=endpoint) as trace:
+            if fields:
+                return await self._get_projected(endpoint, data, compile_fields(fields), trace)
+
+            immutable = self.disk_cache is not None and endpoint in IMMUTABLE_ENDPOINTS
+            if immutable:
+                # SQLite calls block, so they run in a worker thread instead of stalling the event loop
+                stored = await asyncio.to_thread(self.disk_cache.get, endpoint, data)
+                if stored is not None:
+                    trace.set("cache", "disk")
+                    return stored
+
+            if self.cache is not None and endpoint in CACHEABLE_ENDPOINTS:
+                # _fetch turns this into a miss if the cache has to go upstream
+                trace.set("cache", "hit")
+                response = await self.cache.fetch(endpoint, data, self._fetch)
+            else:
+                trace.set("cache", "bypass")
+                response = await self._fetch(endpoint, data)
+
+            if immutable:
+                # Finality by height needs a known peak, which only the response cache tracks
+                peak = self.cache.peak if self.cache is not None else None
+                if self.disk_cache.is_final(endpoint, response, peak[0] if peak else None):
+                    await asyncio.to_thread(self.disk_cache.store, endpoint, data, response)
+            return response
+
+    async def get_uncached(self, endpoint: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
+        """RPC request that skips the response and disk caches (identical concurrent reads are still shared)."""
+        with span("rpc", service=self.service_name, endpoint=endpoint, cache="bypass"):
+            return await self._fetch(endpoint, data)
+
+    def get_blockchain_state(self, cached: bool = True):
+        if cached:
+            return self.get("get_blockchain_state")
+        return self.get_uncached("get_blockchain_state")
+
+    async def _get_projected(self, endpoint: str, data: Optional[Dict[str, Any]], projection: Projection, trace) -> Dict[str, Any]:
+        cached = None
+        if self.disk_cache is not None and endpoint in IMMUTABLE_ENDPOINTS:
+            cached = await asyncio.to_thread(self.disk_cache.get, endpoint, data)
+            trace.set("cache", "disk")
+        if cached is None and self.cache is not None and endpoint in CACHEABLE_ENDPOINTS:
+            cached = self.cache.peek(endpoint, data)
+            trace.set("cache", "hit")
+        if cached is not None:
+            return project(cached, projection)
+        trace.set("cache", "miss")
+        return await self._fetch(endpoint, data, projection)
+
+    async def _fetch(self, endpoint: str, data: Dict[str, Any] = None, projection: Optional[Projection] = None) -> Dict[str, Any]:
+        """Send a request upstream, sharing one in-flight call among identical concurrent reads."""
+        trace = current_span()
+        if trace.recording and trace.attributes.get("endpoint") == endpoint and trace.attributes.get("cache") == "hit":
+            # Not a peak check on behalf of another endpoint: the response cache had to go upstream
+            trace.set("cache", "miss")
+        if endpoint in READ_ONLY_ENDPOINTS:
+            key = cache_key(endpoint, data)
+            if projection is not None:
+                key += (json.dumps(projection, sort_keys=True),)
+            if trace.recording and key in self.singleflight:
+                trace.set("cache", "coalesced")
+            return await self.singleflight.do(key, lambda: self._request(endpoint, data, projection))
+        return await self._request(endpoint, data, projection)
+
+    async def _request(self, endpoint: str, data: Dict[str, Any] = None, projection: Optional[Projection] = None) -> Dict[str, Any]:
+        budget = get_retry_budget()
+        budget.deposit()
+        attempt = 0
+        while True:
+            result, transient = await self._request_once(endpoint, data, projection)
+            if not transient or endpoint not in READ_ONLY_ENDPOINTS or attempt >= self.max_retries or not budget.withdraw():
+                return result
+            await asyncio.sleep(backoff_delay(attempt, self.retry_base_delay))
+            attempt += 1
+
+    async def _request_once(self, endpoint: str, data: Optional[Dict[str, Any]], projection: Optional[Projection]) -> Tuple[Dict[str, Any], bool]:
+        """One pass over the backends. Returns (result, transient): transient if every backend tried failed upstream."""
+        candidates = [target for target in self._candidates(endpoint) if target.breaker.available()]
+        error = None
+        delay = self._hedge_delay(endpoint, candidates)
+        if delay is not None:
+            response, error, used, winner = await self._send_hedged(candidates[0], candidates[1], endpoint, data, delay)
+            if response is not None:
+                return self._note_peak(winner, endpoint, await self._decoded(response, projection)), False
+            candidates = candidates[used:]
+
+        for target in candidates:
+            response, attempt_error, failover = await self._attempt(target, endpoint, data)
+            if response is None:
+                error = attempt_error or error
+                if failover or (failover is None and endpoint in READ_ONLY_ENDPOINTS):
+                    continue
+                return error, False
+            return self._note_peak(target, endpoint, await self._decoded(response, projection)), False
+        # With every circuit open there is nothing worth retrying soon: fail fast
+        return (error, True) if error is not None else (self._unavailable_error(), False)
+
+    def _timeout(self, target: RpcEndpoint, endpoint: str) -> float:
+        """The timeout for an RPC to one backend, never above max_timeout (MCP_RPC_MAX_TIMEOUT)."""
+        usual = target.latency.percentile(endpoint, TIMEOUT_PERCENTILE)
+        if usual is None:
+            return min(self.max_timeout, endpoint_timeout(endpoint))
+        floor = endpoint_timeout(endpoint) if endpoint in VARIABLE_COST_ENDPOINTS else MIN_RPC_TIMEOUT
+        return min(self.max_timeout, max(floor, usual * TIMEOUT_MULTIPLIER))
+
+    @staticmethod
+    def _note_peak(target: RpcEndpoint, endpoint: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Remember the peak a backend reported in a get_blockchain_state answer; returns result."""
+        if endpoint == "get_blockchain_state" and result.get("success"):
+            peak = get_peak(result)
+            if peak is not None:
+                target.peak_height = peak[0]
+        return result
+
+    async def _decoded(self, response: httpx.Response, projection: Optional[Projection]) -> Dict[str, Any]:
+        if projection is not None and len(response.content) >= PROJECT_RAW_MIN_BYTES:
+            # Scanning a big body is slow pure Python: keep it off the event loop
+            return await asyncio.to_thread(self._decode, response, projection)
+        return self._decode(response, projection)
+
+    @staticmethod
+    def _decode(response: httpx.Response, projection: Optional[Projection]) -> Dict[str, Any]:
+        with span("decode", bytes=len(response.content), projected=projection is not None):
+            try:
+                response.raise_for_status()
+                if projection is not None:
+                    if len(response.content) >= PROJECT_RAW_MIN_BYTES:
+                        return project_raw(response.content, projection)
+                    return project(loads(response.content), projection)
+                body = RawJson.from_bytes(response.content)
+                # Reading success up front turns a body it can't be found in into an error here
+                body.success
+                return body
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+
+    def _hedge_delay(self, endpoint: str, candidates: List[RpcEndpoint]) -> Optional[float]:
+        """Seconds to wait before hedging this call, or None if it shouldn't be hedged."""
+        if not (self.hedge and self.balance_reads and len(candidates) > 1 and self._replicated(endpoint)):
+            return None
+        # Until enough latencies have been seen there is nothing to derive a delay from
+        usual = candidates[0].latency.percentile(endpoint, self.hedge_percentile)
+        return None if usual is None else max(usual, self.hedge_min_delay)
+
+    async def _send_hedged(self, primary: RpcEndpoint, backup: RpcEndpoint, endpoint: str,
+                           data: Optional[Dict[str, Any]], delay: float) -> Tuple[Optional[httpx.Response], Optional[Dict[str, Any]], int, Optional[RpcEndpoint]]:
+        """
+        Send to primary, and also to backup if primary hasn't answered within delay.
+        Returns (response, error, backends used, backend that answered); the slower request is cancelled.
+        """
+        hedging_stats["requests"] += 1
+        tasks = [asyncio.ensure_future(self._attempt(primary, endpoint, data))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                hedging_stats["hedged"] += 1
+                tasks.append(asyncio.ensure_future(self._attempt(backup, endpoint, data)))
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    response, task_error, _ = task.result()
+                    if response is not None:
+                        if task is not tasks[0]:
+                            hedging_stats["hedge_wins"] += 1
+                        return response, None, len(tasks), primary if task is tasks[0] else backup
+                    error = task_error or error
+            return None, error, len(tasks), None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _attempt(self, target: RpcEndpoint, endpoint: str, data: Optional[Dict[str, Any]]) -> Tuple[Optional[httpx.Response], Optional[Dict[str, Any]], Optional[bool]]:
+        """_send, unless the backend's circuit breaker refuses (reported as a failover with no error)."""
+        if not target.breaker.allow():
+            return None, None, True
+        return await self._send(target, endpoint, data)
+
+    async def _send(self, target: RpcEndpoint, endpoint: str, data: Optional[Dict[str, Any]]) -> Tuple[Optional[httpx.Response], Optional[Dict[str, Any]], Optional[bool]]:
+        """
+        POST to one backend and feed the outcome to its circuit breaker.
+        Returns (response, error, failover): failover is True if the request never reached the backend
+        (safe to resend anywhere), None if it may have (only idempotent calls may be resent).
+        """
+        recorded = False
+        timeout = self._timeout(target, endpoint)
+        target.inflight += 1
+        try:
+            async with self.semaphore:
+                with span("http", backend=target.address) as trace:
+                    started = time.monotonic()
+                    response = await self._client(target).post(f"/{endpoint}", json=data or {}, timeout=timeout)
+                    elapsed = time.monotonic() - started
+                    trace.set("status", response.status_code)
+                    trace.set("bytes", len(response.content))
+            recorded = True
+            target.latency.observe(endpoint, elapsed)
+            RPC_DURATION.observe(elapsed, self.service_name, target.address, endpoint)
+            RPC_RESPONSE_BYTES.observe(len(response.content), self.service_name, target.address, endpoint)
+            if response.status_code >= 500:
+                RPC_ERRORS.inc(self.service_name, target.address, endpoint)
+                target.breaker.record_failure()
+                return None, {"success": False, "error": f"{target.host}:{target.port} returned HTTP {response.status_code}"}, None
+            target.breaker.record_success()
+            return response, None, False
+        except httpx.ConnectError:
+            recorded = True
+            RPC_ERRORS.inc(self.service_name, target.address, endpoint)
+            target.breaker.record_failure()
+            return None, self._connection_error(target.host, target.port), True
+        except Exception as e:
+            recorded = True
+            RPC_ERRORS.inc(self.service_name, target.address, endpoint)
+            target.breaker.record_failure()
+            if isinstance(e, httpx.TimeoutException):
+                # Count the timeout as a sample so a too-tight learned timeout loosens again
+                target.latency.observe(endpoint, timeout)
+            return None, {"success": False, "error": str(e)}, None if isinstance(e, httpx.TransportError) else False
+        finally:
+            target.inflight -= 1
+            if not recorded:
+                # Cancelled mid-flight: hand back a half-open trial slot without judging the backend
+                target.breaker.release()
+
+    # --- Health Checks ---
+    def start_health_checks(self, interval: float = None):
+        """Start probing every backend in the background (needs a running event loop)."""
+        interval = interval if interval is not None else get_health_interval()
+        if interval <= 0 or self._health_task is not None:
+            return
+        self._health_task = asyncio.ensure_future(self._health_loop(interval))
+
+    async def _health_loop(self, interval: float):
+        while True:
+            await asyncio.gather(*(self.probe(target, timeout=min(interval, DEFAULT_RPC_TIMEOUT)) for target in self.endpoints))
+            await asyncio.sleep(interval)
+
+    async def probe(self, target: RpcEndpoint, timeout: float = DEFAULT_RPC_TIMEOUT) -> bool:
+        """Check one backend; a healthy answer closes its circuit, anything else counts as a failure."""
+        try:
+            response = await self._client(target).post(f"/{HEALTH_ENDPOINT}", json={}, timeout=timeout)
+            healthy = response.status_code == 200 and response.json().get("success", False)
+        except Exception:
+            healthy = False
+        if healthy:
+            target.breaker.record_success()
+        else:
+            target.breaker.record_failure()
+        return healthy
+
+    # --- Batched Full Node Methods ---
+    async def get_block_records(self, start: int, end: int, chunk_size: int = None, parallelism: int = None,
+                                fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get block records for heights [start, end), split into chunks fetched concurrently.
+        Ranges wider than MCP_BLOCK_RANGE_MAX are refused, so one call can't queue unbounded RPCs.
+        """
+        max_range = get_block_range_max()
+        if start < 0:
+            return {"success": False, "error": f"start ({start}) is negative; heights start at 0 "
+                                               f"(e.g. 0 to {min(max(end, 1), max_range)})"}
+        if end <= start:
+            return {"success": False, "error": f"end ({end}) must be greater than start ({start})"}
+        if end - start > max_range:
+            return {"success": False, "error": f"Range of {end - start} blocks exceeds the maximum of {max_range}; "
+                                               f"request at most {max_range} blocks per call (e.g. {start} to {start + max_range})"}
+        chunk_size = chunk_size or get_block_range_chunk()
+        chunks = [(lo, min(lo + chunk_size, end)) for lo in range(start, end, chunk_size)]
+        responses = await gather_limited(
+            [lambda lo=lo, hi=hi: self.get("get_block_records", {"start": lo, "end": hi}, fields) for lo, hi in chunks],
+            parallelism or get_batch_parallelism(),
+        )
+        block_records = []
+        for response in responses:
+            if not response.get("success"):
+                return response
+            block_records.extend(response.get("block_records") or [])
+        return {"success": True, "block_records": block_records}
+
+    async def get_coin_records_by_puzzle_hashes(self, puzzle_hashes: List[str], start_height: int = None, end_height: int = None,
+                                                include_spent_coins: bool = False, chunk_size: int = None,
+                                                parallelism: int = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get coin records for many puzzle hashes, chunked and fetched concurrently, merged without duplicates.
+        Deduplication needs the coin identity, so fields are applied after merging.
+        """
+        # Drop repeated hashes up front so they don't cost RPC payload or produce duplicate records
+        puzzle_hashes = list(dict.fromkeys(puzzle_hashes))
+        chunk_size = chunk_size or get_puzzle_hash_chunk()
+        base = {"include_spent_coins": include_spent_coins}
+        if start_height is not None: base["start_height"] = start_height
+        if end_height is not None: base["end_height"] = end_height
+
+        responses = await gather_limited(
+            [lambda chunk=puzzle_hashes[i:i + chunk_size]: self.get("get_coin_records_by_puzzle_hashes", {**base, "puzzle_hashes": chunk})
+             for i in range(0, len(puzzle_hashes), chunk_size)],
+            parallelism or get_batch_parallelism(),
+        )
+        coin_records = []
+        seen = set()
+        for response in responses:
+            if not response.get("success"):
+                return response
+            for record in response.get("coin_records") or []:
+                coin = record.get("coin", {})
+                # (parent, puzzle hash, amount) uniquely identifies a coin
+                coin_key = (coin.get("parent_coin_info"), coin.get("puzzle_hash"), coin.get("amount"))
+                if coin_key not in seen:
+                    seen.add(coin_key)
+                    coin_records.append(record)
+        merged = {"success": True, "coin_records": coin_records}
+        return project(merged, compile_fields(fields)) if fields else merged
+
+    async def scan_coin_records_by_puzzle_hash(self, puzzle_hash: str, start_height: int, end_height: int,
+                                               include_spent_coins: bool = False, window: int = None, parallelism: int = None,
+                                               max_records: int = None, on_window: Optional[Callable[[int, int], Awaitable[None]]] = None,
+                                               fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Get one page of coin records for a puzzle hash confirmed in [start_height, end_height): up to
+        `parallelism` height windows fetched concurrently, so no single RPC response has to cover the
+        whole range. The page ends at the last whole window that keeps it within max_records
+        (MCP_SCAN_MAX_RECORDS); a first window over the limit is halved until it fits or spans one height.
+        next_height is where the next page starts, or None once end_height is reached.
+        on_window(done, total) is awaited as each window completes.
+        """
+        window = window or get_coin_scan_window()
+        max_records = max_records or get_scan_max_records()
+        page_end = min(end_height, start_height + window * (parallelism or get_batch_parallelism()))
+        windows = [(lo, min(lo + window, page_end)) for lo in range(start_height, page_end, window)]
+        done = 0
+
+        async def fetch(lo, hi):
+            return await self.get("get_coin_records_by_puzzle_hash", {
+                "puzzle_hash": puzzle_hash, "start_height": lo, "end_height": hi, "include_spent_coins": include_spent_coins,
+            }, fields)
+
+        async def fetch_window(lo, hi):
+            nonlocal done
+            response = await fetch(lo, hi)
+            done += 1
+            if on_window is not None:
+                await on_window(done, len(windows))
+            return response
+
+        responses = await gather_limited([lambda lo=lo, hi=hi: fetch_window(lo, hi) for lo, hi in windows], len(windows))
+        coin_records = []
+        next_height = page_end
+        for (lo, hi), response in zip(windows, responses):
+            if not response.get("success"):
+                return response
+            records = response.get("coin_records") or []
+            if len(coin_records) + len(records) > max_records:
+                if coin_records:
+                    next_height = lo
+                    break
+                while len(records) > max_records and hi - lo > 1:
+                    hi = lo + (hi - lo) // 2
+                    response = await fetch(lo, hi)
+                    if not response.get("success"):
+                        return response
+                    records = response.get("coin_records") or []
+                coin_records.extend(records)
+                next_height = hi
+                break
+            coin_records.extend(records)
+        return {"success": True, "coin_records": coin_records, "next_height": next_height if next_height < end_height else None}
+
+    async def close(self):
+        """Stop health checks and close all pooled connections."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for target in self.endpoints:
+            await target.close()
+
+# --- Pooled Client Registries ---
+
+def _client_key(service_name: str, port: Optional[int]) -> Tuple[str, Tuple[Tuple[str, int], ...], str]:
+    root_path = get_chia_root()
+    addresses = resolve_addresses(service_name, load_chia_config(root_path), port)
+    cert = get_ssl_paths(service_name, root_path)["cert"]
+    return (service_name, tuple(addresses), cert)
+
+class AsyncClientRegistry:
+    """
+    Registry of AsyncChiaRpcClient instances, one set per running event loop.
+    httpx connections and asyncio semaphores belong to the loop that created them, so clients are
+    never shared across loops. All clients of a service in a loop share one concurrency semaphore.
+    """
+    def __init__(self, pool_size: int = None, max_concurrency: int = None):
+        self.pool_size = pool_size or get_rpc_pool_size()
+        self.max_concurrency = max_concurrency or get_rpc_max_concurrency()
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Any, Any]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, service_name: str, port: int = None) -> AsyncChiaRpcClient:
+        """Return the pooled async client for a service in the running event loop."""
+        loop = asyncio.get_running_loop()
+        key = _client_key(service_name, port)
+        with self._lock:
+            state = self._loops.setdefault(loop, {"clients": {}, "semaphores": {}})
+            client = state["clients"].get(key)
+            if client is None:
+                semaphore = state["semaphores"].get(service_name)
+                if semaphore is None:
+                    semaphore = state["semaphores"][service_name] = asyncio.Semaphore(self.max_concurrency)
+                client = AsyncChiaRpcClient(service_name, port=port, pool_size=self.pool_size, semaphore=semaphore)
+                if service_name == "full_node":
+                    # Full nodes share chain state, so reads can go to any of them
+                    client.balance_reads = True
+                    client.cache = get_response_cache()
+                    client.disk_cache = get_disk_cache(client.config.get("selected_network", "mainnet"))
+                client.start_health_checks()
+                state["clients"][key] = client
+            return client
+
+    def clients(self) -> List[AsyncChiaRpcClient]:
+        """Every pooled client, across all event loops."""
+        with self._lock:
+            return [client for state in list(self._loops.values()) for client in state["clients"].values()]
+
+    async def close(self):
+        """Close every pooled client belonging to the running event loop."""
+        with self._lock:
+            state = self._loops.pop(asyncio.get_running_loop(), None)
+        if state:
+            for client in state["clients"].values():
+                await client.close()
+
+_async_registry = AsyncClientRegistry()
+
+def get_async_client(service_name: str, port: int = None) -> AsyncChiaRpcClient:
+    """Get the shared pooled async client for a Chia service in the running event loop."""
+    return _async_registry.get(service_name, port)
+
+async def close_async_clients():
+    """Close all pooled async clients of the running event loop."""
+    await _async_registry.close()
+
+def _collect_metrics():
+    """Scrape-time metrics: backend load and health, request coalescing, hedging and retries."""
+    inflight: Dict[Tuple[str, str], int] = {}
+    circuit_open: Dict[Tuple[str, str], int] = {}
+    for client in _async_registry.clients():
+        for target in client.endpoints:
+            key = (client.service_name, target.address)
+            inflight[key] = inflight.get(key, 0) + target.inflight
+            circuit_open[key] = max(circuit_open.get(key, 0), int(target.breaker.state == "open"))
+    yield ("chaimcp_rpc_in_flight", "gauge", "Upstream Chia RPCs currently in flight.",
+           [({"service": s, "backend": b}, v) for (s, b), v in inflight.items()])
+    yield ("chaimcp_backend_circuit_open", "gauge", "1 while a backend's circuit breaker is open.",
+           [({"service": s, "backend": b}, v) for (s, b), v in circuit_open.items()])
+
+    calls, collapsed = coalescing_stats["calls"], coalescing_stats["collapsed"]
+    yield ("chaimcp_rpc_coalesced_total", "counter", "Read RPCs answered by an identical in-flight request.", [({}, collapsed)])
+    yield ("chaimcp_rpc_coalesced_ratio", "gauge", "Share of read RPCs answered by an identical in-flight request.",
+           [({}, hit_ratio(collapsed, calls - collapsed))])
+
+    requests, hedged, wins = hedging_stats["requests"], hedging_stats["hedged"], hedging_stats["hedge_wins"]
+    yield ("chaimcp_hedge_eligible_total", "counter", "Read RPCs eligible for hedging.", [({}, requests)])
+    yield ("chaimcp_hedged_total", "counter", "Read RPCs that were hedged to a second backend.", [({}, hedged)])
+    yield ("chaimcp_hedge_wins_total", "counter", "Hedged RPCs answered first by the second backend.", [({}, wins)])
+    yield ("chaimcp_hedge_rate", "gauge", "Share of eligible RPCs that were hedged.", [({}, hit_ratio(hedged, requests - hedged))])
+    yield ("chaimcp_hedge_win_rate", "gauge", "Share of hedged RPCs won by the hedge.", [({}, hit_ratio(wins, hedged - wins))])
+
+    budget = get_retry_budget().stats()
+    yield ("chaimcp_rpc_retries_total", "counter", "Read RPCs retried after an upstream failure.", [({}, budget["retries"])])
+    yield ("chaimcp_retry_budget_exhausted_total", "counter", "Retries refused because the retry budget was spent.", [({}, budget["exhausted"])])
+    yield ("chaimcp_retry_budget_tokens", "gauge", "Retries currently available in the retry budget.", [({}, budget["tokens"])])
+
+REGISTRY.register_collector(_collect_metrics)
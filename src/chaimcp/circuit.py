@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Dict, Any
+from .config import get_breaker_failures, get_breaker_reset
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker. After `failure_threshold` consecutive failures the circuit opens
+    and requests are refused immediately. Once `reset_timeout` seconds have passed it goes half-open
+    and lets a single trial request through: success closes the circuit, failure re-opens it.
+    Thread-safe, so the blocking client can share the same logic.
+    """
+    def __init__(self, failure_threshold: int = None, reset_timeout: float = None):
+        self.failure_threshold = max(1, failure_threshold or get_breaker_failures())
+        self.reset_timeout = reset_timeout if reset_timeout is not None else get_breaker_reset()
+        self.failures = 0
+        self.opened = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        # Called with self._lock held
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial = False
+        return self._state
+
+    def available(self) -> bool:
+        """Whether a request could currently be sent, without claiming the half-open trial."""
+        with self._lock:
+            state = self._current_state()
+            return state == CLOSED or (state == HALF_OPEN and not self._trial)
+
+    def allow(self) -> bool:
+        """Claim permission to send a request. In the half-open state only one caller gets it."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a claimed half-open trial whose request ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._state = CLOSED
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._current_state() == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self._current_state(), "failures": self.failures, "opened": self.opened}
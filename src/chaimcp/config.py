@@ -1,11 +1,27 @@
 import os
+import threading
 import yaml
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    # libyaml's C loader is an order of magnitude faster on a large farming config
+    from yaml import CSafeLoader as YamlLoader
+except ImportError: # pragma: no cover - depends on how PyYAML was built
+    from yaml import SafeLoader as YamlLoader
 
 DEFAULT_CHIA_ROOT = Path(os.path.expanduser("~/.chia/mainnet"))
 
 
+def _positive_int(name: str, default: int) -> int:
+    """Read an integer setting that must be at least 1, naming the variable if it isn't."""
+    value = int(os.environ.get(name, default))
+    if value < 1:
+        raise ValueError(f"{name} must be a positive integer, got {value}")
+    return value
+
 def get_mcp_auth_enabled() -> bool:
     """Check if MCP authentication is enabled (default: True)."""
     val = os.environ.get("MCP_AUTH_ENABLED", "true").lower()
@@ -16,21 +32,254 @@ def get_letsencrypt_enabled() -> bool:
     val = os.environ.get("LETSENCRYPT_ENABLED", "true").lower()
     return val in ("true", "1", "yes", "on")
 
+def get_json_passthrough_enabled() -> bool:
+    """Check if unmodified upstream RPC bodies are passed straight through to tool output (default: True)."""
+    val = os.environ.get("MCP_JSON_PASSTHROUGH", "true").lower()
+    return val in ("true", "1", "yes", "on")
+
+def get_json_compact_enabled() -> bool:
+    """Check if re-encoded tool output should be compact instead of indented (default: False)."""
+    val = os.environ.get("MCP_JSON_COMPACT", "false").lower()
+    return val in ("true", "1", "yes", "on")
+
+def get_rpc_pool_size() -> int:
+    """Get the max pooled connections kept per Chia RPC backend (default: 10)."""
+    return int(os.environ.get("MCP_RPC_POOL_SIZE", 10))
+
+def get_rpc_idle_timeout() -> float:
+    """Get seconds an idle pooled RPC connection is kept open (default: 60)."""
+    return float(os.environ.get("MCP_RPC_IDLE_TIMEOUT", 60))
+
+def get_rpc_max_concurrency() -> int:
+    """Get the max in-flight async RPCs allowed per Chia service (default: 100)."""
+    return int(os.environ.get("MCP_RPC_MAX_CONCURRENCY", 100))
+
+def get_block_range_chunk() -> int:
+    """Get how many blocks each get_block_records RPC fetches when scanning a range (default: 100)."""
+    return _positive_int("MCP_BLOCK_RANGE_CHUNK", 100)
+
+def get_block_range_max() -> int:
+    """Get the most blocks one get_block_records call may span (default: 1000)."""
+    return _positive_int("MCP_BLOCK_RANGE_MAX", 1000)
+
+def get_puzzle_hash_chunk() -> int:
+    """Get how many puzzle hashes each get_coin_records_by_puzzle_hashes RPC carries (default: 100)."""
+    return _positive_int("MCP_PUZZLE_HASH_CHUNK", 100)
+
+def get_coin_scan_window() -> int:
+    """Get the height window each coin record scan RPC covers (default: 10000 blocks)."""
+    return _positive_int("MCP_COIN_SCAN_WINDOW", 10000)
+
+def get_scan_max_records() -> int:
+    """Get the most coin records one scan_coin_records_by_puzzle_hash page may hold (default: 50000)."""
+    return _positive_int("MCP_SCAN_MAX_RECORDS", 50000)
+
+def get_batch_parallelism() -> int:
+    """Get how many chunk RPCs a batched tool call may have in flight at once (default: 4)."""
+    return _positive_int("MCP_BATCH_PARALLELISM", 4)
+
+def get_cache_max_entries() -> int:
+    """Get the max number of cached full-node responses; 0 disables the cache (default: 1024)."""
+    return int(os.environ.get("MCP_CACHE_MAX_ENTRIES", 1024))
+
+def get_cache_max_bytes() -> int:
+    """Get the memory budget of the full-node response cache, counted in response body bytes (default: 64 MB)."""
+    return int(float(os.environ.get("MCP_CACHE_MAX_MB", 64)) * 1024 * 1024)
+
+def get_cache_peak_ttl() -> float:
+    """Get how many seconds the known peak is trusted before re-checking it (default: 3)."""
+    return float(os.environ.get("MCP_CACHE_PEAK_TTL", 3))
+
+def get_disk_cache_dir() -> Optional[Path]:
+    """Get the directory for the persistent block cache, or None if unset (disabled)."""
+    val = os.environ.get("MCP_DISK_CACHE_DIR", "")
+    return Path(os.path.expanduser(val)) if val else None
+
+def get_disk_cache_max_bytes() -> int:
+    """Get the size limit of the persistent block cache (default: 512 MB)."""
+    return int(float(os.environ.get("MCP_DISK_CACHE_MAX_MB", 512)) * 1024 * 1024)
+
+def get_reorg_depth() -> int:
+    """Get how many blocks below the peak a block must be before it is treated as final (default: 32)."""
+    return int(os.environ.get("MCP_REORG_DEPTH", 32))
+
+def get_health_interval() -> float:
+    """Get seconds between background health probes of each RPC backend; 0 disables them (default: 5)."""
+    return float(os.environ.get("MCP_HEALTH_INTERVAL", 5))
+
+def get_breaker_failures() -> int:
+    """Get how many consecutive failures open a backend's circuit breaker (default: 5)."""
+    return int(os.environ.get("MCP_BREAKER_FAILURES", 5))
+
+def get_breaker_reset() -> float:
+    """Get seconds an open circuit breaker waits before letting a trial request through (default: 15)."""
+    return float(os.environ.get("MCP_BREAKER_RESET", 15))
+
+def get_hedge_enabled() -> bool:
+    """Check if read-only full node calls are hedged across backends (default: False)."""
+    val = os.environ.get("MCP_HEDGE_ENABLED", "false").lower()
+    return val in ("true", "1", "yes", "on")
+
+def get_hedge_percentile() -> float:
+    """Get the latency percentile after which a hedged request is sent to a second backend (default: 95)."""
+    return float(os.environ.get("MCP_HEDGE_PERCENTILE", 95))
+
+def get_hedge_min_delay() -> float:
+    """Get the minimum seconds to wait before sending a hedged request (default: 0.01)."""
+    return float(os.environ.get("MCP_HEDGE_MIN_DELAY", 0.01))
+
+def get_rpc_max_retries() -> int:
+    """Get how many times a failed read-only RPC may be retried (default: 2)."""
+    return int(os.environ.get("MCP_RPC_RETRIES", 2))
+
+def get_retry_base_delay() -> float:
+    """Get the base seconds of the jittered exponential backoff between retries (default: 0.1)."""
+    return float(os.environ.get("MCP_RETRY_BASE_DELAY", 0.1))
+
+def get_retry_budget_ratio() -> float:
+    """Get the fraction of RPCs the process may retry, so retries can't amplify an outage (default: 0.1)."""
+    return float(os.environ.get("MCP_RETRY_BUDGET_RATIO", 0.1))
+
+def get_rpc_max_timeout() -> float:
+    """Get the upper bound in seconds for learned per-endpoint RPC timeouts (default: 60)."""
+    return float(os.environ.get("MCP_RPC_MAX_TIMEOUT", 60))
+
+def get_events_enabled() -> bool:
+    """Check if the daemon WebSocket is used to receive chain and wallet events (default: True)."""
+    val = os.environ.get("MCP_EVENTS_ENABLED", "true").lower()
+    return val in ("true", "1", "yes", "on")
+
+def get_state_poll_interval() -> float:
+    """Get seconds between background refreshes of the blockchain state snapshot; 0 disables polling (default: 2)."""
+    return float(os.environ.get("MCP_STATE_POLL_INTERVAL", 2))
+
+def get_state_max_staleness() -> float:
+    """Get the default max age in seconds of a blockchain state served from the snapshot (default: 5)."""
+    return float(os.environ.get("MCP_STATE_MAX_STALENESS", 5))
+
+def get_wait_max_timeout() -> float:
+    """Get the longest a wait_for_* tool call may block, in seconds (default: 600)."""
+    return float(os.environ.get("MCP_WAIT_MAX_TIMEOUT", 600))
+
+def get_trace_exporter() -> str:
+    """Get the trace span exporter: "jsonl", "module:factory", or empty to disable tracing (default: disabled)."""
+    return os.environ.get("MCP_TRACE_EXPORTER", "").strip()
+
+def get_trace_file() -> Path:
+    """Get the file the jsonl trace exporter appends spans to (default: chaimcp-traces.jsonl)."""
+    return Path(os.path.expanduser(os.environ.get("MCP_TRACE_FILE", "chaimcp-traces.jsonl")))
+
+def get_trace_sample_rate() -> float:
+    """Get the fraction of tool calls (and other root spans) that are traced (default: 1.0)."""
+    return float(os.environ.get("MCP_TRACE_SAMPLE_RATE", 1.0))
+
+def get_profile_dir() -> Path:
+    """Get the directory profiles are written to (default: profiles)."""
+    return Path(os.path.expanduser(os.environ.get("MCP_PROFILE_DIR", "profiles")))
+
+def get_profile_sample_rate() -> float:
+    """Get the fraction of tool calls run under cProfile; 0 disables per-call profiling (default: 0)."""
+    return float(os.environ.get("MCP_PROFILE_SAMPLE_RATE", 0))
+
+def get_profile_max_seconds() -> float:
+    """Get the longest sampling profile the debug route may take, in seconds (default: 60)."""
+    return float(os.environ.get("MCP_PROFILE_MAX_SECONDS", 60))
+
+def get_mcp_workers() -> int:
+    """Get the number of worker processes serving the http transport (sse needs 1); 0 means one per CPU (default: 1)."""
+    workers = int(os.environ.get("MCP_WORKERS", 1))
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+def get_graceful_shutdown_timeout() -> float:
+    """Get how many seconds a stopping or restarting worker gives in-flight requests to finish (default: 25)."""
+    return float(os.environ.get("MCP_GRACEFUL_SHUTDOWN_TIMEOUT", 25))
+
+def get_debug_token() -> Optional[str]:
+    """Get the bearer token for /debug routes, or None if unset (routes disabled)."""
+    return os.environ.get("MCP_DEBUG_TOKEN") or None
+
+# Environment variable prefix used for each Chia service's host/port settings
+SERVICE_ENV_PREFIXES = {
+    "full_node": "CHIA_FULL_NODE",
+    "wallet": "CHIA_WALLET",
+    "data_layer": "CHIA_DATALAYER",
+    "daemon": "CHIA_DAEMON",
+}
+
+def validate_settings():
+    """Read the batching settings once, so a bad value stops the server at startup rather than failing tool calls."""
+    get_block_range_chunk()
+    get_block_range_max()
+    get_puzzle_hash_chunk()
+    get_coin_scan_window()
+    get_scan_max_records()
+    get_batch_parallelism()
+
+def get_service_endpoints(service_name: str, default_port: int) -> List[Tuple[str, int]]:
+    """
+    Get the (host, port) RPC endpoints of a Chia service from CHIA_<SERVICE>_HOST and CHIA_<SERVICE>_PORT.
+    HOST may be a comma-separated list whose entries can carry their own port ("node-a,node-b:18555");
+    PORT (or default_port) applies to entries without one. Defaults to localhost.
+    """
+    prefix = SERVICE_ENV_PREFIXES.get(service_name, f"CHIA_{service_name.upper()}")
+    port = int(os.environ.get(f"{prefix}_PORT", default_port))
+    entries = [e.strip() for e in os.environ.get(f"{prefix}_HOST", "").split(",") if e.strip()]
+
+    endpoints = []
+    for entry in entries or ["localhost"]:
+        parsed = urlsplit(f"//{entry}")
+        host = parsed.hostname or "localhost"
+        if ":" in host:
+            host = f"[{host}]" # IPv6 literal
+        endpoints.append((host, parsed.port or port))
+    return endpoints
+
 def get_chia_root() -> Path:
     """Get the Chia root directory via environment variable or default."""
     return Path(os.environ.get("CHIA_ROOT", DEFAULT_CHIA_ROOT))
 
+# config.yaml path -> ((mtime_ns, size), parsed config)
+_config_cache: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_config_lock = threading.Lock()
+
 def load_chia_config(root_path: Optional[Path] = None) -> Dict[str, Any]:
-    """Load the Chia configuration file."""
+    """
+    Load the Chia configuration file.
+    The parsed config is cached per process and only re-parsed when the file's mtime or size changes,
+    so callers must treat the returned dict as read-only.
+    """
     if root_path is None:
         root_path = get_chia_root()
     
     config_path = root_path / "config" / "config.yaml"
     if not config_path.exists():
         raise FileNotFoundError(f"Chia config not found at {config_path}")
-        
+
+    try:
+        stat = config_path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        # Can't fingerprint the file, so don't trust (or populate) the cache
+        signature = None
+
+    if signature is not None:
+        cached = _config_cache.get(config_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
     with open(config_path, "r") as f:
-        return yaml.safe_load(f)
+        config = yaml.load(f, Loader=YamlLoader) # nosec - YamlLoader is a safe loader
+
+    if signature is not None:
+        with _config_lock:
+            _config_cache[config_path] = (signature, config)
+    return config
+
+def clear_config_cache():
+    """Drop all cached configs and SSL paths."""
+    with _config_lock:
+        _config_cache.clear()
+    _resolve_ssl_paths.cache_clear()
 
 def get_ssl_paths(service_name: str, root_path: Optional[Path] = None) -> Dict[str, str]:
     """
@@ -39,7 +288,11 @@ def get_ssl_paths(service_name: str, root_path: Optional[Path] = None) -> Dict[s
     """
     if root_path is None:
         root_path = get_chia_root()
-    
+    cert, key, ca = _resolve_ssl_paths(service_name, root_path)
+    return {"cert": cert, "key": key, "ca": ca}
+
+@lru_cache(maxsize=64)
+def _resolve_ssl_paths(service_name: str, root_path: Path) -> Tuple[str, str, str]:
     # Standard location based on typical Chia layout since config parsing can be complex
     # for self-signed interaction within the same machine.
     # We'll try to find the standard private keys.
@@ -62,8 +315,8 @@ def get_ssl_paths(service_name: str, root_path: Optional[Path] = None) -> Dict[s
         # But let's check config if we want to be robust (skipped for MVP speed, assuming standard layout).
         pass
         
-    return {
-        "cert": str(crt_path),
-        "key": str(key_path),
-        "ca": str(base_ssl / "ca" / "private_ca.crt") # CA to verify server
-    }
+    return (
+        str(crt_path),
+        str(key_path),
+        str(base_ssl / "ca" / "private_ca.crt") # CA to verify server
+    )
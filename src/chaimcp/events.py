@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import secrets
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .cache import ResponseCache, get_peak, get_response_cache
+from .chia_client import create_ssl_context
+from .config import get_chia_root, load_chia_config, get_ssl_paths, get_service_endpoints, get_events_enabled
+
+try:
+    # Optional WebSocket client for daemon events (pip install chaimcp[events])
+    from websockets.asyncio.client import connect as ws_connect
+except ImportError: # pragma: no cover - exercised only when websockets is missing
+    ws_connect = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DAEMON_PORT = 55400
+
+# The daemon forwards service state changes to whoever registered as the UI
+EVENT_SUBSCRIBER = "wallet_ui"
+
+# Daemon message origins of the services we follow
+ORIGINS = {
+    "chia_full_node": "full_node",
+    "chia_wallet": "wallet",
+}
+
+# Event changes published on the bus (wallet events keep the wallet's own names, e.g. "tx_update")
+CONNECTED = "connected"
+DISCONNECTED = "disconnected"
+NEW_PEAK = "new_peak"
+REORG = "reorg"
+
+# An event: {"service": "full_node" | "wallet" | "daemon", "change": str, "data": dict}
+Event = Dict[str, Any]
+EventHandler = Callable[[Event], None]
+
+class EventBus:
+    """
+    In-process publish/subscribe for chain and wallet events.
+    Handlers run synchronously in the publisher's event loop, so they must be quick and must not block.
+    """
+    def __init__(self):
+        self._handlers: List[EventHandler] = []
+
+    def subscribe(self, handler: EventHandler) -> Callable[[], None]:
+        """Register a handler; returns a function that unsubscribes it."""
+        self._handlers.append(handler)
+        return lambda: self._handlers.remove(handler) if handler in self._handlers else None
+
+    def publish(self, event: Event):
+        for handler in list(self._handlers):
+            try:
+                handler(event)
+            except Exception:
+                # One broken subscriber must not starve the others
+                logger.exception("Event handler failed for %s", event.get("change"))
+
+_event_bus = EventBus()
+
+def get_event_bus() -> EventBus:
+    """Get the process-wide event bus."""
+    return _event_bus
+
+def invalidate_on_events(bus: EventBus, cache: ResponseCache) -> Callable[[], None]:
+    """
+    Drive a ResponseCache from pushed events: new peaks (and reorgs, which arrive as new peaks)
+    replace its peak immediately, and while the daemon connection is up the cache stops re-checking
+    the peak on a TTL. Returns the unsubscribe function.
+    """
+    def handler(event: Event):
+        if event["service"] == "daemon":
+            cache.set_live(event["change"] == CONNECTED)
+        elif event["service"] == "full_node" and event["change"] == NEW_PEAK:
+            cache.push_state(event["data"])
+    return bus.subscribe(handler)
+
+class DaemonEventListener:
+    """
+    Holds one WebSocket connection to the Chia daemon, registered to receive full node and wallet
+    state changes, and republishes them on an EventBus. Reconnects with backoff when the daemon
+    goes away; "connected"/"disconnected" events tell subscribers when pushed data can be trusted.
+    """
+    def __init__(self, bus: EventBus, reconnect_delay: float = 1, max_reconnect_delay: float = 60):
+        self.bus = bus
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.url: Optional[str] = None
+        self.connected = False
+        self._peak: Optional[Tuple[int, Optional[str]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start listening in the background (needs a running event loop)."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._set_connected(False)
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                # Resolved on every attempt: a missing Chia config or cert is retried, not fatal
+                root_path = get_chia_root()
+                config = load_chia_config(root_path)
+                host, port = get_service_endpoints("daemon", config.get("daemon_port", DEFAULT_DAEMON_PORT))[0]
+                self.url = f"wss://{host}:{port}"
+                context = create_ssl_context(get_ssl_paths("daemon", root_path))
+                async with ws_connect(self.url, ssl=context, max_size=None) as ws:
+                    await ws.send(json.dumps(self._register_message()))
+                    self._set_connected(True)
+                    delay = self.reconnect_delay
+                    async for message in ws:
+                        self.handle(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug("Daemon event connection to %s failed: %s", self.url, e)
+            self._set_connected(False)
+            await asyncio.sleep(delay)
+            delay = min(self.max_reconnect_delay, delay * 2)
+
+    @staticmethod
+    def _register_message() -> Dict[str, Any]:
+        return {
+            "command": "register_service",
+            "ack": False,
+            "data": {"service": EVENT_SUBSCRIBER},
+            "origin": "chaimcp",
+            "destination": "daemon",
+            "request_id": secrets.token_hex(32),
+        }
+
+    def _set_connected(self, connected: bool):
+        if connected != self.connected:
+            self.connected = connected
+            if not connected:
+                # Missed events can't be replayed, so the next peak must not be compared to a stale one
+                self._peak = None
+            self.bus.publish({"service": "daemon", "change": CONNECTED if connected else DISCONNECTED, "data": {}})
+
+    def handle(self, message: Dict[str, Any]):
+        """Translate one daemon message into bus events."""
+        service = ORIGINS.get(message.get("origin"))
+        data = message.get("data") or {}
+        if service == "full_node" and message.get("command") == "get_blockchain_state":
+            # The full node pushes a fresh blockchain state on every new peak
+            peak = get_peak(data)
+            if peak is None or peak == self._peak:
+                return
+            previous, self._peak = self._peak, peak
+            if previous is not None and peak[0] <= previous[0]:
+                self.bus.publish({"service": service, "change": REORG, "data": {"previous_peak": previous, "peak": peak}})
+            self.bus.publish({"service": service, "change": NEW_PEAK, "data": data})
+        elif service == "wallet" and message.get("command") == "state_changed" and data.get("state"):
+            self.bus.publish({"service": service, "change": data["state"], "data": data})
+
+_listener: Optional[DaemonEventListener] = None
+_unsubscribe_cache: Optional[Callable[[], None]] = None
+
+def start_event_listener() -> Optional[DaemonEventListener]:
+    """
+    Start the process-wide daemon listener and hook the response cache up to it.
+    Does nothing if disabled (MCP_EVENTS_ENABLED), and only logs a warning if websockets isn't installed.
+    """
+    global _listener, _unsubscribe_cache
+    if _listener is not None or not get_events_enabled():
+        return _listener
+    if ws_connect is None:
+        # Caches and wait_for_* tools still work, but only by polling the node
+        logger.warning("MCP_EVENTS_ENABLED is set but websockets isn't installed (pip install chaimcp[events]); "
+                       "falling back to polling for new peaks")
+        return None
+    cache = get_response_cache()
+    if cache is not None:
+        _unsubscribe_cache = invalidate_on_events(_event_bus, cache)
+    _listener = DaemonEventListener(_event_bus)
+    _listener.start()
+    return _listener
+
+async def stop_event_listener():
+    """Stop the process-wide daemon listener, if running."""
+    global _listener, _unsubscribe_cache
+    if _listener is not None:
+        await _listener.stop()
+        _listener = None
+    if _unsubscribe_cache is not None:
+        _unsubscribe_cache()
+        _unsubscribe_cache = None
@@ -0,0 +1,27 @@
+from collections import deque
+from typing import Deque, Dict, Optional
+
+class LatencyTracker:
+    """
+    Sliding window of recent latencies per RPC endpoint name for one backend,
+    used to derive percentile-based hedging delays and timeouts.
+    Must only be used from a single event loop.
+    """
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, endpoint: str, seconds: float):
+        samples = self._samples.get(endpoint)
+        if samples is None:
+            samples = self._samples[endpoint] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, endpoint: str, q: float) -> Optional[float]:
+        """The q-th percentile (0-100) of recent latencies, or None until min_samples have been seen."""
+        samples = self._samples.get(endpoint)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
@@ -1,12 +1,24 @@
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
 from mcp.server.auth.settings import AuthSettings
 from mcp.server.auth.provider import TokenVerifier, AccessToken
-from .config import get_mcp_auth_enabled
-from .chia_client import ChiaRpcClient
-import json
+from .config import get_mcp_auth_enabled, get_wait_max_timeout, get_debug_token, get_profile_max_seconds, get_mcp_workers, get_graceful_shutdown_timeout, validate_settings
+from .chia_client import get_async_client, close_async_clients
+from .cache import close_disk_caches
+from .events import start_event_listener, stop_event_listener, get_event_bus
+from .snapshot import get_state_snapshot
+from .serialization import dump_response
+from .metrics import REGISTRY, instrument_tool
+from .tracing import trace_tool
+from .profiling import profile_tool, sample_profile
+import asyncio
+import contextlib
+import hmac
 import os
+import sys
 
 from mcp.server.transport_security import TransportSecuritySettings
+from pydantic import Field
+from typing import Annotated
 
 # --- Authentication ---
 
@@ -41,13 +53,35 @@ if get_mcp_auth_enabled() and auth_token:
 # We enable DNS rebinding protection but allow the specific host used by Ingress
 transport_security = TransportSecuritySettings(
     enable_dns_rebinding_protection=True,
-    allowed_hosts=["localhost", "127.0.0.1", "mcpch.ai:*", "mcpch.ai"],
+    allowed_hosts=["localhost", "localhost:*", "127.0.0.1", "127.0.0.1:*", "mcpch.ai:*", "mcpch.ai"],
     allowed_origins=["http://localhost", "http://127.0.0.1", "https://mcpch.ai"]
 )
 
+# --- Background Services ---
+
+# Number of active lifespans (the HTTP app, plus one per MCP session) holding the background services
+_background_users = 0
+
+@contextlib.asynccontextmanager
+async def _background_services(app):
+    """Run the daemon event listener and state poller while at least one server or session lifespan is active."""
+    global _background_users
+    if _background_users == 0:
+        start_event_listener()
+        get_state_snapshot().start(get_event_bus())
+    _background_users += 1
+    try:
+        yield {}
+    finally:
+        _background_users -= 1
+        if _background_users == 0:
+            await get_state_snapshot().stop()
+            await stop_event_listener()
+
 # Initialize FastMCP server
 mcp = FastMCP(
     "chaimcp",
+    lifespan=_background_services,
     auth=auth_settings,
     token_verifier=token_verifier,
     transport_security=transport_security,
@@ -59,6 +93,8 @@ mcp = FastMCP(
 def register_tool(name: str = None, description: str = None):
     """
     Decorator to register a tool with FastMCP, unless it is listed in MCP_DISABLED_TOOLS.
+    Registered tools are instrumented for the /metrics route, traced (see tracing.py), and
+    a sampled fraction of calls is profiled if MCP_PROFILE_SAMPLE_RATE is set.
     """
     def decorator(func):
         tool_name = name or func.__name__
@@ -67,209 +103,310 @@ def register_tool(name: str = None, description: str = None):
         disabled_tools = [t.strip() for t in disabled_tools_str.split(",") if t.strip()]
         
         if tool_name in disabled_tools:
-            print(f"Disabled tool: {tool_name}")
+            print(f"Disabled tool: {tool_name}", file=sys.stderr)
             return func
             
-        return mcp.tool(name=name, description=description)(func)
+        return mcp.tool(name=name, description=description)(instrument_tool(tool_name, trace_tool(tool_name, profile_tool(tool_name, func))))
     return decorator
 
+# Optional projection accepted by the read tools (see projection.compile_fields)
+Fields = Annotated[list[str] | None, Field(description=(
+    'Only return these fields, as dotted paths such as "coin_records.coin.amount" '
+    '(lists are traversed implicitly, "*" matches any key). "success" and "error" are always kept.'
+))]
+
+# Max wait accepted by the long-poll tools
+WaitTimeout = Annotated[float, Field(description="Seconds to wait at most (capped at MCP_WAIT_MAX_TIMEOUT).")]
+
+def _wait_result(response: dict, reached: bool) -> str:
+    """Render a long-poll result: the last response plus whether the condition was reached before the timeout."""
+    if not response.get("success"):
+        return dump_response(response)
+    return dump_response({**response, "reached": reached})
+
 # --- Full Node Tools ---
 
 @register_tool()
-def get_blockchain_state() -> str:
+async def get_blockchain_state(max_staleness: Annotated[float | None, Field(description=(
+    "Max age in seconds of the returned state; 0 always asks the node. Defaults to MCP_STATE_MAX_STALENESS."
+))] = None) -> str:
     """
     Get the current state of the blockchain (sync status, peak height, difficulty).
+    Served from a shared snapshot that is kept fresh in the background.
+    """
+    return dump_response(await get_state_snapshot().get(max_staleness))
+
+@register_tool()
+async def wait_for_height(height: int, timeout: WaitTimeout = 60) -> str:
+    """
+    Wait until the chain peak reaches a height, then return the blockchain state.
+    Returns early with "reached": false if the timeout expires first.
     """
-    client = ChiaRpcClient("full_node")
-    return json.dumps(client.get_blockchain_state(), indent=2)
+    snapshot = get_state_snapshot()
+
+    async def check():
+        state = await snapshot.get()
+        peak = (state.get("blockchain_state") or {}).get("peak") or {}
+        return state, peak.get("height", -1) >= height
+
+    return _wait_result(*await snapshot.wait_until(check, min(timeout, get_wait_max_timeout())))
 
 @register_tool()
-def get_network_info() -> str:
+async def wait_for_coin_spent(coin_id: str, timeout: WaitTimeout = 60) -> str:
+    """
+    Wait until a coin is spent, then return its coin record.
+    Returns early with "reached": false if the timeout expires first.
+    """
+    client = get_async_client("full_node")
+
+    async def check():
+        response = await client.get("get_coin_record_by_name", {"name": coin_id})
+        record = response.get("coin_record") or {}
+        return response, bool(record.get("spent") or record.get("spent_block_index"))
+
+    return _wait_result(*await get_state_snapshot().wait_until(check, min(timeout, get_wait_max_timeout())))
+
+@register_tool()
+async def get_network_info() -> str:
     """Get network name and prefix (e.g., mainnet, xch)."""
-    client = ChiaRpcClient("full_node")
-    return json.dumps(client.get_network_info(), indent=2)
+    client = get_async_client("full_node")
+    return dump_response(await client.get_network_info())
 
 @register_tool()
-def get_block_record_by_height(height: int) -> str:
+async def get_block_record_by_height(height: int, fields: Fields = None) -> str:
     """Get a block record by its height."""
-    client = ChiaRpcClient("full_node")
-    return json.dumps(client.get("get_block_record_by_height", {"height": height}), indent=2)
+    client = get_async_client("full_node")
+    return dump_response(await client.get("get_block_record_by_height", {"height": height}, fields))
+
+@register_tool()
+async def get_block_records(start: int, end: int, fields: Fields = None) -> str:
+    """Get block records for heights start (inclusive) to end (exclusive), at most MCP_BLOCK_RANGE_MAX (default 1000) per call."""
+    client = get_async_client("full_node")
+    return dump_response(await client.get_block_records(start, end, fields=fields))
 
 @register_tool()
-def get_block_record(header_hash: str) -> str:
+async def get_block_record(header_hash: str, fields: Fields = None) -> str:
     """Get a block record by its header hash."""
-    client = ChiaRpcClient("full_node")
-    return json.dumps(client.get("get_block_record", {"header_hash": header_hash}), indent=2)
+    client = get_async_client("full_node")
+    return dump_response(await client.get("get_block_record", {"header_hash": header_hash}, fields))
 
 @register_tool()
-def get_coin_records_by_puzzle_hash(puzzle_hash: str, start_height: int = None, end_height: int = None, include_spent_coins: bool = False) -> str:
+async def get_coin_records_by_puzzle_hash(puzzle_hash: str, start_height: int = None, end_height: int = None, include_spent_coins: bool = False, fields: Fields = None) -> str:
     """Get coin records for a puzzle hash."""
     data = {"puzzle_hash": puzzle_hash, "include_spent_coins": include_spent_coins}
     if start_height is not None: data["start_height"] = start_height
     if end_height is not None: data["end_height"] = end_height
-    client = ChiaRpcClient("full_node")
-    return json.dumps(client.get("get_coin_records_by_puzzle_hash", data), indent=2)
+    client = get_async_client("full_node")
+    return dump_response(await client.get("get_coin_records_by_puzzle_hash", data, fields))
 
 @register_tool()
-def get_coin_records_by_parent_ids(parent_ids: list[str], start_height: int = None, end_height: int = None, include_spent_coins: bool = False) -> str:
+async def scan_coin_records_by_puzzle_hash(puzzle_hash: str, start_height: int = 0, end_height: int = None, include_spent_coins: bool = False, cursor: int = None, fields: Fields = None, ctx: Context | None = None) -> str:
+    """
+    Page through coin records for a busy puzzle hash over a wide height range.
+    Each call covers a bounded slice of heights and at most MCP_SCAN_MAX_RECORDS records; pass the
+    returned next_cursor back as cursor (and the returned end_height, with the same other arguments)
+    until next_cursor is null.
+    end_height defaults to the current peak.
+    """
+    client = get_async_client("full_node")
+    if end_height is None:
+        state = await client.get_blockchain_state()
+        if not state.get("success"):
+            return dump_response(state)
+        end_height = ((state.get("blockchain_state") or {}).get("peak") or {}).get("height", -1) + 1
+
+    page_start = start_height if cursor is None else cursor
+
+    async def on_window(done: int, total: int):
+        if ctx is not None:
+            await ctx.report_progress(done, total, f"Scanned {done}/{total} height windows")
+
+    result = await client.scan_coin_records_by_puzzle_hash(puzzle_hash, page_start, end_height, include_spent_coins, on_window=on_window, fields=fields)
+    if result.get("success"):
+        result["next_cursor"] = result.pop("next_height")
+        result["end_height"] = end_height
+    return dump_response(result)
+
+@register_tool()
+async def get_coin_records_by_puzzle_hashes(puzzle_hashes: list[str], start_height: int = None, end_height: int = None, include_spent_coins: bool = False, fields: Fields = None) -> str:
+    """Get coin records for a list of puzzle hashes (e.g. all addresses of a wallet) in one call."""
+    client = get_async_client("full_node")
+    return dump_response(await client.get_coin_records_by_puzzle_hashes(puzzle_hashes, start_height, end_height, include_spent_coins, fields=fields))
+
+@register_tool()
+async def get_coin_records_by_parent_ids(parent_ids: list[str], start_height: int = None, end_height: int = None, include_spent_coins: bool = False, fields: Fields = None) -> str:
     """Get coin records by parent coin IDs."""
     data = {"parent_ids": parent_ids, "include_spent_coins": include_spent_coins}
     if start_height is not None: data["start_height"] = start_height
     if end_height is not None: data["end_height"] = end_height
-    client = ChiaRpcClient("full_node")
-    return json.dumps(client.get("get_coin_records_by_parent_ids", data), indent=2)
+    client = get_async_client("full_node")
+    return dump_response(await client.get("get_coin_records_by_parent_ids", data, fields))
 
 @register_tool()
-def push_tx(spend_bundle: dict) -> str:
+async def push_tx(spend_bundle: dict) -> str:
     """Push a transaction spend bundle to the network."""
-    client = ChiaRpcClient("full_node")
-    return json.dumps(client.get("push_tx", {"spend_bundle": spend_bundle}), indent=2)
+    client = get_async_client("full_node")
+    return dump_response(await client.get("push_tx", {"spend_bundle": spend_bundle}))
 
 @register_tool()
-def get_all_mempool_tx_ids() -> str:
+async def get_all_mempool_tx_ids() -> str:
     """Get all transaction IDs currently in the mempool."""
-    client = ChiaRpcClient("full_node")
-    return json.dumps(client.get("get_all_mempool_tx_ids"), indent=2)
+    client = get_async_client("full_node")
+    return dump_response(await client.get("get_all_mempool_tx_ids"))
 
 @register_tool()
-def get_mempool_item_by_tx_id(tx_id: str) -> str:
+async def get_mempool_item_by_tx_id(tx_id: str, fields: Fields = None) -> str:
     """Get a mempool item by transaction ID."""
-    client = ChiaRpcClient("full_node")
-    return json.dumps(client.get("get_mempool_item_by_tx_id", {"tx_id": tx_id}), indent=2)
+    client = get_async_client("full_node")
+    return dump_response(await client.get("get_mempool_item_by_tx_id", {"tx_id": tx_id}, fields))
 
 # --- Wallet Tools ---
 
 @register_tool()
-def get_wallet_balance(wallet_id: int = 1) -> str:
+async def get_wallet_balance(wallet_id: int = 1) -> str:
     """Get the balance of a specific wallet."""
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get_wallet_balance(wallet_id), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get_wallet_balance(wallet_id))
 
 @register_tool()
-def get_wallets(type: int = None) -> str:
+async def get_wallets(type: int = None) -> str:
     """Get a list of wallets."""
     data = {}
     if type is not None: data["type"] = type
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("get_wallets", data), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("get_wallets", data))
 
 @register_tool()
-def get_transactions(wallet_id: int = 1, start: int = 0, end: int = 50, reverse: bool = False) -> str:
+async def get_transactions(wallet_id: int = 1, start: int = 0, end: int = 50, reverse: bool = False, fields: Fields = None) -> str:
     """Get transactions for a wallet."""
     data = {"wallet_id": wallet_id, "start": start, "end": end, "reverse": reverse}
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("get_transactions", data), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("get_transactions", data, fields))
 
 @register_tool()
-def get_transaction(transaction_id: str) -> str:
+async def get_transaction(transaction_id: str, fields: Fields = None) -> str:
     """Get full details of a specific transaction."""
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("get_transaction", {"transaction_id": transaction_id}), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("get_transaction", {"transaction_id": transaction_id}, fields))
 
 @register_tool()
-def send_transaction(wallet_id: int, amount: int, address: str, fee: int = 0) -> str:
+async def wait_for_tx_confirmation(transaction_id: str, timeout: WaitTimeout = 60) -> str:
+    """
+    Wait until a wallet transaction is confirmed on chain, then return it.
+    Returns early with "reached": false if the timeout expires first.
+    """
+    client = get_async_client("wallet")
+
+    async def check():
+        response = await client.get("get_transaction", {"transaction_id": transaction_id})
+        return response, bool((response.get("transaction") or {}).get("confirmed"))
+
+    return _wait_result(*await get_state_snapshot().wait_until(check, min(timeout, get_wait_max_timeout())))
+
+@register_tool()
+async def send_transaction(wallet_id: int, amount: int, address: str, fee: int = 0) -> str:
     """Send a transaction (amount in mojos)."""
     data = {"wallet_id": wallet_id, "amount": amount, "address": address, "fee": fee}
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("send_transaction", data), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("send_transaction", data))
 
 @register_tool()
-def get_next_address(wallet_id: int = 1, new_address: bool = True) -> str:
+async def get_next_address(wallet_id: int = 1, new_address: bool = True) -> str:
     """Get the next address for a wallet."""
     data = {"wallet_id": wallet_id, "new_address": new_address}
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("get_next_address", data), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("get_next_address", data))
 
 @register_tool()
-def get_farmed_amount() -> str:
+async def get_farmed_amount() -> str:
     """Get the total amount farmed."""
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("get_farmed_amount"), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("get_farmed_amount"))
 
 # --- Key Management Tools (High Security Risk - Disable via MCP_DISABLED_TOOLS) ---
 
 @register_tool()
-def generate_mnemonic() -> str:
+async def generate_mnemonic() -> str:
     """Generate a new 24-word mnemonic."""
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("generate_mnemonic"), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("generate_mnemonic"))
 
 @register_tool()
-def add_key(mnemonic: list[str]) -> str:
+async def add_key(mnemonic: list[str]) -> str:
     """Add a key from mnemonic."""
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("add_key", {"mnemonic": mnemonic}), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("add_key", {"mnemonic": mnemonic}))
 
 @register_tool()
-def delete_key(fingerprint: int) -> str:
+async def delete_key(fingerprint: int) -> str:
     """Delete a key by fingerprint."""
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("delete_key", {"fingerprint": fingerprint}), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("delete_key", {"fingerprint": fingerprint}))
 
 @register_tool()
-def delete_all_keys() -> str:
+async def delete_all_keys() -> str:
     """Delete all keys from the keychain."""
-    client = ChiaRpcClient("wallet")
-    return json.dumps(client.get("delete_all_keys"), indent=2)
+    client = get_async_client("wallet")
+    return dump_response(await client.get("delete_all_keys"))
 
 # --- Datalayer Tools ---
 
 @register_tool()
-def create_data_store(fee: int = 0) -> str:
+async def create_data_store(fee: int = 0) -> str:
     """Create a new Datalayer store."""
-    client = ChiaRpcClient("data_layer")
-    return json.dumps(client.get("create_data_store", {"fee": fee}), indent=2)
+    client = get_async_client("data_layer")
+    return dump_response(await client.get("create_data_store", {"fee": fee}))
 
 @register_tool()
-def get_value(store_id: str, key: str, root_hash: str = None) -> str:
+async def get_value(store_id: str, key: str, root_hash: str = None) -> str:
     """Get a value from a Datalayer store."""
     data = {"id": store_id, "key": key}
     if root_hash: data["root_hash"] = root_hash
-    client = ChiaRpcClient("data_layer")
-    return json.dumps(client.get("get_value", data), indent=2)
+    client = get_async_client("data_layer")
+    return dump_response(await client.get("get_value", data))
 
 @register_tool()
-def update_data_store(store_id: str, changelist: list[dict], fee: int = 0) -> str:
+async def update_data_store(store_id: str, changelist: list[dict], fee: int = 0) -> str:
     """
     Update a Datalayer store.
     changelist format: [{"action": "insert", "key": "hex", "value": "hex"}, ...]
     """
-    client = ChiaRpcClient("data_layer")
-    return json.dumps(client.get("update_data_store", {"id": store_id, "changelist": changelist, "fee": fee}), indent=2)
+    client = get_async_client("data_layer")
+    return dump_response(await client.get("update_data_store", {"id": store_id, "changelist": changelist, "fee": fee}))
 
 @register_tool()
-def get_keys(store_id: str, root_hash: str = None) -> str:
+async def get_keys(store_id: str, root_hash: str = None) -> str:
     """Get all keys for a Datalayer store."""
     data = {"id": store_id}
     if root_hash: data["root_hash"] = root_hash
-    client = ChiaRpcClient("data_layer")
-    return json.dumps(client.get("get_keys", data), indent=2)
+    client = get_async_client("data_layer")
+    return dump_response(await client.get("get_keys", data))
 
 @register_tool()
-def get_root(store_id: str) -> str:
+async def get_root(store_id: str) -> str:
     """Get the current root hash of a store."""
-    client = ChiaRpcClient("data_layer")
-    return json.dumps(client.get("get_root", {"id": store_id}), indent=2)
+    client = get_async_client("data_layer")
+    return dump_response(await client.get("get_root", {"id": store_id}))
 
 @register_tool()
-def subscribe(store_id: str, urls: list[str] = []) -> str:
+async def subscribe(store_id: str, urls: list[str] = []) -> str:
     """Subscribe to a Datalayer store."""
-    client = ChiaRpcClient("data_layer")
-    return json.dumps(client.get("subscribe", {"id": store_id, "urls": urls}), indent=2)
+    client = get_async_client("data_layer")
+    return dump_response(await client.get("subscribe", {"id": store_id, "urls": urls}))
 
 @register_tool()
-def unsubscribe(store_id: str) -> str:
+async def unsubscribe(store_id: str) -> str:
     """Unsubscribe from a Datalayer store."""
-    client = ChiaRpcClient("data_layer")
-    return json.dumps(client.get("unsubscribe", {"id": store_id}), indent=2)
+    client = get_async_client("data_layer")
+    return dump_response(await client.get("unsubscribe", {"id": store_id}))
 
 @register_tool()
-def get_kv_diff(store_id: str, hash_1: str, hash_2: str) -> str:
+async def get_kv_diff(store_id: str, hash_1: str, hash_2: str) -> str:
     """Get the key-value difference between two root hashes."""
-    client = ChiaRpcClient("data_layer")
-    return json.dumps(client.get("get_kv_diff", {"id": store_id, "hash_1": hash_1, "hash_2": hash_2}), indent=2)
+    client = get_async_client("data_layer")
+    return dump_response(await client.get("get_kv_diff", {"id": store_id, "hash_1": hash_1, "hash_2": hash_2}))
 
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 
 @mcp.custom_route("/.well-known/oauth-authorization-server", methods=["GET"])
 async def well_known_oauth_auth(request):
@@ -311,10 +448,93 @@ async def oauth_token(request):
         "expires_in": 3600
     })
 
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request):
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@mcp.custom_route("/debug/profile", methods=["POST"])
+async def debug_profile(request):
+    """
+    Take a sampling profile of the live server for ?seconds=N (default 10, capped by MCP_PROFILE_MAX_SECONDS)
+    and write it to MCP_PROFILE_DIR as collapsed stacks. Needs "Authorization: Bearer $MCP_DEBUG_TOKEN";
+    without a configured token the route does not exist.
+    """
+    token = get_debug_token()
+    if token is None:
+        return JSONResponse({"error": "Not Found"}, status_code=404)
+    supplied = request.headers.get("authorization", "")
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    try:
+        seconds = float(request.query_params.get("seconds", 10))
+    except ValueError:
+        return JSONResponse({"error": "seconds must be a number"}, status_code=400)
+    seconds = min(max(seconds, 0.0), get_profile_max_seconds())
+    # Sampling runs in a worker thread so the event loop keeps serving (and shows up in the profile)
+    result = await asyncio.to_thread(sample_profile, seconds)
+    return JSONResponse(result, status_code=200 if result["success"] else 409)
+
+def _with_background_services(lifespan):
+    """Wrap a Starlette lifespan so background services run for the whole life of the app."""
+    @contextlib.asynccontextmanager
+    async def wrapped(app):
+        async with _background_services(app):
+            async with lifespan(app) as state:
+                yield state
+    return wrapped
+
+def _close_clients_on_shutdown(lifespan):
+    """Wrap a Starlette lifespan so pooled async RPC clients and disk caches are closed when the server stops."""
+    @contextlib.asynccontextmanager
+    async def wrapped(app):
+        try:
+            async with lifespan(app) as state:
+                yield state
+        finally:
+            await close_async_clients()
+            # Writes back batched access times, which would otherwise be lost
+            await asyncio.to_thread(close_disk_caches)
+    return wrapped
+
+def create_app():
+    """
+    Build the Starlette app for MCP_TRANSPORT (sse or http). Also the app factory each worker
+    process loads with MCP_WORKERS > 1 ("chaimcp.main:create_app"), so every worker owns its
+    caches, connection pools and background services. Only a MCP_DISK_CACHE_DIR cache is shared.
+    With several workers, streamable HTTP runs stateless: a client's next request may reach any
+    worker, so no MCP session may live in one worker's memory.
+    """
+    transport = os.environ.get("MCP_TRANSPORT", "stdio")
+    if transport == "sse":
+        starlette_app = mcp.sse_app()
+    else:
+        # transport == "http"
+        if get_mcp_workers() > 1:
+            mcp.settings.stateless_http = True
+        starlette_app = mcp.streamable_http_app()
+
+        # WORKAROUND: FastMCP SDK bug - StreamableHTTPASGIApp is mounted via Route without methods.
+        # Starlette defaults Route methods to GET/HEAD, rejecting POST with 405 Method Not Allowed.
+        for route in starlette_app.routes:
+            if getattr(route, "path", None) == "/mcp":
+                if hasattr(route, "methods") and route.methods is not None:
+                    if isinstance(route.methods, set):
+                        route.methods.add("POST")
+                    else:
+                        route.methods = set(route.methods) | {"POST"}
+
+    starlette_app.router.lifespan_context = _close_clients_on_shutdown(_with_background_services(starlette_app.router.lifespan_context))
+    return starlette_app
+
 def main():
-    """Entry point for the application script."""
+    """Entry point for the application script. Logs go to stderr: with stdio, stdout carries the protocol."""
     transport = os.environ.get("MCP_TRANSPORT", "stdio")
-    print(f"Starting ChaiMCP server with transport: {transport}")
+    print(f"Starting ChaiMCP server with transport: {transport}", file=sys.stderr)
+    try:
+        validate_settings()
+    except ValueError as e:
+        print(f"Invalid configuration: {e}", file=sys.stderr)
+        sys.exit(1)
 
     if transport in ["sse", "http"]:
         import uvicorn
@@ -328,41 +548,34 @@ def main():
         # Check if SSL files exist
         ssl_config = {}
         if os.path.exists(ssl_keyfile) and os.path.exists(ssl_certfile):
-             print(f"SSL enabled. Using cert: {ssl_certfile}")
+             print(f"SSL enabled. Using cert: {ssl_certfile}", file=sys.stderr)
              ssl_config = {
                  "ssl_keyfile": ssl_keyfile,
                  "ssl_certfile": ssl_certfile
              }
         else:
-             print("SSL files not found, running HTTP only.")
-
-        if transport == "sse":
-            starlette_app = mcp.sse_app()
-        else:
-            # transport == "http"
-            starlette_app = mcp.streamable_http_app()
-            
-            # WORKAROUND: FastMCP SDK bug - StreamableHTTPASGIApp is mounted via Route without methods.
-            # Starlette defaults Route methods to GET/HEAD, rejecting POST with 405 Method Not Allowed.
-            for route in starlette_app.routes:
-                if getattr(route, "path", None) == "/mcp":
-                    if hasattr(route, "methods") and route.methods is not None:
-                        if isinstance(route.methods, set):
-                            route.methods.add("POST")
-                        else:
-                            route.methods = set(route.methods) | {"POST"}
-        
-        print("ROUTES:", [r.path for r in starlette_app.routes])
-
-        uvicorn.run(
-            starlette_app, 
-            host=host, 
-            port=port, 
-            **ssl_config
-        )
+             print("SSL files not found, running HTTP only.", file=sys.stderr)
+
+        # Stop accepting, then let in-flight requests finish before the pod's grace period runs out
+        server_config = {"host": host, "port": port, "timeout_graceful_shutdown": get_graceful_shutdown_timeout(), **ssl_config}
+        workers = get_mcp_workers()
+        if workers > 1 and transport == "sse":
+            # An SSE session's message endpoint only exists in the worker holding its stream
+            print("MCP_WORKERS > 1 needs MCP_TRANSPORT=http; SSE sessions can't be shared between workers.", file=sys.stderr)
+            sys.exit(1)
+        if workers > 1:
+            # Workers share the listening socket. uvicorn's supervisor replaces workers that die, and
+            # SIGHUP reloads them one at a time: a replacement starts before the old worker drains.
+            print(f"Starting {workers} workers", file=sys.stderr)
+            uvicorn.run("chaimcp.main:create_app", factory=True, workers=workers, **server_config)
+            return
+
+        starlette_app = create_app()
+        print("ROUTES:", [r.path for r in starlette_app.routes], file=sys.stderr)
+        uvicorn.run(starlette_app, **server_config)
     else:
         mcp.run(transport=transport)
 
 if __name__ == "__main__": # pragma: no cover
-    print("ChaiMCP module loaded")
+    print("ChaiMCP module loaded", file=sys.stderr)
     main()
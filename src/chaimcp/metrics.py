@@ -0,0 +1,186 @@
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds, and response size buckets in bytes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# A collected sample: (label values by name, value)
+Sample = Tuple[Dict[str, str], float]
+# A collector returns (name, type, help, samples) for metrics computed at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"] + self._render_samples()
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[Any, ...], float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(labels, 0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in items]
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: Any, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: Any, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[Tuple[Any, ...], list] = {}
+
+    def observe(self, value: float, *labels: Any):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, *labels: Any) -> int:
+        entry = self._values.get(labels)
+        return entry[2] if entry else 0
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items()]
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Holds the process's metrics and scrape-time collectors, and renders the Prometheus text format."""
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector):
+        """Add a function reporting values (cache stats, pool state, ...) that are only read at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+TOOL_CALLS = REGISTRY.counter("chaimcp_tool_calls_total", "MCP tool calls.", ("tool",))
+TOOL_ERRORS = REGISTRY.counter("chaimcp_tool_errors_total", "MCP tool calls that raised or returned success=false.", ("tool",))
+TOOL_DURATION = REGISTRY.histogram("chaimcp_tool_duration_seconds", "MCP tool call latency.", ("tool",))
+TOOL_IN_FLIGHT = REGISTRY.gauge("chaimcp_tool_in_flight", "MCP tool calls currently running.", ("tool",))
+
+RPC_DURATION = REGISTRY.histogram("chaimcp_rpc_duration_seconds", "Upstream Chia RPC latency.", ("service", "backend", "endpoint"))
+RPC_RESPONSE_BYTES = REGISTRY.histogram("chaimcp_rpc_response_bytes", "Upstream Chia RPC response body size.", ("service", "backend", "endpoint"), BYTES_BUCKETS)
+RPC_ERRORS = REGISTRY.counter("chaimcp_rpc_errors_total", "Upstream Chia RPCs that failed at the transport or HTTP level.", ("service", "backend", "endpoint"))
+
+# Set by instrument_tool for the duration of a tool call, so record_response can flag failed results
+_tool_failed: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("chaimcp_tool_failed", default=None)
+
+def record_response(response: Any):
+    """Note a response rendered by the current tool call; success=false counts as a tool error."""
+    failed = _tool_failed.get()
+    if failed is not None and isinstance(response, dict) and response.get("success") is False:
+        failed[0] = True
+
+def instrument_tool(name: str, func: Callable) -> Callable:
+    """Wrap an async tool to record its call count, errors, latency and in-flight count."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        failed = [False]
+        token = _tool_failed.set(failed)
+        TOOL_CALLS.inc(name)
+        TOOL_IN_FLIGHT.inc(name)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except BaseException:
+            failed[0] = True
+            raise
+        finally:
+            TOOL_DURATION.observe(time.perf_counter() - started, name)
+            TOOL_IN_FLIGHT.dec(name)
+            if failed[0]:
+                TOOL_ERRORS.inc(name)
+            _tool_failed.reset(token)
+    return wrapper
+
+def hit_ratio(hits: float, misses: float) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
@@ -0,0 +1,650 @@
+"""
+Local stand-in for the Chia full_node, wallet and data_layer RPC services, for hermetic benchmarks.
+
+Each service is served over HTTPS with mutual TLS, using a private CA and per-service certificates
+laid out like a real CHIA_ROOT, so chaimcp talks to it exactly as it would to a node:
+
+    python -m chaimcp.mock_node --root /tmp/mock-chia --latency 0.005
+    CHIA_ROOT=/tmp/mock-chia MCP_EVENTS_ENABLED=false chaimcp
+
+Answers come from a deterministic synthetic chain, coin set and datalayer stores. Latency, jitter
+and payload size are configurable. Certificate generation needs `pip install chaimcp[bench]`.
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import random
+import ssl
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import uvicorn
+import yaml
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+try:
+    # Optional, only needed to create the mock node's certificates (pip install chaimcp[bench])
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+except ImportError: # pragma: no cover - exercised only when cryptography is missing
+    x509 = None
+
+SERVICES = ("full_node", "wallet", "data_layer")
+
+MOJO_PER_XCH = 1_000_000_000_000
+GENESIS_TIMESTAMP = 1616167606
+# Mainnet averages a transaction block every ~52 seconds and a block every ~18.75
+BLOCK_SECONDS = 18.75
+SUB_SLOT_ITERS = 147849216
+
+def _hash(*parts: Any) -> str:
+    return "0x" + hashlib.sha256("/".join(str(p) for p in parts).encode()).hexdigest()
+
+def _number(*parts: Any) -> int:
+    return int(_hash(*parts)[2:18], 16)
+
+# --- Certificates ---
+
+def _key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+def _write_pair(cert, key, cert_path: Path, key_path: Path):
+    cert_path.parent.mkdir(parents=True, exist_ok=True)
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption()))
+    key_path.chmod(0o600)
+
+def _certificate(subject: str, key, issuer_name, issuer_key, ca: bool):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, subject)]))
+        .issuer_name(issuer_name or x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, subject)]))
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=3650))
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+    )
+    if not ca:
+        builder = builder.add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost"), x509.DNSName("chia.net")]), critical=False)
+    return builder.sign(issuer_key or key, hashes.SHA256())
+
+def generate_certs(root: Path, services=SERVICES) -> Dict[str, Path]:
+    """
+    Create a private CA and a private_<service> certificate signed by it for each service, in the
+    CHIA_ROOT/config/ssl layout. As with Chia, the same certificate identifies the service to its
+    clients and chaimcp to the service. Existing certificates are kept.
+    """
+    if x509 is None:
+        raise RuntimeError("The mock node needs the cryptography package: pip install chaimcp[bench]")
+    ssl_dir = root / "config" / "ssl"
+    ca_cert_path, ca_key_path = ssl_dir / "ca" / "private_ca.crt", ssl_dir / "ca" / "private_ca.key"
+    if ca_cert_path.exists() and ca_key_path.exists():
+        ca_cert = x509.load_pem_x509_certificate(ca_cert_path.read_bytes())
+        ca_key = serialization.load_pem_private_key(ca_key_path.read_bytes(), password=None)
+    else:
+        ca_key = _key()
+        ca_cert = _certificate("Chia CA", ca_key, None, None, ca=True)
+        _write_pair(ca_cert, ca_key, ca_cert_path, ca_key_path)
+    for service in services:
+        cert_path = ssl_dir / service / f"private_{service}.crt"
+        key_path = ssl_dir / service / f"private_{service}.key"
+        if not (cert_path.exists() and key_path.exists()):
+            key = _key()
+            _write_pair(_certificate(f"Chia {service}", key, ca_cert.subject, ca_key, ca=False), key, cert_path, key_path)
+    return {"ca": ca_cert_path, "ssl_dir": ssl_dir}
+
+# --- Synthetic data ---
+
+class SyntheticChain:
+    """
+    A deterministic mainnet-shaped chain: block records, coins and a mempool derived from hashes,
+    so any height, puzzle hash or coin id can be answered without storing anything.
+    The peak grows by one block every `block_interval` seconds (0 keeps it fixed).
+    """
+    def __init__(self, height: int = 100_000, coins_per_puzzle_hash: int = 10, padding: int = 0,
+                 block_interval: float = 0, mempool_size: int = 20, seed: str = "chaimcp"):
+        self.start_height = height
+        self.coins_per_puzzle_hash = coins_per_puzzle_hash
+        self.padding = padding
+        self.block_interval = block_interval
+        self.mempool_size = mempool_size
+        self.seed = seed
+        self.started = time.monotonic()
+
+    @property
+    def peak_height(self) -> int:
+        if self.block_interval <= 0:
+            return self.start_height
+        return self.start_height + int((time.monotonic() - self.started) / self.block_interval)
+
+    def _pad(self, record: Dict[str, Any], *key: Any) -> Dict[str, Any]:
+        if self.padding > 0:
+            # Filler standing in for the large fields (proofs, generators) real records carry
+            record["padding"] = (_hash(self.seed, "pad", *key)[2:] * (self.padding // 64 + 1))[:self.padding]
+        return record
+
+    def header_hash(self, height: int) -> str:
+        return _hash(self.seed, "block", height)
+
+    def block_record(self, height: int) -> Dict[str, Any]:
+        transaction_block = height % 3 == 0
+        record = {
+            "header_hash": self.header_hash(height),
+            "prev_hash": self.header_hash(height - 1) if height > 0 else _hash(self.seed, "genesis"),
+            "height": height,
+            "weight": 2 * height * (height + 1),
+            "total_iters": height * SUB_SLOT_ITERS // 32,
+            "signage_point_index": height % 64,
+            "challenge_block_info_hash": _hash(self.seed, "challenge", height),
+            "farmer_puzzle_hash": _hash(self.seed, "farmer", height % 50),
+            "pool_puzzle_hash": _hash(self.seed, "pool", height % 50),
+            "required_iters": _number(self.seed, "iters", height) % 10_000_000,
+            "deficit": height % 16,
+            "overflow": False,
+            "prev_transaction_block_height": height - height % 3 - (3 if transaction_block else 0) if height >= 3 else 0,
+            "sub_slot_iters": SUB_SLOT_ITERS,
+            "sub_epoch_summary_included": None,
+            "timestamp": int(GENESIS_TIMESTAMP + height * BLOCK_SECONDS) if transaction_block else None,
+            "fees": _number(self.seed, "fees", height) % 100_000_000 if transaction_block else None,
+            "prev_transaction_block_hash": self.header_hash(height - 3) if transaction_block and height >= 3 else None,
+            "reward_claims_incorporated": None,
+            "finished_challenge_slot_hashes": None,
+            "finished_infused_challenge_slot_hashes": None,
+            "finished_reward_slot_hashes": None,
+        }
+        return self._pad(record, "block", height)
+
+    def blockchain_state(self) -> Dict[str, Any]:
+        peak = self.peak_height
+        return {
+            "peak": self.block_record(peak),
+            "genesis_challenge_initialized": True,
+            "sync": {"synced": True, "sync_mode": False, "sync_progress_height": 0, "sync_tip_height": 0},
+            "difficulty": 4064,
+            "sub_slot_iters": SUB_SLOT_ITERS,
+            "space": 32_000_000_000_000_000_000,
+            "mempool_size": self.mempool_size,
+            "mempool_cost": self.mempool_size * 11_000_000,
+            "mempool_fees": self.mempool_size * 50_000,
+            "mempool_min_fees": {"cost_5000000": 0},
+            "mempool_max_total_cost": 550_000_000_000,
+            "block_max_cost": 11_000_000_000,
+            "node_id": _hash(self.seed, "node")[2:],
+        }
+
+    def _coin_record(self, puzzle_hash: str, index: int) -> Dict[str, Any]:
+        peak = self.peak_height
+        confirmed = _number(self.seed, puzzle_hash, index, "confirmed") % max(1, peak)
+        spent = _number(self.seed, puzzle_hash, index, "spent") % 4 == 0
+        spent_height = confirmed + 1 + _number(self.seed, puzzle_hash, index, "spent_at") % max(1, peak - confirmed) if spent else 0
+        parent = _hash(self.seed, puzzle_hash, index, "parent")
+        amount = _number(self.seed, puzzle_hash, index, "amount") % (10 * MOJO_PER_XCH)
+        record = {
+            "coin": {"parent_coin_info": parent, "puzzle_hash": puzzle_hash, "amount": amount},
+            "confirmed_block_index": confirmed,
+            "spent_block_index": min(spent_height, peak),
+            "spent": spent,
+            "coinbase": index == 0,
+            "timestamp": int(GENESIS_TIMESTAMP + confirmed * BLOCK_SECONDS),
+        }
+        return self._pad(record, "coin", puzzle_hash, index)
+
+    def coin_records(self, puzzle_hash: str, start_height: int = None, end_height: int = None,
+                     include_spent_coins: bool = False) -> List[Dict[str, Any]]:
+        start = start_height or 0
+        end = end_height if end_height is not None else 2 ** 32
+        records = []
+        for index in range(self.coins_per_puzzle_hash):
+            record = self._coin_record(puzzle_hash, index)
+            if start <= record["confirmed_block_index"] < end and (include_spent_coins or not record["spent"]):
+                records.append(record)
+        return records
+
+    def coin_record_by_name(self, name: str) -> Dict[str, Any]:
+        # Any coin id exists: treat it as the first coin of a puzzle hash derived from it
+        return self._coin_record(_hash(self.seed, "owner", name), 1)
+
+    def mempool_tx_ids(self) -> List[str]:
+        peak = self.peak_height
+        return [_hash(self.seed, "mempool", peak, i) for i in range(self.mempool_size)]
+
+    def mempool_item(self, tx_id: str) -> Dict[str, Any]:
+        return self._pad({
+            "spend_bundle_name": tx_id,
+            "cost": 11_000_000,
+            "fee": _number(tx_id, "fee") % 100_000_000,
+            "additions": [{"parent_coin_info": tx_id, "puzzle_hash": _hash(tx_id, "to"), "amount": _number(tx_id, "amount") % MOJO_PER_XCH}],
+            "removals": [{"parent_coin_info": _hash(tx_id, "parent"), "puzzle_hash": _hash(tx_id, "from"), "amount": MOJO_PER_XCH}],
+            "height_added_to_mempool": self.peak_height,
+        }, "mempool", tx_id)
+
+class SyntheticWallet:
+    """A standard XCH wallet plus a CAT wallet with deterministic transaction history."""
+    def __init__(self, chain: SyntheticChain, transactions: int = 200):
+        self.chain = chain
+        self.transaction_count = transactions
+        self.sent: Dict[str, Dict[str, Any]] = {}
+        self.next_index = 0
+        self.fingerprints = {1234567890}
+
+    def wallets(self, wallet_type: Optional[int] = None) -> List[Dict[str, Any]]:
+        wallets = [
+            {"id": 1, "name": "Chia Wallet", "type": 0, "data": ""},
+            {"id": 2, "name": "CAT a628c1c2c6fcb74d", "type": 6, "data": "a628c1c2c6fcb74d53746157e438e108eab5c0bb3e5c80ff9b1910b3e4832913"},
+        ]
+        return [w for w in wallets if wallet_type is None or w["type"] == wallet_type]
+
+    def balance(self, wallet_id: int) -> Dict[str, Any]:
+        confirmed = _number(self.chain.seed, "balance", wallet_id) % (1000 * MOJO_PER_XCH)
+        return {
+            "wallet_id": wallet_id,
+            "wallet_type": 0 if wallet_id == 1 else 6,
+            "fingerprint": next(iter(self.fingerprints), 0),
+            "confirmed_wallet_balance": confirmed,
+            "unconfirmed_wallet_balance": confirmed,
+            "spendable_balance": confirmed,
+            "pending_change": 0,
+            "max_send_amount": confirmed,
+            "unspent_coin_count": 10,
+            "pending_coin_removal_count": 0,
+        }
+
+    def transaction(self, wallet_id: int, index: int) -> Dict[str, Any]:
+        tx_id = _hash(self.chain.seed, "tx", wallet_id, index)
+        height = max(0, self.chain.peak_height - (self.transaction_count - index) * 10)
+        return self.chain._pad({
+            "name": tx_id,
+            "wallet_id": wallet_id,
+            "type": index % 2,
+            "amount": _number(tx_id, "amount") % MOJO_PER_XCH,
+            "fee_amount": 0,
+            "to_puzzle_hash": _hash(tx_id, "to"),
+            "confirmed": True,
+            "confirmed_at_height": height,
+            "created_at_time": int(GENESIS_TIMESTAMP + height * BLOCK_SECONDS),
+            "sent": 1,
+            "spend_bundle": None,
+            "additions": [],
+            "removals": [],
+            "memos": {},
+        }, "tx", tx_id)
+
+    def transactions(self, wallet_id: int, start: int, end: int, reverse: bool) -> List[Dict[str, Any]]:
+        indices = list(range(self.transaction_count))
+        if reverse:
+            indices.reverse()
+        return [self.transaction(wallet_id, i) for i in indices[start:end]]
+
+    def transaction_by_id(self, tx_id: str) -> Optional[Dict[str, Any]]:
+        if tx_id in self.sent:
+            return self.sent[tx_id]
+        for wallet in (1, 2):
+            for index in range(self.transaction_count):
+                if _hash(self.chain.seed, "tx", wallet, index) == tx_id:
+                    return self.transaction(wallet, index)
+        return None
+
+    def send(self, wallet_id: int, amount: int, address: str, fee: int) -> Dict[str, Any]:
+        tx_id = _hash(self.chain.seed, "sent", len(self.sent), address, amount)
+        record = {
+            "name": tx_id, "wallet_id": wallet_id, "type": 1, "amount": amount, "fee_amount": fee,
+            "to_address": address, "confirmed": False, "confirmed_at_height": 0,
+            "created_at_time": int(time.time()), "sent": 0, "additions": [], "removals": [], "memos": {},
+        }
+        self.sent[tx_id] = record
+        return record
+
+    def next_address(self, new_address: bool) -> str:
+        if new_address:
+            self.next_index += 1
+        return "xch1" + _hash(self.chain.seed, "address", self.next_index)[2:60]
+
+class SyntheticDataLayer:
+    """Datalayer stores of key/value pairs, with a root hash per generation."""
+    def __init__(self, chain: SyntheticChain, stores: int = 5, keys_per_store: int = 100, value_size: int = 64):
+        self.chain = chain
+        self.value_size = value_size
+        self.stores: Dict[str, List[Dict[str, str]]] = {}
+        self.subscriptions: Dict[str, List[str]] = {}
+        for s in range(stores):
+            store_id = _hash(chain.seed, "store", s)[2:]
+            self.stores[store_id] = [{
+                key: _hash(store_id, key)[2:] * (value_size // 64 + 1) for key in
+                ("0x" + f"key{k}".encode().hex() for k in range(keys_per_store))
+            }]
+
+    def _generation(self, store_id: str, root_hash: Optional[str]) -> Optional[Dict[str, str]]:
+        generations = self.stores.get(store_id)
+        if generations is None:
+            return None
+        if root_hash is None:
+            return generations[-1]
+        for generation in generations:
+            if self.root_hash(generation) == root_hash:
+                return generation
+        return None
+
+    @staticmethod
+    def root_hash(generation: Dict[str, str]) -> str:
+        return _hash(*sorted(generation.items()))
+
+    def create(self) -> str:
+        store_id = _hash(self.chain.seed, "store", len(self.stores))[2:]
+        self.stores[store_id] = [{}]
+        return store_id
+
+    def update(self, store_id: str, changelist: List[Dict[str, Any]]) -> bool:
+        generation = self._generation(store_id, None)
+        if generation is None:
+            return False
+        generation = dict(generation)
+        for change in changelist:
+            if change.get("action") == "insert":
+                generation[change["key"]] = change["value"]
+            elif change.get("action") == "delete":
+                generation.pop(change["key"], None)
+        self.stores[store_id].append(generation)
+        return True
+
+# --- RPC services ---
+
+Handler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+def _missing(name: str) -> Dict[str, Any]:
+    return {"success": False, "error": f"{name} not found"}
+
+def full_node_handlers(chain: SyntheticChain) -> Dict[str, Handler]:
+    def block_record(height):
+        return {"block_record": chain.block_record(height)} if 0 <= height <= chain.peak_height else _missing(f"Block at height {height}")
+
+    def block_by_hash(data):
+        # Only recent blocks can be looked up by hash without an index
+        peak = chain.peak_height
+        for height in range(peak, max(-1, peak - 1000), -1):
+            if chain.header_hash(height) == data.get("header_hash"):
+                return block_record(height)
+        return _missing(f"Block {data.get('header_hash')}")
+
+    def block_records(data):
+        start, end = int(data["start"]), min(int(data["end"]), chain.peak_height + 1)
+        return {"block_records": [chain.block_record(h) for h in range(start, end)]}
+
+    def coins_by_puzzle_hashes(data):
+        records = []
+        for puzzle_hash in data.get("puzzle_hashes", []):
+            records.extend(chain.coin_records(puzzle_hash, data.get("start_height"), data.get("end_height"), data.get("include_spent_coins", False)))
+        return {"coin_records": records}
+
+    def coins_by_parent_ids(data):
+        # Children of a coin live at a puzzle hash derived from their parent
+        records = []
+        for parent in data.get("parent_ids", []):
+            records.extend(chain.coin_records(_hash(chain.seed, "child", parent), data.get("start_height"), data.get("end_height"), data.get("include_spent_coins", False)))
+        return {"coin_records": records}
+
+    def mempool_item(data):
+        if data.get("tx_id") in chain.mempool_tx_ids():
+            return {"mempool_item": chain.mempool_item(data["tx_id"])}
+        return _missing(f"Transaction {data.get('tx_id')}")
+
+    return {
+        "get_blockchain_state": lambda data: {"blockchain_state": chain.blockchain_state()},
+        "get_network_info": lambda data: {"network_name": "mainnet", "network_prefix": "xch"},
+        "get_block_record_by_height": lambda data: block_record(int(data["height"])),
+        "get_block_record": block_by_hash,
+        "get_block_records": block_records,
+        "get_coin_records_by_puzzle_hash": lambda data: {"coin_records": chain.coin_records(
+            data["puzzle_hash"], data.get("start_height"), data.get("end_height"), data.get("include_spent_coins", False))},
+        "get_coin_records_by_puzzle_hashes": coins_by_puzzle_hashes,
+        "get_coin_records_by_parent_ids": coins_by_parent_ids,
+        "get_coin_record_by_name": lambda data: {"coin_record": chain.coin_record_by_name(data["name"])},
+        "push_tx": lambda data: {"status": "SUCCESS"},
+        "get_all_mempool_tx_ids": lambda data: {"tx_ids": chain.mempool_tx_ids()},
+        "get_mempool_item_by_tx_id": mempool_item,
+    }
+
+def wallet_handlers(wallet: SyntheticWallet) -> Dict[str, Handler]:
+    def transaction(data):
+        record = wallet.transaction_by_id(data.get("transaction_id"))
+        return {"transaction": record, "transaction_id": data["transaction_id"]} if record else _missing(f"Transaction {data.get('transaction_id')}")
+
+    def add_key(data):
+        fingerprint = _number(*data.get("mnemonic", [])) % 4_000_000_000
+        wallet.fingerprints.add(fingerprint)
+        return {"fingerprint": fingerprint}
+
+    def delete_key(data):
+        wallet.fingerprints.discard(data.get("fingerprint"))
+        return {}
+
+    def delete_all_keys(data):
+        wallet.fingerprints.clear()
+        return {}
+
+    def send(data):
+        record = wallet.send(data["wallet_id"], data["amount"], data["address"], data.get("fee", 0))
+        return {"transaction": record, "transaction_id": record["name"]}
+
+    return {
+        "get_wallets": lambda data: {"wallets": wallet.wallets(data.get("type")), "fingerprint": next(iter(wallet.fingerprints), None)},
+        "get_wallet_balance": lambda data: {"wallet_balance": wallet.balance(int(data.get("wallet_id", 1)))},
+        "get_transactions": lambda data: {"transactions": wallet.transactions(
+            int(data.get("wallet_id", 1)), int(data.get("start", 0)), int(data.get("end", 50)), bool(data.get("reverse"))),
+            "wallet_id": int(data.get("wallet_id", 1))},
+        "get_transaction": transaction,
+        "send_transaction": send,
+        "get_next_address": lambda data: {"wallet_id": data.get("wallet_id", 1), "address": wallet.next_address(data.get("new_address", True))},
+        "get_farmed_amount": lambda data: {"farmed_amount": 1750 * MOJO_PER_XCH, "pool_reward_amount": 1750 * MOJO_PER_XCH * 7 // 8,
+                                           "farmer_reward_amount": 1750 * MOJO_PER_XCH // 8, "fee_amount": 0, "last_height_farmed": wallet.chain.peak_height - 42},
+        "generate_mnemonic": lambda data: {"mnemonic": ["abandon"] * 23 + ["art"]},
+        "add_key": add_key,
+        "delete_key": delete_key,
+        "delete_all_keys": delete_all_keys,
+    }
+
+def data_layer_handlers(datalayer: SyntheticDataLayer) -> Dict[str, Handler]:
+    def value(data):
+        generation = datalayer._generation(data.get("id"), data.get("root_hash"))
+        if generation is None or data.get("key") not in generation:
+            return _missing(f"Key {data.get('key')}")
+        return {"value": generation[data["key"]]}
+
+    def keys(data):
+        generation = datalayer._generation(data.get("id"), data.get("root_hash"))
+        return {"keys": list(generation)} if generation is not None else _missing(f"Store {data.get('id')}")
+
+    def root(data):
+        generation = datalayer._generation(data.get("id"), None)
+        if generation is None:
+            return _missing(f"Store {data.get('id')}")
+        return {"hash": datalayer.root_hash(generation), "confirmed": True, "timestamp": int(time.time())}
+
+    def update(data):
+        if not datalayer.update(data.get("id"), data.get("changelist", [])):
+            return _missing(f"Store {data.get('id')}")
+        return {"tx_id": _hash("update", data.get("id"), len(datalayer.stores[data["id"]]))}
+
+    def kv_diff(data):
+        before = datalayer._generation(data.get("id"), data.get("hash_1"))
+        after = datalayer._generation(data.get("id"), data.get("hash_2"))
+        if before is None or after is None:
+            return _missing("Root hash")
+        diff = [{"type": "DELETE", "key": k, "value": v} for k, v in before.items() if after.get(k) != v]
+        diff += [{"type": "INSERT", "key": k, "value": v} for k, v in after.items() if before.get(k) != v]
+        return {"diff": diff}
+
+    def subscribe(data):
+        datalayer.subscriptions[data.get("id")] = data.get("urls", [])
+        return {}
+
+    def unsubscribe(data):
+        datalayer.subscriptions.pop(data.get("id"), None)
+        return {}
+
+    return {
+        "create_data_store": lambda data: {"id": datalayer.create(), "txs": []},
+        "get_value": value,
+        "get_keys": keys,
+        "get_root": root,
+        "update_data_store": update,
+        "subscribe": subscribe,
+        "unsubscribe": unsubscribe,
+        "get_kv_diff": kv_diff,
+    }
+
+def create_service_app(handlers: Dict[str, Handler], latency: float = 0, jitter: float = 0) -> Starlette:
+    """A Chia-style RPC app: POST /<endpoint> with a JSON body, answered with {"success": ..., ...}."""
+    async def rpc(request: Request) -> Response:
+        if latency or jitter:
+            await asyncio.sleep(latency + random.uniform(0, jitter))
+        endpoint = request.path_params["endpoint"]
+        if endpoint == "healthz":
+            return JSONResponse({"success": True})
+        handler = handlers.get(endpoint)
+        if handler is None:
+            return JSONResponse({"success": False, "error": f"No such endpoint: {endpoint}"})
+        try:
+            body = await request.body()
+            data = await request.json() if body else {}
+            result = handler(data or {})
+        except Exception as e:
+            return JSONResponse({"success": False, "error": f"{type(e).__name__}: {e}"})
+        return JSONResponse({"success": result.get("success", True), **result})
+
+    return Starlette(routes=[Route("/{endpoint}", rpc, methods=["POST"])])
+
+class MockChiaNode:
+    """
+    Runs the mock full_node, wallet and data_layer services on localhost, each with mutual TLS.
+    start() creates the certificates and a config.yaml under `root` (usable as CHIA_ROOT) and
+    serves from a background thread; ports of 0 pick free ports.
+    """
+    def __init__(self, root: Path, ports: Optional[Dict[str, int]] = None, latency: float = 0, jitter: float = 0,
+                 chain: Optional[SyntheticChain] = None, stores: int = 5, keys_per_store: int = 100):
+        self.root = Path(root)
+        self.ports = {service: 0 for service in SERVICES}
+        self.ports.update(ports or {})
+        self.latency = latency
+        self.jitter = jitter
+        self.chain = chain or SyntheticChain()
+        self.wallet = SyntheticWallet(self.chain)
+        self.datalayer = SyntheticDataLayer(self.chain, stores, keys_per_store)
+        self._servers: Dict[str, uvicorn.Server] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def handlers(self, service: str) -> Dict[str, Handler]:
+        if service == "full_node":
+            return full_node_handlers(self.chain)
+        if service == "wallet":
+            return wallet_handlers(self.wallet)
+        return data_layer_handlers(self.datalayer)
+
+    def _server(self, service: str) -> uvicorn.Server:
+        ssl_dir = self.root / "config" / "ssl"
+        config = uvicorn.Config(
+            create_service_app(self.handlers(service), self.latency, self.jitter),
+            host="127.0.0.1",
+            port=self.ports[service],
+            log_level="warning",
+            ssl_certfile=str(ssl_dir / service / f"private_{service}.crt"),
+            ssl_keyfile=str(ssl_dir / service / f"private_{service}.key"),
+            ssl_ca_certs=str(ssl_dir / "ca" / "private_ca.crt"),
+            ssl_cert_reqs=ssl.CERT_REQUIRED,
+        )
+        server = uvicorn.Server(config)
+        # Signals belong to whoever embeds the node
+        server.install_signal_handlers = lambda: None
+        return server
+
+    def start(self, timeout: float = 10) -> "MockChiaNode":
+        generate_certs(self.root)
+        self._servers = {service: self._server(service) for service in SERVICES}
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            tasks = [self._loop.create_task(server.serve()) for server in self._servers.values()]
+            self._loop.call_soon(started.set)
+            self._loop.run_until_complete(asyncio.gather(*tasks))
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-chia-node", daemon=True)
+        self._thread.start()
+        started.wait(timeout)
+        deadline = time.monotonic() + timeout
+        while not all(server.started for server in self._servers.values()):
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                self.stop()
+                raise RuntimeError("Mock Chia node failed to start")
+            time.sleep(0.01)
+        for service, server in self._servers.items():
+            self.ports[service] = server.servers[0].sockets[0].getsockname()[1]
+        self.write_config()
+        return self
+
+    def write_config(self):
+        """Write a config.yaml pointing each service at its mock port."""
+        config = {
+            "selected_network": "mainnet",
+            "daemon_port": 55400,
+            **{service: {"rpc_port": port} for service, port in self.ports.items()},
+        }
+        path = self.root / "config" / "config.yaml"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(yaml.safe_dump(config))
+
+    def stop(self):
+        for server in self._servers.values():
+            server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def __enter__(self) -> "MockChiaNode":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve mock Chia full_node, wallet and data_layer RPCs with mutual TLS.")
+    parser.add_argument("--root", type=Path, default=Path("mock-chia"), help="directory used as CHIA_ROOT (certs and config.yaml)")
+    parser.add_argument("--full-node-port", type=int, default=8555)
+    parser.add_argument("--wallet-port", type=int, default=9256)
+    parser.add_argument("--data-layer-port", type=int, default=8562)
+    parser.add_argument("--latency", type=float, default=0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0, help="up to this many extra random seconds per response")
+    parser.add_argument("--height", type=int, default=100_000, help="peak height of the synthetic chain")
+    parser.add_argument("--block-interval", type=float, default=0, help="seconds per new block (0 keeps the peak fixed)")
+    parser.add_argument("--coins-per-puzzle-hash", type=int, default=10)
+    parser.add_argument("--padding", type=int, default=0, help="filler bytes added to each block, coin and transaction record")
+    parser.add_argument("--stores", type=int, default=5, help="datalayer stores")
+    parser.add_argument("--keys-per-store", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    chain = SyntheticChain(args.height, args.coins_per_puzzle_hash, args.padding, args.block_interval)
+    node = MockChiaNode(
+        args.root,
+        ports={"full_node": args.full_node_port, "wallet": args.wallet_port, "data_layer": args.data_layer_port},
+        latency=args.latency, jitter=args.jitter, chain=chain, stores=args.stores, keys_per_store=args.keys_per_store,
+    )
+    with node:
+        print(f"Mock Chia node serving {node.ports}; use CHIA_ROOT={node.root.resolve()} MCP_EVENTS_ENABLED=false", flush=True)
+        try:
+            while node._thread is not None and node._thread.is_alive():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import asyncio
+import cProfile
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from .config import get_profile_dir, get_profile_sample_rate
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+def _fold(frame) -> str:
+    """A stack as root-to-leaf frame labels joined by ';' (the collapsed flamegraph format)."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler: a background thread snapshots every other thread's stack each
+    `interval` seconds. Sampling doesn't slow the profiled code down beyond the GIL hand-offs, so it
+    is safe to run on a live server. Results are collapsed stacks, readable by flamegraph.pl,
+    speedscope and inferno.
+    """
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+
+    def sample(self):
+        """Record the current stack of every thread but the calling one."""
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != me:
+                self.samples[f"{names.get(ident, ident)};{_fold(frame)}"] += 1
+        self.sample_count += 1
+
+    def run(self, seconds: float) -> "SamplingProfiler":
+        """Sample for `seconds` (blocking the calling thread, which is left out of the profile)."""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self.sample()
+            time.sleep(self.interval)
+        return self
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def write(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.folded(), encoding="utf-8")
+        return path
+
+def _profile_path(directory: Optional[Path], prefix: str, suffix: str) -> Path:
+    directory = directory if directory is not None else get_profile_dir()
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return directory / f"{prefix}-{stamp}-{os.getpid()}-{random.getrandbits(32):08x}{suffix}"
+
+_sampling = threading.Lock()
+
+def sample_profile(seconds: float, interval: float = DEFAULT_SAMPLE_INTERVAL, directory: Optional[Path] = None) -> Dict[str, object]:
+    """
+    Take a time-bounded sampling profile of this process and write it as a .folded file.
+    Blocking: call it from a worker thread. Only one runs at a time; returns an error while busy.
+    """
+    if not _sampling.acquire(blocking=False):
+        return {"success": False, "error": "A profile is already being taken"}
+    try:
+        profiler = SamplingProfiler(interval).run(seconds)
+        path = profiler.write(_profile_path(directory, "sample", ".folded"))
+        return {"success": True, "path": str(path), "samples": profiler.sample_count, "stacks": len(profiler.samples)}
+    finally:
+        _sampling.release()
+
+def _dump_stats(profiler: cProfile.Profile, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(path))
+    return path
+
+# cProfile hooks the whole thread, and only one profiler may be active per thread at a time
+_profiling_call = threading.Lock()
+
+def profile_tool(name: str, func: Callable, sample_rate: float = None, directory: Optional[Path] = None) -> Callable:
+    """
+    Wrap an async tool so a `sample_rate` fraction of its calls (MCP_PROFILE_SAMPLE_RATE) run under
+    cProfile, each written as a .prof file (for snakeviz, or flameprof for a flamegraph).
+    Other coroutines interleaving with the profiled call show up in its profile too.
+    Returns func unchanged when sampling is off.
+    """
+    rate = sample_rate if sample_rate is not None else get_profile_sample_rate()
+    if rate <= 0:
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if random.random() >= rate or not _profiling_call.acquire(blocking=False):
+            return await func(*args, **kwargs)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                # Marshalling the stats and writing the file would stall every other call on the loop
+                await asyncio.to_thread(_dump_stats, profiler, _profile_path(directory, f"tool-{name}", ".prof"))
+        finally:
+            _profiling_call.release()
+    return wrapper
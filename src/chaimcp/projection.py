@@ -0,0 +1,166 @@
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Dict, List, Tuple, Union
+
+# A compiled projection: nested dict of key -> sub-projection, with True meaning "keep the whole value"
+Projection = Union[bool, Dict[str, Any]]
+
+# Top-level keys kept regardless of the requested fields, so callers can still tell if the call worked
+ALWAYS_KEPT = ("success", "error")
+
+_MISSING = object()
+_decoder = json.JSONDecoder()
+_WS_RE = re.compile(r"[ \t\n\r]*")
+_STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR_RE = re.compile(r"[^,\]}\s]+")
+_SKIP_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.DOTALL)
+# "success" as the first or last top-level member, which is where Chia's RPC server puts it
+_SUCCESS_FIRST_RE = re.compile(rb'\s*\{\s*"success"\s*:\s*(true|false)\s*[,}]')
+_SUCCESS_LAST_RE = re.compile(rb'[{,]\s*"success"\s*:\s*(true|false)\s*\}\s*$')
+
+def compile_fields(fields: List[str]) -> Dict[str, Any]:
+    """
+    Compile JSONPath-like field paths into a projection tree.
+    Paths are dot separated ("block_record.height"), may start with "$.", lists are traversed
+    implicitly ("coin_records.coin.amount" or "coin_records[].coin.amount"), and "*" matches any key.
+    """
+    tree: Dict[str, Any] = {}
+    for field in fields:
+        field = field.strip()
+        if field.startswith("$."):
+            field = field[2:]
+        parts = [p for p in field.replace("[*]", "").replace("[]", "").split(".") if p]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is True:
+                # A parent path already keeps this whole subtree
+                break
+            node = child
+        else:
+            node[parts[-1]] = True
+    for key in ALWAYS_KEPT:
+        tree.setdefault(key, True)
+    return tree
+
+def project(value: Any, projection: Projection) -> Any:
+    """Apply a compiled projection to an already decoded document."""
+    result = _project(value, projection)
+    return {} if result is _MISSING else result
+
+def _project(value: Any, projection: Projection) -> Any:
+    if projection is True:
+        return value
+    if isinstance(value, list):
+        return [p for p in (_project(v, projection) for v in value) if p is not _MISSING]
+    if not isinstance(value, dict):
+        # Asked for a field inside a scalar
+        return _MISSING
+    out = {}
+    for key, item in value.items():
+        sub = projection.get(key, projection.get("*"))
+        if sub is not None:
+            projected = _project(item, sub)
+            if projected is not _MISSING:
+                out[key] = projected
+    return out
+
+def project_raw(body: Union[bytes, str], projection: Projection) -> Any:
+    """
+    Apply a projection directly to a JSON body without decoding the whole document.
+    Unselected values are skipped over in the text and selected ones are decoded one
+    list element at a time, so memory tracks the size of the projected output.
+    """
+    text = body.decode() if isinstance(body, bytes) else body
+    value, end = _project_text(text, _skip_ws(text, 0), projection)
+    if _skip_ws(text, end) != len(text):
+        raise ValueError(f"Extra data after JSON document at position {end}")
+    return {} if value is _MISSING else value
+
+def read_success(body: bytes) -> Any:
+    """
+    The top-level "success" value of a JSON body, without decoding it. Checks the first and last
+    members directly and only scans the whole body (like project_raw) when it is somewhere else.
+    """
+    match = _SUCCESS_FIRST_RE.match(body) or _SUCCESS_LAST_RE.search(body, max(0, len(body) - 64))
+    if match is not None:
+        return match.group(1) == b"true"
+    return project_raw(body, {"success": True}).get("success")
+
+def _skip_ws(text: str, i: int) -> int:
+    return _WS_RE.match(text, i).end()
+
+def _expect(text: str, i: int, char: str):
+    if text[i:i + 1] != char:
+        raise ValueError(f"Expected '{char}' at position {i}")
+
+def _project_text(text: str, i: int, projection: Projection) -> Tuple[Any, int]:
+    if projection is True:
+        return _decoder.raw_decode(text, i)
+
+    char = text[i:i + 1]
+    if char == "{":
+        out = {}
+        i = _skip_ws(text, i + 1)
+        if text[i:i + 1] == "}":
+            return out, i + 1
+        while True:
+            _expect(text, i, '"')
+            key, i = scanstring(text, i + 1)
+            i = _skip_ws(text, i)
+            _expect(text, i, ":")
+            i = _skip_ws(text, i + 1)
+            sub = projection.get(key, projection.get("*"))
+            if sub is None:
+                i = _skip_value(text, i)
+            else:
+                value, i = _project_text(text, i, sub)
+                if value is not _MISSING:
+                    out[key] = value
+            i = _skip_ws(text, i)
+            if text[i:i + 1] == "}":
+                return out, i + 1
+            _expect(text, i, ",")
+            i = _skip_ws(text, i + 1)
+
+    if char == "[":
+        items = []
+        i = _skip_ws(text, i + 1)
+        if text[i:i + 1] == "]":
+            return items, i + 1
+        while True:
+            value, i = _project_text(text, i, projection)
+            if value is not _MISSING:
+                items.append(value)
+            i = _skip_ws(text, i)
+            if text[i:i + 1] == "]":
+                return items, i + 1
+            _expect(text, i, ",")
+            i = _skip_ws(text, i + 1)
+
+    # Asked for a field inside a scalar
+    return _MISSING, _skip_value(text, i)
+
+def _skip_value(text: str, i: int) -> int:
+    """Return the index just past the JSON value starting at i, without building it."""
+    char = text[i:i + 1]
+    if char == '"':
+        match = _STRING_RE.match(text, i)
+    elif char in ("{", "["):
+        depth = 0
+        for match in _SKIP_RE.finditer(text, i):
+            token = match.group()
+            if token[0] == '"':
+                continue
+            depth += 1 if token in ("{", "[") else -1
+            if depth == 0:
+                return match.end()
+        match = None
+    else:
+        match = _SCALAR_RE.match(text, i)
+    if match is None:
+        raise ValueError(f"Malformed JSON value at position {i}")
+    return match.end()
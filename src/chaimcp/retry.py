@@ -0,0 +1,50 @@
+import random
+import threading
+from typing import Dict, Optional
+from .config import get_retry_budget_ratio
+
+def backoff_delay(attempt: int, base: float, cap: float = 2.0) -> float:
+    """Full-jitter exponential backoff: a random delay in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt))) # nosec - jitter, not crypto
+
+class RetryBudget:
+    """
+    Process-wide token bucket limiting retries to a fraction of requests.
+    Every request deposits `ratio` tokens (up to `max_tokens`, which also allows a small burst)
+    and every retry withdraws a whole token, so during an incident retries stay at about
+    `ratio` times normal traffic instead of multiplying it.
+    """
+    def __init__(self, ratio: float = None, max_tokens: float = 10):
+        self.ratio = ratio if ratio is not None else get_retry_budget_ratio()
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take a token for one retry; False if the budget is spent."""
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.retries += 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"tokens": self.tokens, "retries": self.retries, "exhausted": self.exhausted}
+
+_retry_budget: Optional[RetryBudget] = None
+
+def get_retry_budget() -> RetryBudget:
+    """Get the process-wide retry budget shared by every client."""
+    global _retry_budget
+    if _retry_budget is None:
+        _retry_budget = RetryBudget()
+    return _retry_budget
@@ -0,0 +1,180 @@
+import json
+from typing import Any, Optional, Union
+from .config import get_json_passthrough_enabled, get_json_compact_enabled
+from .metrics import record_response
+from .tracing import span, current_span
+from .projection import read_success
+
+try:
+    # Optional fast backend (pip install chaimcp[fast])
+    import orjson
+except ImportError: # pragma: no cover - exercised only when orjson is missing
+    orjson = None
+
+_UNKNOWN = object()
+
+class RawJson(dict):
+    """
+    An RPC response kept as the exact upstream body, so it can be handed to MCP as-is instead of being
+    re-encoded. The body is only decoded when a caller first reads the dict; get("success") is answered
+    from the text (see projection.read_success). Any mutation drops the body.
+    """
+    __slots__ = ("raw", "_loaded", "_success")
+
+    def __init__(self, raw: bytes):
+        super().__init__()
+        self.raw = raw
+        self._loaded = False
+        self._success = _UNKNOWN
+
+    @classmethod
+    def from_bytes(cls, body: Union[bytes, str]) -> "RawJson":
+        return cls(body.encode() if isinstance(body, str) else body)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def success(self) -> Any:
+        """The top-level success value, read without decoding the body."""
+        if self._loaded:
+            return super().get("success")
+        if self._success is _UNKNOWN:
+            self._success = read_success(self.raw)
+        return self._success
+
+    def _load(self):
+        if not self._loaded:
+            super().update(loads(self.raw))
+            self._loaded = True
+
+    def _modified(self):
+        self._load()
+        self.raw = None
+
+    # Reads decode the body on first use
+    def __getitem__(self, key):
+        self._load()
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        if key == "success" and not self._loaded:
+            success = self.success
+            return default if success is None else success
+        self._load()
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        self._load()
+        return super().__contains__(key)
+
+    def __iter__(self):
+        self._load()
+        return super().__iter__()
+
+    def __len__(self):
+        self._load()
+        return super().__len__()
+
+    def __eq__(self, other):
+        self._load()
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        self._load()
+        return super().__ne__(other)
+
+    def __repr__(self):
+        self._load()
+        return super().__repr__()
+
+    def keys(self):
+        self._load()
+        return super().keys()
+
+    def values(self):
+        self._load()
+        return super().values()
+
+    def items(self):
+        self._load()
+        return super().items()
+
+    def copy(self):
+        self._load()
+        return dict(super().items())
+
+    # Writes drop the body, which no longer matches
+    def __setitem__(self, key, value):
+        self._modified()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._modified()
+        super().__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        self._modified()
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        self._load()
+        if key not in self:
+            self._modified()
+        return super().setdefault(key, default)
+
+    def pop(self, *args):
+        self._modified()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._modified()
+        return super().popitem()
+
+    def clear(self):
+        self._modified()
+        super().clear()
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any, compact: bool = None) -> str:
+    """Encode JSON for tool output: indented by default, compact if MCP_JSON_COMPACT is set."""
+    if compact is None:
+        compact = get_json_compact_enabled()
+    if isinstance(obj, RawJson):
+        # Encoders read a dict's storage directly, which stays empty until the body is decoded
+        obj._load()
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=0 if compact else orjson.OPT_INDENT_2).decode()
+        except TypeError:
+            # orjson is stricter (e.g. non-str keys, >64-bit ints); fall back to the stdlib
+            pass
+    if compact:
+        return json.dumps(obj, separators=(",", ":"))
+    return json.dumps(obj, indent=2)
+
+def dump_response(response: Any) -> str:
+    """
+    Render an RPC response as MCP text content. Unmodified upstream responses are passed
+    through byte-for-byte (unless MCP_JSON_PASSTHROUGH is disabled); anything else is encoded.
+    """
+    record_response(response)
+    tool = current_span()
+    if tool.recording and isinstance(response, dict):
+        tool.set("success", response.get("success"))
+    with span("serialize") as trace:
+        raw = getattr(response, "raw", None)
+        if raw is not None and get_json_passthrough_enabled():
+            trace.set("passthrough", True)
+            trace.set("bytes", len(raw))
+            return raw.decode()
+        text = dumps(response)
+        trace.set("passthrough", False)
+        trace.set("bytes", len(text))
+        return text
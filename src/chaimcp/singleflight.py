@@ -0,0 +1,36 @@
+import asyncio
+from typing import Dict, Any, Awaitable, Callable, Hashable, Optional
+
+class SingleFlight:
+    """
+    Collapse concurrent identical async calls into one in-flight call whose result is shared.
+    The upstream call runs as its own task, so a caller being cancelled (e.g. an MCP client
+    disconnecting) never cancels the request other callers are waiting on.
+    Must only be used from a single event loop.
+    """
+    def __init__(self, stats: Optional[Dict[str, int]] = None):
+        # Counters may be shared between instances to get process-wide totals
+        self.stats = stats if stats is not None else {"calls": 0, "collapsed": 0}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() unless an identical call (same key) is already in flight, and return its result."""
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.stats["collapsed"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
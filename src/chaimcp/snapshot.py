@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from .cache import get_peak
+from .chia_client import get_async_client
+from .config import get_state_poll_interval, get_state_max_staleness
+from .events import EventBus, NEW_PEAK
+from .metrics import REGISTRY, hit_ratio
+
+class StateSnapshot:
+    """
+    Shared, in-memory copy of the full node's get_blockchain_state answer.
+    A background poller (every `interval` seconds) and pushed new_peak events keep it fresh, so
+    callers are served from memory; a caller needing fresher data than the snapshot triggers one
+    refresh that every concurrent caller shares. Peak changes are broadcast to every wait_until()
+    waiter at once, so any number of waiters costs one upstream poll per interval.
+    Belongs to the event loop it is used from.
+    """
+    def __init__(self, interval: float = None):
+        self.interval = interval if interval is not None else get_state_poll_interval()
+        self.state: Optional[Dict[str, Any]] = None
+        self.updated = float("-inf")
+        self.hits = 0
+        self.refreshes = 0
+        self._refreshing: Optional[asyncio.Task] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        # Set (and replaced) whenever the peak changes
+        self._peak_changed = asyncio.Event()
+
+    def age(self) -> float:
+        """Seconds since the snapshot was last updated (infinite if it never was)."""
+        return time.monotonic() - self.updated
+
+    def update(self, state: Dict[str, Any]):
+        """Take a successful get_blockchain_state response as the current snapshot, unless it is from a node that is behind."""
+        if state.get("success", True) and state.get("blockchain_state"):
+            peak, current = get_peak(state), self.peak_height
+            if current is not None and (peak is None or peak[0] < current):
+                return
+            changed = self.state is None or peak != get_peak(self.state)
+            self.state = state
+            self.updated = time.monotonic()
+            if changed:
+                self._peak_changed.set()
+                self._peak_changed = asyncio.Event()
+
+    @property
+    def peak_height(self) -> Optional[int]:
+        peak = get_peak(self.state) if self.state is not None else None
+        return peak[0] if peak else None
+
+    async def wait_until(self, check: Callable[[], Awaitable[Tuple[Dict[str, Any], bool]]], timeout: float) -> Tuple[Dict[str, Any], bool]:
+        """
+        Await check() now and again after every peak change until it reports done, or timeout seconds pass.
+        check returns (response, done); a failed response ends the wait early. Returns (last response, done).
+        """
+        # Nothing changes between peaks, so waiters only need the shared poller to tell them about new ones
+        self.start()
+        deadline = time.monotonic() + timeout
+        while True:
+            # Taken before checking, so a peak arriving during the check is not missed
+            peak_changed = self._peak_changed
+            response, done = await check()
+            remaining = deadline - time.monotonic()
+            if done or not response.get("success") or remaining <= 0:
+                return response, done
+            try:
+                await asyncio.wait_for(peak_changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def get(self, max_staleness: float = None) -> Dict[str, Any]:
+        """The snapshot if it is at most max_staleness seconds old, otherwise a fresh answer from the node."""
+        if max_staleness is None:
+            max_staleness = get_state_max_staleness()
+        if self.state is not None and self.age() <= max_staleness:
+            self.hits += 1
+            return self.state
+        return await self.refresh()
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Fetch the state from the node, sharing one in-flight request among concurrent callers."""
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._fetch())
+            self._refreshing.add_done_callback(lambda _: setattr(self, "_refreshing", None))
+        return await asyncio.shield(self._refreshing)
+
+    async def _fetch(self) -> Dict[str, Any]:
+        self.refreshes += 1
+        client = get_async_client("full_node")
+        state = await client.get_blockchain_state(cached=False)
+        if state.get("success"):
+            self.update(state)
+            if client.cache is not None:
+                # The poller doubles as the response cache's peak check
+                client.cache.push_state(state)
+        return state
+
+    def start(self, bus: Optional[EventBus] = None):
+        """Start the background poller (needs a running event loop) and follow pushed peaks from bus."""
+        if bus is not None and self._unsubscribe is None:
+            self._unsubscribe = bus.subscribe(self._on_event)
+        if self.interval > 0 and self._poller is None:
+            self._poller = asyncio.ensure_future(self._poll())
+
+    def _on_event(self, event: Dict[str, Any]):
+        if event["service"] == "full_node" and event["change"] == NEW_PEAK:
+            self.update({"success": True, **event["data"]})
+
+    async def _poll(self):
+        while True:
+            # Pushed peaks may have kept the snapshot fresh already
+            if self.age() >= self.interval:
+                try:
+                    await self.refresh()
+                except Exception:
+                    pass # The next round retries; callers fall back to refresh() themselves
+            await asyncio.sleep(max(0.0, self.interval - self.age()) or self.interval)
+
+    async def stop(self):
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+
+_snapshots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, StateSnapshot]" = weakref.WeakKeyDictionary()
+_snapshots_lock = threading.Lock()
+
+def get_state_snapshot() -> StateSnapshot:
+    """Get the blockchain state snapshot of the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _snapshots_lock:
+        snapshot = _snapshots.get(loop)
+        if snapshot is None:
+            snapshot = _snapshots[loop] = StateSnapshot()
+        return snapshot
+
+def _collect_metrics():
+    """Scrape-time counts of get_blockchain_state calls served from the snapshot versus refreshed."""
+    with _snapshots_lock:
+        snapshots = list(_snapshots.values())
+    hits = sum(s.hits for s in snapshots)
+    refreshes = sum(s.refreshes for s in snapshots)
+    yield ("chaimcp_state_snapshot_hits_total", "counter", "Blockchain state reads served from the snapshot.", [({}, hits)])
+    yield ("chaimcp_state_snapshot_refreshes_total", "counter", "Blockchain state fetches from the node.", [({}, refreshes)])
+    yield ("chaimcp_state_snapshot_hit_ratio", "gauge", "Blockchain state reads served from memory over all reads and refreshes.",
+           [({}, hit_ratio(hits, refreshes))])
+
+REGISTRY.register_collector(_collect_metrics)
@@ -0,0 +1,170 @@
+import atexit
+import contextlib
+import contextvars
+import functools
+import importlib
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+from .config import get_trace_exporter, get_trace_file, get_trace_sample_rate
+
+class Span:
+    """One timed step of a traced call (tool dispatch, upstream RPC, decode, serialize, ...)."""
+    recording = True
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes or {}
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self._started = time.perf_counter()
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+        }
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or the trace wasn't sampled; children are dropped too."""
+    recording = False
+
+    def set(self, key: str, value: Any):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class SpanExporter:
+    """Receives every finished span. Subclass (or duck-type) this to send spans elsewhere."""
+    def export(self, span: Span):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class JsonlFileExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line, for offline analysis."""
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def load_exporter(spec: str) -> Optional[SpanExporter]:
+    """Build the exporter named by MCP_TRACE_EXPORTER: "jsonl", or "module:factory" for a custom one."""
+    if not spec:
+        return None
+    if spec == "jsonl":
+        return JsonlFileExporter(get_trace_file())
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Unknown trace exporter {spec!r}: expected 'jsonl' or 'module:factory'")
+    return getattr(importlib.import_module(module_name), attr)()
+
+_current_span: contextvars.ContextVar[Optional[Union[Span, _NoopSpan]]] = contextvars.ContextVar("chaimcp_span", default=None)
+_exporter: Optional[SpanExporter] = None
+_configured = False
+_sample_rate = 1.0
+_lock = threading.Lock()
+
+def get_exporter() -> Optional[SpanExporter]:
+    """Get the process-wide span exporter, configured from the environment on first use."""
+    global _exporter, _configured, _sample_rate
+    if not _configured:
+        with _lock:
+            if not _configured:
+                _sample_rate = get_trace_sample_rate()
+                _exporter = load_exporter(get_trace_exporter())
+                _configured = True
+    return _exporter
+
+def set_exporter(exporter: Optional[SpanExporter], sample_rate: float = 1.0):
+    """Install a span exporter (None disables tracing), closing the previous one."""
+    global _exporter, _configured, _sample_rate
+    with _lock:
+        previous, _exporter = _exporter, exporter
+        _sample_rate = sample_rate
+        _configured = True
+    if previous is not None and previous is not exporter:
+        previous.close()
+
+def current_span() -> Union[Span, _NoopSpan]:
+    """The span of the running step, or a no-op span outside of any recorded trace."""
+    return _current_span.get() or NOOP_SPAN
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Union[Span, _NoopSpan]]:
+    """
+    Time the enclosed block as a child of the current span (or as a new trace).
+    Costs a context variable lookup when tracing is disabled or the trace is not sampled.
+    """
+    exporter = _exporter if _configured else get_exporter()
+    parent = _current_span.get()
+    if exporter is None or parent is NOOP_SPAN:
+        yield NOOP_SPAN
+        return
+    if parent is None and _sample_rate < 1 and random.random() >= _sample_rate:
+        # Unsampled root: mark the context so nothing below it is recorded either
+        token = _current_span.set(NOOP_SPAN)
+        try:
+            yield NOOP_SPAN
+        finally:
+            _current_span.reset(token)
+        return
+    current = Span(name, parent, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+        exporter.export(current)
+
+def trace_tool(name: str, func: Callable) -> Callable:
+    """Wrap an async tool so each call is the root span of its trace."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with span("tool", tool=name):
+            return await func(*args, **kwargs)
+    return wrapper
+
+def _close_exporter():
+    if _exporter is not None:
+        _exporter.close()
+
+atexit.register(_close_exporter)
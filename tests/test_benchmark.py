@@ -0,0 +1,134 @@
+import json
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from benchmark import Workload, compare, main, mann_whitney_greater, parse_args, parse_mix, percentile, summarize, tool_arguments
+from generate_report import generate_benchmark_section
+from chaimcp.mock_node import SyntheticChain
+
+class TestBenchmarkHelpers(unittest.TestCase):
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile(samples, 100), 100)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summarize(self):
+        summary = summarize([10.0, 20.0, 30.0, 40.0], errors=1, seconds=2)
+        self.assertEqual(summary["calls"], 4)
+        self.assertEqual(summary["throughput"], 2.0)
+        self.assertEqual(summary["p50_ms"], 20.0)
+        self.assertEqual(summary["mean_ms"], 25.0)
+
+    def test_mix_and_args(self):
+        """Test tool mixes parse with default weights and transports are validated."""
+        self.assertEqual(parse_mix("get_keys=2, get_blockchain_state"), {"get_keys": 2.0, "get_blockchain_state": 1.0})
+        args = parse_args(["--transports", "sse,http", "--mix", "get_keys"])
+        self.assertEqual(args.transports, ["sse", "http"])
+        with self.assertRaises(SystemExit):
+            parse_args(["--transports", "grpc"])
+        # The server won't serve SSE from several workers, so the benchmark refuses to try
+        with patch.dict("os.environ", {"MCP_WORKERS": "2"}):
+            with self.assertRaises(SystemExit), patch("sys.stderr"):
+                parse_args(["--transports", "stdio,sse"])
+            self.assertEqual(parse_args(["--transports", "http"]).transports, ["http"])
+
+    def test_tool_arguments_valid_for_mock(self):
+        """Test generated arguments stay within the mock node's chain and stores."""
+        workload = Workload(Path("."), SyntheticChain(height=1000))
+        rng = random.Random(1)
+        for _ in range(50):
+            self.assertLess(tool_arguments("get_block_record_by_height", rng, workload)["height"], 1000)
+            records = tool_arguments("get_block_records", rng, workload)
+            self.assertLessEqual(records["end"], 1000)
+        self.assertIn(tool_arguments("get_keys", rng, workload)["store_id"], workload.store_ids)
+        self.assertEqual(tool_arguments("get_network_info", rng, workload), {})
+
+def run_results(samples):
+    """A benchmark results file with one transport and the given samples per tool."""
+    tools = {tool: {**summarize(values, errors, 10), "samples_ms": values} for tool, (values, errors) in samples.items()}
+    return {"meta": {}, "transports": {"http": {"throughput": 10.0, "tools": tools}}}
+
+class TestBenchmarkComparison(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.base = [rng.gauss(20, 1) for _ in range(50)]
+        self.same = [rng.gauss(20, 1) for _ in range(50)]
+
+    def test_mann_whitney(self):
+        """Test a clearly slower sample is significant and a like-for-like one is not."""
+        self.assertLess(mann_whitney_greater(self.base, [v * 1.5 for v in self.same]), 0.001)
+        self.assertGreater(mann_whitney_greater(self.base, self.same), 0.01)
+        self.assertEqual(mann_whitney_greater([5.0] * 10, [5.0] * 10), 1.0)
+
+    def test_compare_statuses(self):
+        """Test regressions, improvements, small changes, short samples and new errors are told apart."""
+        baseline = run_results({t: (self.base, 0) for t in ("slow", "fast", "same", "short", "failing")})
+        current = run_results({
+            "slow": ([v * 1.5 for v in self.same], 0),
+            "fast": ([v * 0.5 for v in self.same], 0),
+            "same": ([v * 1.05 for v in self.same], 0),
+            "short": ([100.0] * 3, 0),
+            "failing": (self.same, 2),
+            "added": (self.same, 0),
+        })
+        comparison = compare(baseline, current, tolerance=0.1, alpha=0.01)
+        statuses = {tool: r["status"] for tool, r in comparison["transports"]["http"]["tools"].items()}
+        self.assertEqual(statuses, {"slow": "regressed", "fast": "improved", "same": "unchanged",
+                                    "short": "insufficient", "failing": "regressed", "added": "new"})
+        self.assertEqual(comparison["regressions"], ["http/slow", "http/failing"])
+        self.assertAlmostEqual(comparison["transports"]["http"]["tools"]["slow"]["change"], 0.5, delta=0.1)
+
+    def test_incomparable_runs(self):
+        """Test differing run settings and missing baseline transports are reported."""
+        baseline = run_results({"get_keys": (self.base, 0)})
+        baseline["meta"] = {"cpus": 4, "sessions": 8, "duration": 10}
+        baseline["transports"]["sse"] = baseline["transports"]["http"]
+        current = run_results({"get_keys": (self.same, 0)})
+        current["meta"] = {"cpus": 4, "sessions": 4, "duration": 10}
+        comparison = compare(baseline, current)
+        self.assertEqual(comparison["mismatches"], ["sessions: baseline 8, current 4"])
+        self.assertEqual(comparison["missing"], ["sse"])
+        self.assertEqual(comparison["regressions"], [])
+
+        html = generate_benchmark_section(comparison)
+        self.assertIn("not comparable", html)
+        self.assertIn("sse: in the baseline but not run", html)
+
+    def test_main_gate_and_report(self):
+        """Test --compare exits nonzero on a regression and the comparison renders in the HTML report."""
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            (directory / "baseline.json").write_text(json.dumps(run_results({"get_keys": (self.base, 0)})))
+            (directory / "same.json").write_text(json.dumps(run_results({"get_keys": (self.same, 0)})))
+            (directory / "slow.json").write_text(json.dumps(run_results({"get_keys": ([v * 2 for v in self.same], 0)})))
+            output = directory / "comparison.json"
+            argv = ["--compare", str(directory / "baseline.json"), "--comparison-output", str(output)]
+
+            main(argv + ["--results", str(directory / "same.json")])
+            self.assertEqual(json.loads(output.read_text())["regressions"], [])
+            with self.assertRaises(SystemExit) as exit:
+                main(argv + ["--results", str(directory / "slow.json")])
+            self.assertEqual(exit.exception.code, 1)
+
+            html = generate_benchmark_section(json.loads(output.read_text()))
+            self.assertIn("get_keys", html)
+            self.assertIn("REGRESSED", html)
+
+            # A run with other settings fails the gate, unless mismatches are only to be warned about
+            other = run_results({"get_keys": (self.same, 0)})
+            other["meta"] = {"sessions": 4}
+            (directory / "other.json").write_text(json.dumps(other))
+            with self.assertRaises(SystemExit):
+                main(argv + ["--results", str(directory / "other.json")])
+            main(argv + ["--results", str(directory / "other.json"), "--allow-mismatch"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,285 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+from chaimcp.cache import ResponseCache, DiskCache, cache_key, get_peak
+from chaimcp.serialization import RawJson
+
+def state(height, header_hash="0xaa"):
+    return {"success": True, "blockchain_state": {"peak": {"height": height, "header_hash": header_hash}}}
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_cache_key_normalizes_params(self):
+        """Test params are normalized regardless of key order."""
+        self.assertEqual(cache_key("e", {"a": 1, "b": 2}), cache_key("e", {"b": 2, "a": 1}))
+        self.assertEqual(cache_key("e", None), cache_key("e", {}))
+        self.assertNotEqual(cache_key("e", {"a": 1}), cache_key("f", {"a": 1}))
+
+    def test_get_peak(self):
+        """Test peak extraction from get_blockchain_state responses."""
+        self.assertEqual(get_peak(state(10, "0x1")), (10, "0x1"))
+        self.assertIsNone(get_peak({"success": True, "blockchain_state": {"peak": None}}))
+        self.assertIsNone(get_peak({"success": False}))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        cache = ResponseCache(max_entries=2, peak_ttl=60)
+        cache.put("a", None, {"a": 1})
+        cache.put("b", None, {"b": 1})
+        cache.get("a")
+        cache.put("c", None, {"c": 1})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_byte_budget(self):
+        """Test entries are evicted to stay within max_bytes and oversized responses aren't cached."""
+        body = lambda pad: RawJson.from_bytes(b'{"success":true,"pad":"' + b"x" * pad + b'"}')
+        size = len(body(70).raw)
+        cache = ResponseCache(max_entries=100, peak_ttl=60, max_bytes=8 * size)
+        for name in "abc":
+            cache.put(name, None, body(70))
+        self.assertEqual(cache.stats()["bytes"], 3 * size)
+        # Entries still fit by count, but not by size: the oldest ones go
+        for name in "defghij":
+            cache.put(name, None, body(70))
+        self.assertEqual(cache.stats()["bytes"], 8 * size)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("j"))
+
+        # More than an eighth of the budget: not worth flushing the rest for
+        cache.put("j", None, body(71))
+        self.assertIsNone(cache.get("j"))
+        self.assertEqual(cache.stats()["bytes"], 7 * size)
+
+    def test_keeps_only_bodies(self):
+        """Test upstream responses are cached as their bytes, and every hit decodes its own copy."""
+        cache = ResponseCache(max_entries=10, peak_ttl=60)
+        response = RawJson.from_bytes(b'{"success":true,"a":1}')
+        response["a"]
+        cache.put("a", None, response)
+        self.assertEqual(cache._entries[cache_key("a", None)][0], b'{"success":true,"a":1}')
+        first, second = cache.get("a"), cache.get("a")
+        self.assertIsNot(first, second)
+        self.assertFalse(first.loaded)
+        self.assertEqual(first, {"success": True, "a": 1})
+
+    def test_peak_change_invalidates(self):
+        """Test a new peak (or same height with a new header hash) drops all entries."""
+        cache = ResponseCache(max_entries=10, peak_ttl=60)
+        self.assertTrue(cache.set_peak((1, "0x1")))
+        cache.put("a", None, {"a": 1})
+        self.assertFalse(cache.set_peak((1, "0x1")))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertTrue(cache.set_peak((1, "0x2")))
+        self.assertIsNone(cache.get("a"))
+
+    def test_lagging_peak_ignored(self):
+        """Test a lower or missing peak (a node that is behind) neither moves the peak nor drops entries."""
+        cache = ResponseCache(max_entries=10, peak_ttl=60)
+        cache.set_peak((10, "0xa"))
+        cache.put("a", None, {"a": 1})
+        self.assertFalse(cache.set_peak((9, "0x9")))
+        self.assertFalse(cache.set_peak(None))
+        self.assertEqual(cache.peak, (10, "0xa"))
+        self.assertIsNotNone(cache.get("a"))
+        # A lagging pushed state isn't cached as the current one either
+        cache.push_state(state(9, "0x9"))
+        self.assertIsNone(cache.get("get_blockchain_state"))
+
+class TestResponseCacheFetch(unittest.IsolatedAsyncioTestCase):
+
+    async def test_fetch_caches_until_peak_advances(self):
+        """Test repeated reads hit the cache and a new peak forces a refetch."""
+        cache = ResponseCache(max_entries=10, peak_ttl=60)
+        responses = {"get_blockchain_state": state(100), "get_block_record_by_height": {"success": True, "block_record": {}}}
+        request = AsyncMock(side_effect=lambda endpoint, data: responses[endpoint])
+
+        for _ in range(3):
+            res = await cache.fetch("get_block_record_by_height", {"height": 5}, request)
+            self.assertTrue(res["success"])
+        self.assertEqual([c.args[0] for c in request.call_args_list], ["get_blockchain_state", "get_block_record_by_height"])
+        self.assertEqual(cache.stats()["hits"], 2)
+
+        # State is also served from the cache while the peak is trusted
+        self.assertEqual(await cache.fetch("get_blockchain_state", None, request), state(100))
+        self.assertEqual(request.call_count, 2)
+
+        cache.peak_ttl = 0
+        responses["get_blockchain_state"] = state(101, "0xbb")
+        await cache.fetch("get_block_record_by_height", {"height": 5}, request)
+        self.assertEqual(request.call_count, 4)
+
+    async def test_fetch_does_not_cache_failures(self):
+        """Test error responses and unhealthy nodes bypass the cache."""
+        cache = ResponseCache(max_entries=10, peak_ttl=60)
+        request = AsyncMock(side_effect=lambda endpoint, data: state(1) if endpoint == "get_blockchain_state" else {"success": False, "error": "x"})
+        await cache.fetch("get_block_record", {"header_hash": "0x1"}, request)
+        await cache.fetch("get_block_record", {"header_hash": "0x1"}, request)
+        self.assertEqual(request.call_count, 3)
+
+        cache.invalidate()
+        request = AsyncMock(return_value={"success": False, "error": "down"})
+        res = await cache.fetch("get_block_record", {"header_hash": "0x1"}, request)
+        self.assertEqual(res["error"], "down")
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    async def test_client_routes_cacheable_endpoints(self):
+        """Test the async client only sends cacheable endpoints through its cache."""
+        from chaimcp.chia_client import AsyncChiaRpcClient
+        cache = ResponseCache(max_entries=10, peak_ttl=60)
+        with patch("chaimcp.chia_client.load_chia_config", return_value={}), \
+             patch.object(AsyncChiaRpcClient, "_request", new_callable=AsyncMock, return_value=state(7)) as mock_request:
+            client = AsyncChiaRpcClient("full_node", cache=cache)
+            await client.get("get_blockchain_state")
+            await client.get("get_blockchain_state")
+            await client.get("get_all_mempool_tx_ids")
+            await client.get("get_all_mempool_tx_ids")
+        self.assertEqual(mock_request.call_count, 3)
+
+def block(height, header_hash=None):
+    return {"success": True, "block_record": {"height": height, "header_hash": header_hash or f"0x{height:02x}"}}
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "nested" / "blocks.sqlite"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_survives_restart(self):
+        """Test stored responses are read back after reopening the database."""
+        cache = DiskCache(self.path, max_bytes=1 << 20)
+        cache.store("get_block_record_by_height", {"height": 1}, block(1))
+        cache.close()
+
+        cache = DiskCache(self.path, max_bytes=1 << 20)
+        self.assertEqual(cache.get("get_block_record_by_height", {"height": 1}), block(1))
+        # Indexed by header hash as well
+        self.assertEqual(cache.get("get_block_record", {"header_hash": "0x01"}), block(1))
+        self.assertIsNone(cache.get("get_block_record_by_height", {"height": 2}))
+        self.assertGreater(cache.size, 0)
+        cache.close()
+
+    def test_size_eviction(self):
+        """Test least recently used entries are evicted once max_bytes is exceeded."""
+        entry_size = len('{"success":true,"block_record":{"height":0,"header_hash":"0x00"}}')
+        cache = DiskCache(self.path, max_bytes=entry_size * 3)
+        for height in range(3):
+            cache.put("get_block_record_by_height", {"height": height}, block(height))
+        cache.get("get_block_record_by_height", {"height": 0})
+        cache.put("get_block_record_by_height", {"height": 3}, block(3))
+
+        self.assertIsNotNone(cache.get("get_block_record_by_height", {"height": 0}))
+        self.assertIsNone(cache.get("get_block_record_by_height", {"height": 1}))
+        self.assertLessEqual(cache.size, cache.max_bytes)
+        cache.close()
+
+    def test_shared_between_processes(self):
+        """Test caches sharing one file (one per worker) see each other's entries and evict by the total size."""
+        entry_size = len('{"success":true,"block_record":{"height":0,"header_hash":"0x00"}}')
+        first = DiskCache(self.path, max_bytes=entry_size * 3)
+        second = DiskCache(self.path, max_bytes=entry_size * 3)
+        first.put("get_block_record_by_height", {"height": 0}, block(0))
+        self.assertEqual(second.get("get_block_record_by_height", {"height": 0}), block(0))
+
+        for height in range(1, 5):
+            second.put("get_block_record_by_height", {"height": height}, block(height))
+        # Eviction counted first's entry too, so the file as a whole is back under the limit
+        stored = second._db.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+        self.assertEqual(second.size, stored)
+        self.assertLessEqual(stored, second.max_bytes)
+
+        # first picks up the other worker's writes at its next re-read
+        first.SYNC_EVERY = 1
+        first.put("get_block_record_by_height", {"height": 5}, block(5))
+        self.assertEqual(first.size, first._db.execute("SELECT SUM(size) FROM responses").fetchone()[0])
+        first.close()
+        second.close()
+
+    def test_access_times_batched(self):
+        """Test hits write their access times back in batches rather than one UPDATE each."""
+        cache = DiskCache(self.path, max_bytes=1 << 20)
+        cache.TOUCH_BATCH = 3
+        for height in range(3):
+            cache.put("get_block_record_by_height", {"height": height}, block(height))
+        accessed = lambda: [row[0] for row in cache._db.execute("SELECT accessed FROM responses ORDER BY key")]
+        stored = accessed()
+        cache.get("get_block_record_by_height", {"height": 0})
+        cache.get("get_block_record_by_height", {"height": 1})
+        self.assertEqual(accessed(), stored)
+        cache.get("get_block_record_by_height", {"height": 2})
+        self.assertTrue(all(new > old for new, old in zip(accessed(), stored)))
+        cache.close()
+
+    def test_close_persists_touches(self):
+        """Test access times still pending in a batch are written when the caches are closed."""
+        from chaimcp import cache as cache_module
+        with patch("chaimcp.cache.get_disk_cache_dir", return_value=self.path.parent):
+            cache = cache_module.get_disk_cache("testnet")
+            cache.put("get_block_record_by_height", {"height": 1}, block(1))
+            stored = cache._db.execute("SELECT accessed FROM responses").fetchone()[0]
+            cache.get("get_block_record_by_height", {"height": 1})
+            cache_module.close_disk_caches()
+            self.assertNotIn("testnet", cache_module._disk_caches)
+
+            reopened = cache_module.get_disk_cache("testnet")
+            self.assertIsNot(reopened, cache)
+            self.assertGreater(reopened._db.execute("SELECT accessed FROM responses").fetchone()[0], stored)
+            cache_module.close_disk_caches()
+
+    def test_is_final(self):
+        """Test only blocks below the reorg depth (or addressed by hash) are final."""
+        cache = DiskCache(self.path, reorg_depth=10)
+        self.assertTrue(cache.is_final("get_block_record", block(100), None))
+        self.assertTrue(cache.is_final("get_block_record_by_height", block(90), 100))
+        self.assertFalse(cache.is_final("get_block_record_by_height", block(91), 100))
+        self.assertFalse(cache.is_final("get_block_record_by_height", block(1), None))
+        self.assertFalse(cache.is_final("get_block_record", {"success": False, "error": "x"}, 100))
+        cache.close()
+
+class TestDiskCacheClient(unittest.IsolatedAsyncioTestCase):
+
+    async def test_client_serves_final_blocks_from_disk(self):
+        """Test the async client persists final blocks and skips the node on later reads."""
+        from chaimcp.chia_client import AsyncChiaRpcClient
+        tmp = tempfile.TemporaryDirectory()
+        disk = DiskCache(Path(tmp.name) / "blocks.sqlite", reorg_depth=10)
+        responses = {"get_blockchain_state": state(100), "get_block_record_by_height": block(50)}
+        with patch("chaimcp.chia_client.load_chia_config", return_value={}), \
+             patch.object(AsyncChiaRpcClient, "_request", new_callable=AsyncMock, side_effect=lambda e, d, projection=None: responses[e]) as mock_request:
+            client = AsyncChiaRpcClient("full_node", cache=ResponseCache(max_entries=10, peak_ttl=60), disk_cache=disk)
+            await client.get("get_block_record_by_height", {"height": 50})
+            client.cache.invalidate()
+            self.assertEqual(await client.get("get_block_record_by_height", {"height": 50}), block(50))
+            self.assertEqual(await client.get("get_block_record", {"header_hash": "0x32"}), block(50))
+        self.assertEqual(mock_request.call_count, 2)
+        disk.close()
+        tmp.cleanup()
+
+    async def test_disk_calls_off_event_loop(self):
+        """Test SQLite reads and writes run in worker threads, not on the event loop's thread."""
+        from chaimcp.chia_client import AsyncChiaRpcClient
+        tmp = tempfile.TemporaryDirectory()
+        disk = DiskCache(Path(tmp.name) / "blocks.sqlite", reorg_depth=10)
+        threads = []
+        for name in ("get", "store"):
+            method = getattr(disk, name)
+            setattr(disk, name, lambda *args, method=method: threads.append(threading.get_ident()) or method(*args))
+        responses = {"get_blockchain_state": state(100, "0x64"), "get_block_record_by_height": block(50)}
+        with patch("chaimcp.chia_client.load_chia_config", return_value={}), \
+             patch.object(AsyncChiaRpcClient, "_request", new_callable=AsyncMock, side_effect=lambda e, d, projection=None: responses[e]):
+            client = AsyncChiaRpcClient("full_node", cache=ResponseCache(max_entries=10, peak_ttl=60), disk_cache=disk)
+            await client.get("get_block_record_by_height", {"height": 50})
+            await client.get("get_block_record_by_height", {"height": 50}, fields=["block_record.height"])
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.get_ident(), threads)
+        disk.close()
+        tmp.cleanup()
+
+if __name__ == "__main__":
+    unittest.main()
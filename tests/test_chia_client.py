@@ -1,7 +1,10 @@
+import asyncio
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+import httpx
 import requests
-from chaimcp.chia_client import ChiaRpcClient
+from chaimcp.chia_client import ChiaRpcClient, AsyncChiaRpcClient, AsyncClientRegistry, gather_limited, hedging_stats
+from chaimcp.metrics import RPC_DURATION, RPC_RESPONSE_BYTES, RPC_ERRORS
 
 class TestChiaRpcClient(unittest.TestCase):
 
@@ -88,6 +91,14 @@ class TestChiaRpcClient(unittest.TestCase):
         self.assertFalse(res["success"])
         self.assertEqual(res["error"], "Boom")
         
+    def test_pool_size(self):
+        """Test the pool size is applied to the HTTPS adapter."""
+        with patch("chaimcp.chia_client.load_chia_config", return_value=self.mock_config), \
+             patch("chaimcp.chia_client.get_ssl_paths", return_value={"cert":"c", "key":"k"}):
+            client = ChiaRpcClient("full_node", pool_size=4)
+        adapter = client.session.get_adapter("https://localhost:8555")
+        self.assertEqual(adapter._pool_maxsize, 4)
+
     @patch("chaimcp.chia_client.ChiaRpcClient.get")
     def test_wrappers(self, mock_get):
         """Test convenience wrapper methods."""
@@ -102,3 +113,429 @@ class TestChiaRpcClient(unittest.TestCase):
         
         self.client.get_wallet_balance(123)
         mock_get.assert_called_with("get_wallet_balance", {"wallet_id": 123})
+
+class TestAsyncChiaRpcClient(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.patchers = [
+            patch("chaimcp.chia_client.load_chia_config", return_value={"full_node": {"rpc_port": 8555}}),
+            patch("chaimcp.chia_client.get_ssl_paths", return_value={"cert": "c", "key": "k", "ca": "ca"}),
+            patch("chaimcp.chia_client.create_ssl_context", return_value=False),
+        ]
+        for p in self.patchers:
+            p.start()
+        self.client = AsyncChiaRpcClient("full_node")
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        for p in self.patchers:
+            p.stop()
+
+    @patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+    async def test_get_success(self, mock_post):
+        """Test successful async RPC call."""
+        mock_post.return_value = httpx.Response(200, json={"success": True, "foo": "bar"}, request=httpx.Request("POST", "https://localhost:8555/test_endpoint"))
+
+        res = await self.client.get("test_endpoint", {"data": 1})
+        self.assertEqual(res, {"success": True, "foo": "bar"})
+        # The upstream body is kept for passthrough to tool output
+        self.assertEqual(res.raw, mock_post.return_value.content)
+        args, kwargs = mock_post.call_args
+        self.assertEqual(args[0], "/test_endpoint")
+        self.assertEqual(kwargs["json"], {"data": 1})
+        self.assertEqual(str(self.client.endpoints[0].http.base_url), "https://localhost:8555")
+
+    @patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+    async def test_get_records_metrics(self, mock_post):
+        """Test each upstream call records its latency and body size, and failures count as errors."""
+        labels = ("full_node", "localhost:8555", "metrics_endpoint")
+        calls, sizes, errors = RPC_DURATION.count(*labels), RPC_RESPONSE_BYTES.count(*labels), RPC_ERRORS.value(*labels)
+        mock_post.return_value = httpx.Response(200, json={"success": True}, request=httpx.Request("POST", "https://localhost:8555/metrics_endpoint"))
+        await self.client.get("metrics_endpoint")
+        self.assertEqual(RPC_DURATION.count(*labels), calls + 1)
+        self.assertEqual(RPC_RESPONSE_BYTES.count(*labels), sizes + 1)
+
+        mock_post.side_effect = httpx.ConnectError("Connection refused")
+        await self.client.get("metrics_endpoint")
+        self.assertEqual(RPC_ERRORS.value(*labels), errors + 1)
+
+    @patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+    async def test_get_connection_error(self, mock_post):
+        """Test handling of httpx.ConnectError."""
+        mock_post.side_effect = httpx.ConnectError("Connection refused")
+
+        res = await self.client.get("test_endpoint")
+        self.assertFalse(res["success"])
+        self.assertIn("Connection refused", res["error"])
+
+    @patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+    async def test_get_generic_exception(self, mock_post):
+        """Test handling of generic exceptions."""
+        mock_post.side_effect = Exception("Boom")
+
+        res = await self.client.get("test_endpoint")
+        self.assertEqual(res, {"success": False, "error": "Boom"})
+
+    async def test_wrappers(self):
+        """Test convenience wrappers are awaitable."""
+        with patch.object(AsyncChiaRpcClient, "get", new_callable=AsyncMock) as mock_get:
+            await self.client.get_wallet_balance(123)
+            mock_get.assert_called_with("get_wallet_balance", {"wallet_id": 123})
+
+    async def test_get_block_records_chunks_in_order(self):
+        """Test block ranges are split into bounded chunks and merged in height order."""
+        async def fake_get(endpoint, data, fields=None):
+            # Finish later chunks first to prove ordering doesn't depend on completion order
+            await asyncio.sleep(0.001 * (10 - data["start"] // 3))
+            return {"success": True, "block_records": [{"height": h} for h in range(data["start"], data["end"])]}
+
+        with patch.object(AsyncChiaRpcClient, "get", side_effect=fake_get) as mock_get:
+            res = await self.client.get_block_records(0, 10, chunk_size=3, parallelism=2)
+        self.assertTrue(res["success"])
+        self.assertEqual([b["height"] for b in res["block_records"]], list(range(10)))
+        self.assertEqual([c.args[1] for c in mock_get.call_args_list],
+                         [{"start": 0, "end": 3}, {"start": 3, "end": 6}, {"start": 6, "end": 9}, {"start": 9, "end": 10}])
+
+    async def test_get_block_records_errors(self):
+        """Test invalid ranges and failed chunks are reported."""
+        res = await self.client.get_block_records(5, 5)
+        self.assertFalse(res["success"])
+        res = await self.client.get_block_records(-5, 5)
+        self.assertFalse(res["success"])
+        self.assertIn("heights start at 0", res["error"])
+
+        # Oversized ranges are refused before any RPC is queued
+        with patch.dict("os.environ", {"MCP_BLOCK_RANGE_MAX": "100"}), \
+             patch.object(AsyncChiaRpcClient, "get", new_callable=AsyncMock, return_value={"success": True, "block_records": []}) as mock_get:
+            res = await self.client.get_block_records(0, 5_000_000)
+            self.assertFalse(res["success"])
+            self.assertIn("maximum of 100", res["error"])
+            self.assertTrue((await self.client.get_block_records(0, 100))["success"])
+        self.assertEqual(mock_get.await_count, 1)
+
+        responses = [{"success": True, "block_records": []}, {"success": False, "error": "boom"}]
+        with patch.object(AsyncChiaRpcClient, "get", new_callable=AsyncMock, side_effect=responses):
+            res = await self.client.get_block_records(0, 4, chunk_size=2)
+        self.assertEqual(res, {"success": False, "error": "boom"})
+
+    async def test_get_coin_records_by_puzzle_hashes(self):
+        """Test puzzle hash lists are deduplicated, chunked and merged without duplicate coins."""
+        def coin(parent, ph):
+            return {"coin": {"parent_coin_info": parent, "puzzle_hash": ph, "amount": 1}, "spent": False}
+
+        async def fake_get(endpoint, data, fields=None):
+            return {"success": True, "coin_records": [coin("0xp", ph) for ph in data["puzzle_hashes"]] + [coin("0xp", "0xa")]}
+
+        with patch.object(AsyncChiaRpcClient, "get", side_effect=fake_get) as mock_get:
+            res = await self.client.get_coin_records_by_puzzle_hashes(["0xa", "0xb", "0xa", "0xc"], start_height=10, chunk_size=2)
+        self.assertTrue(res["success"])
+        self.assertEqual([r["coin"]["puzzle_hash"] for r in res["coin_records"]], ["0xa", "0xb", "0xc"])
+        self.assertEqual([c.args[1] for c in mock_get.call_args_list], [
+            {"include_spent_coins": False, "start_height": 10, "puzzle_hashes": ["0xa", "0xb"]},
+            {"include_spent_coins": False, "start_height": 10, "puzzle_hashes": ["0xc"]},
+        ])
+
+        with patch.object(AsyncChiaRpcClient, "get", new_callable=AsyncMock, return_value={"success": False, "error": "boom"}):
+            res = await self.client.get_coin_records_by_puzzle_hashes(["0xa"])
+        self.assertFalse(res["success"])
+
+    async def test_scan_coin_records_by_puzzle_hash(self):
+        """Test a page fetches its height windows separately, reports them as they finish and merges them in order."""
+        async def fake_get(endpoint, data, fields=None):
+            return {"success": True, "coin_records": [{"confirmed_block_index": data["start_height"]}]}
+
+        progress = []
+
+        async def on_window(done, total):
+            progress.append((done, total))
+
+        with patch.object(AsyncChiaRpcClient, "get", side_effect=fake_get) as mock_get:
+            res = await self.client.scan_coin_records_by_puzzle_hash("0xa", 100, 125, window=10, parallelism=4, on_window=on_window)
+        self.assertEqual([r["confirmed_block_index"] for r in res["coin_records"]], [100, 110, 120])
+        self.assertIsNone(res["next_height"])
+        self.assertEqual([(c.args[1]["start_height"], c.args[1]["end_height"]) for c in mock_get.call_args_list], [(100, 110), (110, 120), (120, 125)])
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+
+        # A page covers at most `parallelism` windows
+        with patch.object(AsyncChiaRpcClient, "get", side_effect=fake_get):
+            res = await self.client.scan_coin_records_by_puzzle_hash("0xa", 100, 125, window=10, parallelism=2)
+        self.assertEqual(res["next_height"], 120)
+
+    async def test_scan_page_bounded_by_records(self):
+        """Test a page stops at the window that would exceed max_records, and an oversized first window is halved."""
+        async def fake_get(endpoint, data, fields=None):
+            heights = range(data["start_height"], data["end_height"])
+            return {"success": True, "coin_records": [{"confirmed_block_index": h} for h in heights for _ in range(2)]}
+
+        with patch.object(AsyncChiaRpcClient, "get", side_effect=fake_get):
+            res = await self.client.scan_coin_records_by_puzzle_hash("0xa", 0, 100, window=10, parallelism=4, max_records=45)
+            self.assertEqual((len(res["coin_records"]), res["next_height"]), (40, 20))
+
+            res = await self.client.scan_coin_records_by_puzzle_hash("0xa", 0, 100, window=10, parallelism=4, max_records=5)
+            self.assertEqual((len(res["coin_records"]), res["next_height"]), (4, 2))
+
+    async def test_gather_limited(self):
+        """Test gather_limited never exceeds its parallelism."""
+        active = peak = 0
+
+        async def call():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.001)
+            active -= 1
+            return active
+
+        results = await gather_limited([call] * 8, 3)
+        self.assertEqual(len(results), 8)
+        self.assertEqual(peak, 3)
+
+    async def test_registry_shares_clients_and_semaphore(self):
+        """Test the async registry pools clients per loop and shares a semaphore per service."""
+        registry = AsyncClientRegistry(max_concurrency=3)
+        first = registry.get("full_node")
+        self.assertIs(first, registry.get("full_node"))
+        other_port = registry.get("full_node", port=1234)
+        self.assertIsNot(first, other_port)
+        self.assertIs(first.semaphore, other_port.semaphore)
+        self.assertEqual(first.semaphore._value, 3)
+
+        await registry.close()
+        self.assertIsNot(first, registry.get("full_node"))
+        await registry.close()
+
+    @patch.dict("os.environ", {"CHIA_FULL_NODE_HOST": "node-a,node-b:18555"})
+    async def test_multiple_endpoints(self):
+        """Test backends come from CHIA_FULL_NODE_HOST and an explicit port overrides them all."""
+        client = AsyncChiaRpcClient("full_node")
+        self.assertEqual([(e.host, e.port) for e in client.endpoints], [("node-a", 8555), ("node-b", 18555)])
+        self.assertEqual(client.base_url, "https://node-a:8555")
+        client = AsyncChiaRpcClient("full_node", port=1)
+        self.assertEqual(client.addresses, [("node-a", 1), ("node-b", 1)])
+        client = AsyncChiaRpcClient("full_node", host="pinned")
+        self.assertEqual(client.addresses, [("pinned", 8555)])
+
+    @patch.dict("os.environ", {"CHIA_FULL_NODE_HOST": "node-a,node-b,node-c"})
+    async def test_reads_balanced_across_endpoints(self):
+        """Test reads spread over the least busy backends while writes stay on the primary."""
+        client = AsyncChiaRpcClient("full_node", balance_reads=True)
+        hosts = []
+
+        async def post(self_http, url, json=None, **kwargs):
+            hosts.append(str(self_http.base_url))
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"success": True}, request=httpx.Request("POST", "https://x" + url))
+
+        with patch("httpx.AsyncClient.post", new=post):
+            await asyncio.gather(*[client.get("get_block_record_by_height", {"height": h}) for h in range(6)])
+            self.assertEqual(sorted(hosts), sorted(["https://node-a:8555", "https://node-b:8555", "https://node-c:8555"] * 2))
+            self.assertTrue(all(e.inflight == 0 for e in client.endpoints))
+
+            hosts.clear()
+            await asyncio.gather(*[client.get("push_tx", {"n": n}) for n in range(3)])
+            self.assertEqual(hosts, ["https://node-a:8555"] * 3)
+
+        await client.close()
+
+    @patch.dict("os.environ", {"CHIA_FULL_NODE_HOST": "node-a,node-b"})
+    async def test_failover_and_fail_fast(self):
+        """Test refused reads fail over, open circuits are skipped and all-open fails fast."""
+        client = AsyncChiaRpcClient("full_node")
+        for target in client.endpoints:
+            target.breaker.failure_threshold = 1
+        ok = httpx.Response(200, json={"success": True}, request=httpx.Request("POST", "https://node-b:8555/get_network_info"))
+
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=[httpx.ConnectError("refused"), ok]) as mock_post:
+            res = await client.get("get_network_info")
+        self.assertEqual(res, {"success": True})
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(client.endpoints[0].breaker.state, "open")
+
+        # node-a's circuit is open, so it isn't even tried
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=ok) as mock_post:
+            await client.get("get_block_record_by_height", {"height": 1})
+        self.assertEqual(mock_post.call_count, 1)
+
+        # Writes stay on the primary: with its circuit open they fail fast rather than move
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=ok) as mock_post:
+            res = await client.get("push_tx", {"spend_bundle": {}})
+        mock_post.assert_not_called()
+        self.assertIn("No healthy full_node backend", res["error"])
+
+        client.endpoints[1].breaker.record_failure()
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock) as mock_post:
+            res = await client.get("get_network_info")
+        mock_post.assert_not_called()
+        self.assertIn("No healthy full_node backend", res["error"])
+        await client.close()
+
+    @patch.dict("os.environ", {"CHIA_WALLET_HOST": "wallet-a,wallet-b", "MCP_HEDGE_ENABLED": "true"})
+    async def test_wallet_never_fails_over(self):
+        """Test wallet calls, reads included, never reach a second wallet backend, which holds other keys."""
+        client = AsyncChiaRpcClient("wallet", balance_reads=True)
+        client.max_retries = 0
+        for target in client.endpoints:
+            for _ in range(target.latency.min_samples):
+                target.latency.observe("get_wallet_balance", 0.001)
+
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=httpx.ConnectError("refused")) as mock_post:
+            res = await client.get("get_wallet_balance", {"wallet_id": 1})
+            await client.get("send_transaction", {"amount": 1})
+        self.assertFalse(res["success"])
+        self.assertEqual(mock_post.call_count, 2)
+        # wallet-b's connection pool was never even created
+        self.assertIsNone(client.endpoints[1].http)
+        self.assertIsNone(client._hedge_delay("get_wallet_balance", client.endpoints))
+        self.assertEqual(client._candidates("get_wallet_balance"), client.endpoints[:1])
+        await client.close()
+
+    @patch.dict("os.environ", {"CHIA_FULL_NODE_HOST": "slow,fast", "MCP_HEDGE_ENABLED": "true"})
+    async def test_hedged_reads(self):
+        """Test a read slower than the backend's usual latency is hedged to a second backend."""
+        client = AsyncChiaRpcClient("full_node", balance_reads=True)
+        client._rotation = len(client.endpoints) - 1 # next pick starts at "slow"
+        for target in client.endpoints:
+            for _ in range(target.latency.min_samples):
+                target.latency.observe("get_network_info", 0.001)
+        cancelled = []
+
+        async def post(self_http, url, json=None, **kwargs):
+            try:
+                await asyncio.sleep(1 if "slow" in str(self_http.base_url) else 0)
+            except asyncio.CancelledError:
+                cancelled.append(str(self_http.base_url))
+                raise
+            return httpx.Response(200, json={"success": True, "from": str(self_http.base_url)}, request=httpx.Request("POST", "https://x" + url))
+
+        before = dict(hedging_stats)
+        with patch("httpx.AsyncClient.post", new=post):
+            res = await client.get("get_network_info")
+            self.assertEqual(res["from"], "https://fast:8555")
+            self.assertEqual(cancelled, ["https://slow:8555"])
+            self.assertEqual({k: hedging_stats[k] - before[k] for k in before}, {"requests": 1, "hedged": 1, "hedge_wins": 1})
+
+            # Writes are never hedged
+            client._rotation = len(client.endpoints) - 1
+            client.endpoints[0], client.endpoints[1] = client.endpoints[1], client.endpoints[0]
+            await client.get("push_tx", {"spend_bundle": {}})
+            self.assertEqual(hedging_stats["requests"] - before["requests"], 1)
+        self.assertTrue(all(e.inflight == 0 for e in client.endpoints))
+        await client.close()
+
+    @patch.dict("os.environ", {"CHIA_FULL_NODE_HOST": "ahead,behind"})
+    async def test_balanced_reads_with_lagging_node(self):
+        """Test a node one block behind neither empties the response cache nor answers cached reads."""
+        from chaimcp.cache import ResponseCache
+        client = AsyncChiaRpcClient("full_node", balance_reads=True, cache=ResponseCache(max_entries=10, peak_ttl=0))
+        heights = {"https://ahead:8555": 10, "https://behind:8555": 9}
+        served = []
+
+        async def post(self_http, url, json=None, **kwargs):
+            backend = str(self_http.base_url)
+            if url == "/get_blockchain_state":
+                height = heights[backend]
+                body = {"success": True, "blockchain_state": {"peak": {"height": height, "header_hash": f"0x{height}"}}}
+            else:
+                served.append(backend)
+                body = {"success": True, "coin_records": [], "from": backend}
+            return httpx.Response(200, json=body, request=httpx.Request("POST", backend + url))
+
+        with patch("httpx.AsyncClient.post", new=post):
+            for _ in range(6):
+                # Every read re-checks the peak (peak_ttl=0), alternating between the two nodes
+                res = await client.get("get_coin_records_by_puzzle_hash", {"puzzle_hash": "0xa"})
+                self.assertEqual(res["from"], "https://ahead:8555")
+        self.assertEqual(client.cache.peak, (10, "0x10"))
+        # Refetched once at most: when the very first peak check reached the lagging node
+        self.assertEqual(set(served), {"https://ahead:8555"})
+        self.assertLessEqual(len(served), 2)
+        self.assertGreaterEqual(client.cache.hits, 4)
+        self.assertEqual([e.peak_height for e in client.endpoints], [10, 9])
+        await client.close()
+
+    async def test_adaptive_timeouts(self):
+        """Test timeouts start from per-endpoint defaults and then follow observed latency."""
+        target = self.client.endpoints[0]
+        self.assertEqual(self.client._timeout(target, "get_network_info"), 2)
+        self.assertEqual(self.client._timeout(target, "get_coin_records_by_puzzle_hash"), 30)
+        self.assertEqual(self.client._timeout(target, "push_tx"), 10)
+
+        for _ in range(target.latency.min_samples):
+            target.latency.observe("get_network_info", 0.01)
+            target.latency.observe("get_coin_records_by_puzzle_hash", 25)
+        self.assertEqual(self.client._timeout(target, "get_network_info"), 1)
+        self.assertEqual(self.client._timeout(target, "get_coin_records_by_puzzle_hash"), 60)
+
+        ok = httpx.Response(200, json={"success": True}, request=httpx.Request("POST", "https://localhost:8555/get_network_info"))
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=ok) as mock_post:
+            await self.client.get("get_network_info")
+        self.assertEqual(mock_post.call_args.kwargs["timeout"], 1)
+
+        # The starting timeouts are capped by MCP_RPC_MAX_TIMEOUT just like learned ones
+        self.client.max_timeout = 20
+        self.assertEqual(self.client._timeout(self.client.endpoints[0], "get_block_records"), 20)
+
+    async def test_slow_scan_after_fast_lookups(self):
+        """Test many fast range queries don't shrink the timeout a later wide scan gets."""
+        target = self.client.endpoints[0]
+        for _ in range(target.latency.min_samples):
+            target.latency.observe("get_coin_records_by_puzzle_hash", 0.02)
+            target.latency.observe("get_block_records", 0.02)
+        self.assertEqual(self.client._timeout(target, "get_coin_records_by_puzzle_hash"), 30)
+        self.assertEqual(self.client._timeout(target, "get_block_records"), 30)
+
+        async def post(url, json=None, timeout=None):
+            # A 10,000 block window takes far longer than the lookups seen so far
+            if timeout < 5:
+                raise httpx.ReadTimeout("timed out")
+            return httpx.Response(200, json={"success": True, "coin_records": []}, request=httpx.Request("POST", "https://localhost:8555" + url))
+
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=post):
+            res = await self.client.get("get_coin_records_by_puzzle_hash", {"puzzle_hash": "0xa", "start_height": 0, "end_height": 10000})
+        self.assertTrue(res["success"])
+
+    @patch("chaimcp.chia_client.asyncio.sleep", new_callable=AsyncMock)
+    async def test_retries_idempotent_calls_within_budget(self, mock_sleep):
+        """Test reads are retried with backoff, writes never are, and the shared budget caps retries."""
+        from chaimcp.retry import RetryBudget
+        ok = httpx.Response(200, json={"success": True}, request=httpx.Request("POST", "https://localhost:8555/get_network_info"))
+        budget = RetryBudget(ratio=0, max_tokens=2)
+        with patch("chaimcp.chia_client.get_retry_budget", return_value=budget):
+            with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=[httpx.ReadTimeout("slow"), ok]) as mock_post:
+                self.assertEqual(await self.client.get("get_network_info"), {"success": True})
+            self.assertEqual(mock_post.call_count, 2)
+            self.assertEqual(mock_sleep.await_count, 1)
+
+            with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=httpx.ReadTimeout("slow")) as mock_post:
+                await self.client.get("push_tx", {"spend_bundle": {}})
+            self.assertEqual(mock_post.call_count, 1)
+
+            # One token left: the second retry is refused
+            with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=httpx.ConnectError("refused")) as mock_post:
+                res = await self.client.get("get_blockchain_state")
+            self.assertFalse(res["success"])
+            self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(budget.stats(), {"tokens": 0, "retries": 2, "exhausted": 1})
+
+    async def test_health_probe(self):
+        """Test probes close circuits of healthy backends and open those of failing ones."""
+        target = self.client.endpoints[0]
+        target.breaker.failure_threshold = 1
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, side_effect=httpx.ConnectError("refused")):
+            self.assertFalse(await self.client.probe(target))
+        self.assertEqual(target.breaker.state, "open")
+
+        ok = httpx.Response(200, json={"success": True}, request=httpx.Request("POST", "https://localhost:8555/healthz"))
+        with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=ok) as mock_post:
+            self.assertTrue(await self.client.probe(target))
+        self.assertEqual(mock_post.call_args.args[0], "/healthz")
+        self.assertEqual(target.breaker.state, "closed")
+
+    async def test_health_checks_run_in_background(self):
+        """Test the probe loop runs until the client is closed."""
+        with patch.object(AsyncChiaRpcClient, "probe", new_callable=AsyncMock, return_value=True) as mock_probe:
+            self.client.start_health_checks(interval=0.001)
+            await asyncio.sleep(0.01)
+            await self.client.close()
+        self.assertGreater(mock_probe.await_count, 1)
+        self.assertIsNone(self.client._health_task)
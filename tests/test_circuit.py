@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+from chaimcp.circuit import CircuitBreaker
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the circuit opens only after the failure threshold is reached in a row."""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.stats(), {"state": "open", "failures": 3, "opened": 1})
+
+    @patch("chaimcp.circuit.time.monotonic")
+    def test_half_open_single_trial(self, mock_time):
+        """Test an open circuit lets exactly one trial through after the reset timeout."""
+        mock_time.return_value = 100.0
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        mock_time.return_value = 110.0
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.available())
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        self.assertFalse(breaker.available())
+
+        # A failed trial re-opens the circuit for another full timeout
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        mock_time.return_value = 120.0
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+    @patch("chaimcp.circuit.time.monotonic", return_value=0.0)
+    def test_release_trial(self, mock_time):
+        """Test a trial without an outcome can be handed back."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.release()
+        self.assertTrue(breaker.allow())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 import os
+import tempfile
 import unittest
+import yaml
 from unittest.mock import patch, mock_open, MagicMock
 from pathlib import Path
-from chaimcp.config import get_chia_root, load_chia_config, get_ssl_paths, get_mcp_auth_enabled, get_letsencrypt_enabled
+from chaimcp.config import get_chia_root, load_chia_config, get_ssl_paths, get_mcp_auth_enabled, get_letsencrypt_enabled, clear_config_cache, get_service_endpoints, get_block_range_chunk
 
 class TestConfig(unittest.TestCase):
 
@@ -98,3 +100,62 @@ class TestConfig(unittest.TestCase):
     def test_get_letsencrypt_enabled_false(self):
         """Test letsencrypt enabled false."""
         self.assertFalse(get_letsencrypt_enabled())
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_get_service_endpoints_default(self):
+        """Test services default to localhost on the given port."""
+        self.assertEqual(get_service_endpoints("full_node", 8555), [("localhost", 8555)])
+
+    @patch.dict(os.environ, {"CHIA_FULL_NODE_HOST": "node-a, node-b:18555,[::1]", "CHIA_FULL_NODE_PORT": "8444"}, clear=True)
+    def test_get_service_endpoints_list(self):
+        """Test comma-separated hosts, per-host ports and the shared PORT variable."""
+        self.assertEqual(get_service_endpoints("full_node", 8555), [("node-a", 8444), ("node-b", 18555), ("[::1]", 8444)])
+
+    @patch.dict(os.environ, {"CHIA_DATALAYER_HOST": "dl", "CHIA_DATALAYER_PORT": "1"}, clear=True)
+    def test_get_service_endpoints_datalayer_prefix(self):
+        """Test the data_layer service reads the CHIA_DATALAYER_* variables."""
+        self.assertEqual(get_service_endpoints("data_layer", 8562), [("dl", 1)])
+
+    @patch.dict(os.environ, {"MCP_BLOCK_RANGE_CHUNK": "0"})
+    def test_chunk_size_must_be_positive(self):
+        """Test a non-positive chunk size is refused with the variable's name rather than failing inside range()."""
+        with self.assertRaisesRegex(ValueError, "MCP_BLOCK_RANGE_CHUNK must be a positive integer"):
+            get_block_range_chunk()
+
+class TestConfigCache(unittest.TestCase):
+
+    def setUp(self):
+        clear_config_cache()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "config").mkdir()
+        self.config_path = self.root / "config" / "config.yaml"
+        self.config_path.write_text("full_node:\n  rpc_port: 8555\n")
+
+    def tearDown(self):
+        clear_config_cache()
+        self.tmp.cleanup()
+
+    def test_config_parsed_once_while_unchanged(self):
+        """Test repeated loads are served from the cache."""
+        with patch("chaimcp.config.yaml.load", wraps=yaml.load) as mock_load:
+            first = load_chia_config(self.root)
+            second = load_chia_config(self.root)
+        self.assertIs(first, second)
+        mock_load.assert_called_once()
+
+    def test_config_reloaded_on_change(self):
+        """Test the config is re-parsed when the file changes."""
+        self.assertEqual(load_chia_config(self.root)["full_node"]["rpc_port"], 8555)
+        self.config_path.write_text("full_node:\n  rpc_port: 18555\n")
+        self.assertEqual(load_chia_config(self.root)["full_node"]["rpc_port"], 18555)
+
+    def test_ssl_paths_memoized(self):
+        """Test SSL paths are resolved once and returned as independent dicts."""
+        with patch("pathlib.Path.exists", return_value=True) as mock_exists:
+            first = get_ssl_paths("wallet", self.root)
+            calls = mock_exists.call_count
+            second = get_ssl_paths("wallet", self.root)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual(mock_exists.call_count, calls)
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+from chaimcp.cache import ResponseCache
+from chaimcp.events import EventBus, DaemonEventListener, invalidate_on_events, start_event_listener
+
+def state(height, header_hash):
+    return {"success": True, "blockchain_state": {"peak": {"height": height, "header_hash": header_hash}}}
+
+def peak_message(height, header_hash):
+    return {"command": "get_blockchain_state", "origin": "chia_full_node", "destination": "wallet_ui", "data": state(height, header_hash)}
+
+class TestEventBus(unittest.TestCase):
+
+    def test_publish_subscribe(self):
+        """Test events reach every subscriber until it unsubscribes, even if another handler fails."""
+        bus = EventBus()
+        seen = []
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        bus.subscribe(broken)
+        unsubscribe = bus.subscribe(seen.append)
+        bus.publish({"service": "wallet", "change": "tx_update", "data": {}})
+        unsubscribe()
+        bus.publish({"service": "wallet", "change": "tx_update", "data": {}})
+        self.assertEqual(len(seen), 1)
+
+class TestDaemonEventListener(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.bus = EventBus()
+        self.events = []
+        self.bus.subscribe(self.events.append)
+        self.listener = DaemonEventListener(self.bus)
+
+    def test_new_peak_and_reorg(self):
+        """Test peak pushes become new_peak events, with a reorg event when the peak doesn't advance."""
+        self.listener.handle(peak_message(10, "0xa"))
+        self.listener.handle(peak_message(10, "0xa")) # unchanged, e.g. a sync_mode push
+        self.listener.handle(peak_message(11, "0xb"))
+        self.listener.handle(peak_message(11, "0xc"))
+        self.assertEqual([e["change"] for e in self.events], ["new_peak", "new_peak", "reorg", "new_peak"])
+        self.assertEqual(self.events[2]["data"], {"previous_peak": (11, "0xb"), "peak": (11, "0xc")})
+        self.assertEqual(self.events[3]["data"], state(11, "0xc"))
+
+    def test_wallet_and_unknown_messages(self):
+        """Test wallet state changes are republished and unrelated messages dropped."""
+        self.listener.handle({"command": "state_changed", "origin": "chia_wallet", "data": {"state": "tx_update", "wallet_id": 1}})
+        self.listener.handle({"command": "register_service", "origin": "daemon", "ack": True, "data": {"success": True}})
+        self.listener.handle({"command": "get_connections", "origin": "chia_full_node", "data": {}})
+        self.assertEqual(self.events, [{"service": "wallet", "change": "tx_update", "data": {"state": "tx_update", "wallet_id": 1}}])
+
+    async def test_run_registers_and_reconnects(self):
+        """Test the listener registers with the daemon, relays messages and reports connection changes."""
+        sent = []
+        connections = 0
+
+        class FakeSocket:
+            async def send(self, message):
+                sent.append(json.loads(message))
+
+            def __aiter__(self):
+                async def messages():
+                    yield json.dumps(peak_message(5, "0x5"))
+                return messages()
+
+        class FakeConnect:
+            def __init__(self, url, ssl=None, max_size=None):
+                nonlocal connections
+                connections += 1
+                self.url = url
+
+            async def __aenter__(self):
+                return FakeSocket()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        with patch("chaimcp.events.ws_connect", FakeConnect), \
+             patch("chaimcp.events.load_chia_config", return_value={"daemon_port": 55400}), \
+             patch("chaimcp.events.get_ssl_paths", return_value={"cert": "c", "key": "k"}), \
+             patch("chaimcp.events.create_ssl_context", return_value=None):
+            self.listener.reconnect_delay = 0.001
+            self.listener.start()
+            await asyncio.sleep(0.05)
+            await self.listener.stop()
+
+        self.assertGreater(connections, 1)
+        self.assertEqual(self.listener.url, "wss://localhost:55400")
+        self.assertEqual(sent[0]["command"], "register_service")
+        self.assertEqual(sent[0]["data"], {"service": "wallet_ui"})
+        changes = [e["change"] for e in self.events]
+        self.assertEqual(changes[:3], ["connected", "new_peak", "disconnected"])
+        self.assertEqual(changes[-1], "disconnected")
+
+class TestStartListener(unittest.TestCase):
+
+    @patch("chaimcp.events.ws_connect", None)
+    @patch("chaimcp.events.get_events_enabled", return_value=True)
+    def test_warns_without_websockets(self, _):
+        """Test enabled events without websockets installed are reported instead of silently doing nothing."""
+        with self.assertLogs("chaimcp.events", level="WARNING") as logs:
+            self.assertIsNone(start_event_listener())
+        self.assertIn("websockets isn't installed", logs.output[0])
+
+class TestCacheInvalidation(unittest.IsolatedAsyncioTestCase):
+
+    async def test_pushed_peaks_drive_cache(self):
+        """Test a live cache trusts pushed peaks instead of re-checking them on a TTL."""
+        bus = EventBus()
+        cache = ResponseCache(max_entries=10, peak_ttl=0)
+        invalidate_on_events(bus, cache)
+        request = AsyncMock(return_value={"success": True, "coin_records": []})
+
+        bus.publish({"service": "daemon", "change": "connected", "data": {}})
+        bus.publish({"service": "full_node", "change": "new_peak", "data": state(1, "0x1")})
+        self.assertEqual((await cache.fetch("get_blockchain_state", None, request))["blockchain_state"]["peak"]["height"], 1)
+        await cache.fetch("get_coin_records_by_puzzle_hash", {"puzzle_hash": "0xa"}, request)
+        await cache.fetch("get_coin_records_by_puzzle_hash", {"puzzle_hash": "0xa"}, request)
+        self.assertEqual(request.await_count, 1)
+
+        bus.publish({"service": "full_node", "change": "new_peak", "data": state(2, "0x2")})
+        self.assertIsNone(cache.get("get_coin_records_by_puzzle_hash", {"puzzle_hash": "0xa"}))
+
+        # Without the daemon connection the cache goes back to checking the peak itself
+        bus.publish({"service": "daemon", "change": "disconnected", "data": {}})
+        request.return_value = state(2, "0x2")
+        await cache.fetch("get_blockchain_state", None, request)
+        self.assertEqual(request.call_args.args, ("get_blockchain_state", None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,13 @@ from importlib import reload
 from unittest.mock import patch, MagicMock, AsyncMock
 import os
 import json
+import asyncio
+import socket
+import tempfile
+from pathlib import Path
 import chaimcp.main as main_module
+from chaimcp import mock_node
+from chaimcp.mock_node import MockChiaNode, SyntheticChain
 from chaimcp.main import get_blockchain_state, get_network_info, get_wallet_balance, EnvTokenVerifier
 
 class TestMain(unittest.TestCase):
@@ -32,7 +38,7 @@ class TestMain(unittest.TestCase):
         self.assertIsNone(invalid)
         loop.close()
 
-    @patch("chaimcp.chia_client.ChiaRpcClient.get_blockchain_state")
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_blockchain_state", new_callable=AsyncMock)
     def test_tool_get_blockchain_state_success(self, mock_get):
         """Test get_blockchain_state tool success path."""
         mock_get.return_value = {
@@ -45,13 +51,14 @@ class TestMain(unittest.TestCase):
             }
         }
         
-        result = get_blockchain_state()
+        result = asyncio.run(get_blockchain_state())
+        mock_get.assert_awaited_once_with(cached=False)
         data = json.loads(result)
         # New implementation returns full blockchain_state object inside the response
         self.assertEqual(data["blockchain_state"]["peak"]["height"], 100)
         self.assertTrue(data["blockchain_state"]["sync"]["synced"])
 
-    @patch("chaimcp.chia_client.ChiaRpcClient.get_blockchain_state")
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_blockchain_state", new_callable=AsyncMock)
     def test_tool_get_blockchain_state_failure(self, mock_get):
         """Test get_blockchain_state tool failure path."""
         mock_get.return_value = {
@@ -59,21 +66,49 @@ class TestMain(unittest.TestCase):
             "error": "RPC Error"
         }
         
-        result = get_blockchain_state()
+        result = asyncio.run(get_blockchain_state())
         data = json.loads(result)
         self.assertFalse(data["success"])
         self.assertEqual(data["error"], "RPC Error")
 
-    @patch("chaimcp.chia_client.ChiaRpcClient.get_network_info")
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_blockchain_state", new_callable=AsyncMock)
+    def test_tool_wait_for_height(self, mock_get):
+        """Test wait_for_height returns once the peak reaches the height, or reports the timeout."""
+        mock_get.return_value = {"success": True, "blockchain_state": {"peak": {"height": 100, "header_hash": "0x1"}}}
+        data = json.loads(asyncio.run(main_module.wait_for_height(100, timeout=1)))
+        self.assertTrue(data["reached"])
+        self.assertEqual(data["blockchain_state"]["peak"]["height"], 100)
+
+        data = json.loads(asyncio.run(main_module.wait_for_height(101, timeout=0.01)))
+        self.assertFalse(data["reached"])
+
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get", new_callable=AsyncMock)
+    def test_tool_wait_for_tx_and_coin(self, mock_get):
+        """Test wait_for_tx_confirmation and wait_for_coin_spent check the right RPCs."""
+        mock_get.return_value = {"success": True, "transaction": {"confirmed": True, "name": "0xt"}}
+        data = json.loads(asyncio.run(main_module.wait_for_tx_confirmation("0xt", timeout=1)))
+        self.assertTrue(data["reached"])
+        mock_get.assert_awaited_with("get_transaction", {"transaction_id": "0xt"})
+
+        mock_get.return_value = {"success": True, "coin_record": {"spent": False, "spent_block_index": 0}}
+        data = json.loads(asyncio.run(main_module.wait_for_coin_spent("0xc", timeout=0.01)))
+        self.assertFalse(data["reached"])
+        mock_get.assert_awaited_with("get_coin_record_by_name", {"name": "0xc"})
+
+        mock_get.return_value = {"success": False, "error": "Coin record not found"}
+        data = json.loads(asyncio.run(main_module.wait_for_coin_spent("0xc", timeout=5)))
+        self.assertEqual(data, {"success": False, "error": "Coin record not found"})
+
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_network_info", new_callable=AsyncMock)
     def test_tool_get_network_info(self, mock_get):
         """Test get_network_info tool."""
         mock_get.return_value = {"success": True, "network_name": "mainnet"}
         
-        result = get_network_info()
+        result = asyncio.run(get_network_info())
         data = json.loads(result)
         self.assertEqual(data["network_name"], "mainnet")
 
-    @patch("chaimcp.chia_client.ChiaRpcClient.get_wallet_balance")
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_wallet_balance", new_callable=AsyncMock)
     def test_tool_get_wallet_balance_success(self, mock_get):
         """Test get_wallet_balance tool success."""
         mock_get.return_value = {
@@ -84,13 +119,13 @@ class TestMain(unittest.TestCase):
             }
         }
         
-        result = get_wallet_balance(1)
+        result = asyncio.run(get_wallet_balance(1))
         data = json.loads(result)
         # New implementation returns full wallet_balance object
         self.assertEqual(data["wallet_balance"]["confirmed_wallet_balance"], 1500000000000)
         self.assertEqual(data["wallet_balance"]["spendable_balance"], 1500000000000)
 
-    @patch("chaimcp.chia_client.ChiaRpcClient.get_wallet_balance")
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_wallet_balance", new_callable=AsyncMock)
     def test_tool_get_wallet_balance_failure(self, mock_get):
         """Test get_wallet_balance tool failure."""
         mock_get.return_value = {
@@ -98,11 +133,39 @@ class TestMain(unittest.TestCase):
             "error": "Wallet locked"
         }
         
-        result = get_wallet_balance(1)
+        result = asyncio.run(get_wallet_balance(1))
         data = json.loads(result)
         self.assertFalse(data["success"])
         self.assertEqual(data["error"], "Wallet locked")
 
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_block_records", new_callable=AsyncMock)
+    def test_tool_get_block_records(self, mock_get):
+        """Test get_block_records tool."""
+        mock_get.return_value = {"success": True, "block_records": [{"height": 1}, {"height": 2}]}
+
+        result = asyncio.run(main_module.get_block_records(1, 3))
+        data = json.loads(result)
+        self.assertEqual(len(data["block_records"]), 2)
+        mock_get.assert_awaited_once_with(1, 3, fields=None)
+
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_blockchain_state", new_callable=AsyncMock)
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.scan_coin_records_by_puzzle_hash", new_callable=AsyncMock)
+    def test_tool_scan_coin_records_pages(self, mock_scan, mock_state):
+        """Test scan_coin_records_by_puzzle_hash pages through the range with a cursor."""
+        mock_state.return_value = {"success": True, "blockchain_state": {"peak": {"height": 44}}}
+        mock_scan.return_value = {"success": True, "coin_records": [], "next_height": 20}
+
+        first = json.loads(asyncio.run(main_module.scan_coin_records_by_puzzle_hash("0xa")))
+        self.assertEqual(mock_scan.call_args.args[1:3], (0, 45))
+        self.assertEqual((first["next_cursor"], first["end_height"]), (20, 45))
+        self.assertNotIn("next_height", first)
+
+        mock_scan.return_value = {"success": True, "coin_records": [], "next_height": None}
+        last = json.loads(asyncio.run(main_module.scan_coin_records_by_puzzle_hash("0xa", end_height=45, cursor=40)))
+        self.assertEqual(mock_scan.call_args.args[1:3], (40, 45))
+        self.assertIsNone(last["next_cursor"])
+        mock_state.assert_awaited_once()
+
     @patch("mcp.server.fastmcp.FastMCP.run")
     @patch.dict(os.environ, {"MCP_TRANSPORT": "stdio"})
     def test_main_stdio(self, mock_run):
@@ -158,6 +221,94 @@ class TestMain(unittest.TestCase):
         self.assertEqual(kwargs["port"], 8000)
         self.assertNotIn("ssl_keyfile", kwargs)
 
+    @patch("uvicorn.run")
+    @patch("mcp.server.fastmcp.FastMCP.streamable_http_app")
+    @patch.dict(os.environ, {"MCP_TRANSPORT": "http", "MCP_PORT": "8000", "MCP_WORKERS": "4"})
+    @patch("os.path.exists")
+    def test_main_http_workers(self, mock_exists, mock_http, mock_uvicorn):
+        """Test MCP_WORKERS runs worker processes loading the app factory on the same port."""
+        mock_exists.return_value = False
+        main_module.main()
+
+        # Each worker builds its own app, so the parent never does
+        mock_http.assert_not_called()
+        args, kwargs = mock_uvicorn.call_args
+        self.assertEqual(args, ("chaimcp.main:create_app",))
+        self.assertTrue(kwargs["factory"])
+        self.assertEqual(kwargs["workers"], 4)
+        self.assertEqual(kwargs["port"], 8000)
+        self.assertEqual(kwargs["timeout_graceful_shutdown"], 25)
+
+    @patch("mcp.server.fastmcp.FastMCP.streamable_http_app")
+    @patch.dict(os.environ, {"MCP_TRANSPORT": "http"})
+    def test_create_app(self, mock_http):
+        """Test the app factory wraps the lifespan with the background services and client shutdown."""
+        lifespan = MagicMock()
+        mock_http.return_value.routes = []
+        mock_http.return_value.router.lifespan_context = lifespan
+        app = main_module.create_app()
+        self.assertIs(app, mock_http.return_value)
+        self.assertIsNot(app.router.lifespan_context, lifespan)
+
+    @patch("uvicorn.run")
+    @patch.dict(os.environ, {"MCP_TRANSPORT": "sse", "MCP_WORKERS": "2"})
+    def test_main_sse_refuses_workers(self, mock_uvicorn):
+        """Test SSE, whose sessions live in one worker, can't be served by several workers."""
+        with self.assertRaises(SystemExit) as exit:
+            main_module.main()
+        self.assertEqual(exit.exception.code, 1)
+        mock_uvicorn.assert_not_called()
+
+    @patch("chaimcp.main.mcp.run")
+    @patch.dict(os.environ, {"MCP_TRANSPORT": "stdio", "MCP_COIN_SCAN_WINDOW": "0"})
+    def test_main_refuses_bad_settings(self, mock_run):
+        """Test a non-positive chunk or window size stops the server at startup."""
+        with self.assertRaises(SystemExit) as exit:
+            main_module.main()
+        self.assertEqual(exit.exception.code, 1)
+        mock_run.assert_not_called()
+
+    @patch.dict(os.environ, {"MCP_WORKERS": "0"})
+    def test_workers_default_to_cpus(self):
+        """Test MCP_WORKERS=0 means one worker per CPU."""
+        from chaimcp.config import get_mcp_workers
+        with patch("os.cpu_count", return_value=6):
+            self.assertEqual(get_mcp_workers(), 6)
+
+
+    @patch("chaimcp.main.close_disk_caches")
+    @patch("chaimcp.main.close_async_clients", new_callable=AsyncMock)
+    def test_close_clients_on_shutdown(self, mock_close, mock_close_disk):
+        """Test the wrapped lifespan closes pooled RPC clients and disk caches on shutdown."""
+        import contextlib
+
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            yield {"state": 1}
+
+        async def run():
+            async with main_module._close_clients_on_shutdown(lifespan)(None) as state:
+                self.assertEqual(state, {"state": 1})
+                mock_close.assert_not_called()
+                mock_close_disk.assert_not_called()
+
+        asyncio.run(run())
+        mock_close.assert_awaited_once()
+        mock_close_disk.assert_called_once()
+
+    @patch("chaimcp.main.stop_event_listener", new_callable=AsyncMock)
+    @patch("chaimcp.main.start_event_listener")
+    def test_background_services_shared(self, mock_start, mock_stop):
+        """Test nested lifespans start the background services once and stop them after the last one."""
+        async def run():
+            async with main_module._background_services(None):
+                async with main_module._background_services(None):
+                    pass
+                mock_stop.assert_not_called()
+
+        asyncio.run(run())
+        mock_start.assert_called_once()
+        mock_stop.assert_awaited_once()
 
     def test_main_execution(self):
         """Test executing the module as a script (covers __name__ == '__main__')."""
@@ -193,3 +344,52 @@ class TestMain(unittest.TestCase):
         except Exception as e:
             self.fail(f"Subprocess execution failed: {e}")
 
+@unittest.skipIf(mock_node.x509 is None, "cryptography is not installed")
+class TestMultiWorker(unittest.IsolatedAsyncioTestCase):
+
+    async def test_sessions_across_workers(self):
+        """Test MCP sessions against 2 workers make tool calls wherever each request lands."""
+        from mcp import ClientSession
+        from mcp.client.streamable_http import streamable_http_client
+        with tempfile.TemporaryDirectory() as root, socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+            sock.close()
+            node = MockChiaNode(Path(root), chain=SyntheticChain(height=500)).start()
+            env = dict(os.environ, CHIA_ROOT=root, MCP_TRANSPORT="http", MCP_PORT=str(port), MCP_WORKERS="2",
+                       MCP_AUTH_ENABLED="false", MCP_EVENTS_ENABLED="false", SSL_KEY_FILE="", SSL_CERT_FILE="",
+                       PYTHONPATH=os.pathsep.join(filter(None, [str(Path(__file__).parents[1] / "src"), os.environ.get("PYTHONPATH")])))
+            server = subprocess.Popen([sys.executable, "-m", "chaimcp.main"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                await self._wait_for_port(port)
+
+                async def session(n):
+                    async with streamable_http_client(f"http://127.0.0.1:{port}/mcp") as (read, write, _):
+                        async with ClientSession(read, write) as client:
+                            await client.initialize()
+                            results = []
+                            for height in range(n, n + 5):
+                                result = await client.call_tool("get_block_record_by_height", {"height": height})
+                                results.append(json.loads(result.content[0].text))
+                            return results
+
+                responses = await asyncio.wait_for(asyncio.gather(*(session(n) for n in range(6))), 60)
+                for n, results in enumerate(responses):
+                    self.assertEqual([r["block_record"]["height"] for r in results], list(range(n, n + 5)))
+            finally:
+                server.terminate()
+                server.wait(30)
+                node.stop()
+
+    async def _wait_for_port(self, port: int, timeout: float = 30):
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                return
+            except OSError:
+                if asyncio.get_running_loop().time() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from chaimcp.metrics import MetricsRegistry, REGISTRY, TOOL_CALLS, TOOL_ERRORS, TOOL_IN_FLIGHT, instrument_tool, hit_ratio
+from chaimcp.serialization import dump_response
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_render_text_format(self):
+        """Test counters, gauges and histograms render in the Prometheus text format."""
+        registry = MetricsRegistry()
+        calls = registry.counter("calls_total", "Calls.", ("tool",))
+        inflight = registry.gauge("in_flight", "Running.")
+        duration = registry.histogram("duration_seconds", "Latency.", ("tool",), buckets=(0.1, 1))
+        calls.inc('say "hi"')
+        inflight.inc()
+        inflight.dec()
+        duration.observe(0.05, "a")
+        duration.observe(0.5, "a")
+        duration.observe(5, "a")
+        registry.register_collector(lambda: [("ratio", "gauge", "Ratio.", [({"cache": "disk"}, 0.5)])])
+
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE calls_total counter", lines)
+        self.assertIn('calls_total{tool="say \\"hi\\""} 1', lines)
+        self.assertIn("in_flight 0", lines)
+        self.assertIn('duration_seconds_bucket{tool="a",le="0.1"} 1', lines)
+        self.assertIn('duration_seconds_bucket{tool="a",le="1"} 2', lines)
+        self.assertIn('duration_seconds_bucket{tool="a",le="+Inf"} 3', lines)
+        self.assertIn('duration_seconds_count{tool="a"} 3', lines)
+        self.assertIn('ratio{cache="disk"} 0.5', lines)
+
+    def test_hit_ratio(self):
+        self.assertEqual(hit_ratio(3, 1), 0.75)
+        self.assertEqual(hit_ratio(0, 0), 0.0)
+
+class TestInstrumentTool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_counts_calls_and_errors(self):
+        """Test raised exceptions and success=false responses both count as tool errors."""
+        async def tool(ok: bool):
+            if ok is None:
+                raise RuntimeError("boom")
+            return dump_response({"success": ok})
+
+        wrapped = instrument_tool("test_metrics_tool", tool)
+        self.assertEqual(wrapped.__name__, "tool")
+        await wrapped(True)
+        await wrapped(False)
+        with self.assertRaises(RuntimeError):
+            await wrapped(None)
+        self.assertEqual(TOOL_CALLS.value("test_metrics_tool"), 3)
+        self.assertEqual(TOOL_ERRORS.value("test_metrics_tool"), 2)
+        self.assertEqual(TOOL_IN_FLIGHT.value("test_metrics_tool"), 0)
+
+    async def test_metrics_route(self):
+        """Test the /metrics route serves the registry, including scrape-time collectors."""
+        from chaimcp.main import metrics
+        response = await metrics(None)
+        body = response.body.decode()
+        self.assertTrue(response.media_type.startswith("text/plain"))
+        self.assertIn("# TYPE chaimcp_tool_calls_total counter", body)
+        self.assertIn("chaimcp_hedge_rate", body)
+        self.assertIn("chaimcp_state_snapshot_hit_ratio", body)
+
+if __name__ == "__main__":
+    unittest.main()
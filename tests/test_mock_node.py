@@ -0,0 +1,100 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+import httpx
+from chaimcp import mock_node
+from chaimcp.chia_client import AsyncChiaRpcClient
+from chaimcp.mock_node import MockChiaNode, SyntheticChain, SyntheticDataLayer, data_layer_handlers, full_node_handlers
+
+class TestSyntheticData(unittest.TestCase):
+
+    def setUp(self):
+        self.chain = SyntheticChain(height=1000, coins_per_puzzle_hash=20)
+        self.handlers = full_node_handlers(self.chain)
+
+    def test_chain_is_deterministic(self):
+        """Test the same seed always produces the same chain, linked by header hashes."""
+        other = SyntheticChain(height=1000, coins_per_puzzle_hash=20)
+        self.assertEqual(self.chain.block_record(500), other.block_record(500))
+        self.assertEqual(self.chain.block_record(500)["prev_hash"], self.chain.header_hash(499))
+        state = self.handlers["get_blockchain_state"]({})["blockchain_state"]
+        self.assertEqual(state["peak"]["height"], 1000)
+        self.assertTrue(state["sync"]["synced"])
+
+    def test_coin_records_filters(self):
+        """Test coin queries honour the height range and spent filter."""
+        everything = self.chain.coin_records("0xab", include_spent_coins=True)
+        self.assertEqual(len(everything), 20)
+        unspent = self.chain.coin_records("0xab")
+        self.assertTrue(all(not r["spent"] for r in unspent))
+        self.assertLess(len(unspent), len(everything))
+        window = self.chain.coin_records("0xab", 100, 500, include_spent_coins=True)
+        self.assertTrue(all(100 <= r["confirmed_block_index"] < 500 for r in window))
+        merged = self.handlers["get_coin_records_by_puzzle_hashes"]({"puzzle_hashes": ["0xab", "0xcd"], "include_spent_coins": True})
+        self.assertEqual(len(merged["coin_records"]), 40)
+
+    def test_payload_padding(self):
+        """Test the padding knob grows every record by about that many bytes."""
+        padded = SyntheticChain(height=1000, padding=4096)
+        self.assertEqual(len(padded.block_record(10)["padding"]), 4096)
+        self.assertNotIn("padding", self.chain.block_record(10))
+
+    def test_block_lookups(self):
+        """Test block records are served by height, by hash and by range, and unknown heights fail."""
+        self.assertEqual(self.handlers["get_block_record"]({"header_hash": self.chain.header_hash(990)})["block_record"]["height"], 990)
+        self.assertEqual(len(self.handlers["get_block_records"]({"start": 995, "end": 1010})["block_records"]), 6)
+        self.assertFalse(self.handlers["get_block_record_by_height"]({"height": 5000})["success"])
+
+    def test_datalayer_generations(self):
+        """Test store updates create a new root while older roots stay readable."""
+        datalayer = SyntheticDataLayer(self.chain, stores=1, keys_per_store=3)
+        handlers = data_layer_handlers(datalayer)
+        store_id = next(iter(datalayer.stores))
+        before = handlers["get_root"]({"id": store_id})["hash"]
+        handlers["update_data_store"]({"id": store_id, "changelist": [{"action": "insert", "key": "0x01", "value": "0xff"}]})
+        after = handlers["get_root"]({"id": store_id})["hash"]
+        self.assertNotEqual(before, after)
+        self.assertEqual(handlers["get_value"]({"id": store_id, "key": "0x01"})["value"], "0xff")
+        self.assertNotIn("0x01", handlers["get_keys"]({"id": store_id, "root_hash": before})["keys"])
+        diff = handlers["get_kv_diff"]({"id": store_id, "hash_1": before, "hash_2": after})["diff"]
+        self.assertEqual(diff, [{"type": "INSERT", "key": "0x01", "value": "0xff"}])
+
+@unittest.skipIf(mock_node.x509 is None, "cryptography is not installed")
+class TestMockChiaNode(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.node = MockChiaNode(Path(cls.tmp.name), chain=SyntheticChain(height=2000)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.node.stop()
+        cls.tmp.cleanup()
+
+    async def test_clients_talk_mutual_tls(self):
+        """Test the real async client reaches every service through the generated CHIA_ROOT."""
+        with patch.dict("os.environ", {"CHIA_ROOT": self.tmp.name}):
+            for service, endpoint, data in [
+                ("full_node", "get_blockchain_state", None),
+                ("wallet", "get_wallet_balance", {"wallet_id": 1}),
+                ("data_layer", "get_keys", {"id": next(iter(self.node.datalayer.stores))}),
+            ]:
+                client = AsyncChiaRpcClient(service)
+                try:
+                    response = await client.get(endpoint, data)
+                finally:
+                    await client.close()
+                self.assertTrue(response["success"], (service, response))
+            self.assertEqual(response["keys"][0], "0x6b657930")
+
+    async def test_requires_client_certificate(self):
+        """Test connections without a client certificate are refused, like a real node."""
+        async with httpx.AsyncClient(verify=False) as client:
+            with self.assertRaises(httpx.HTTPError):
+                await client.post(f"https://127.0.0.1:{self.node.ports['full_node']}/get_network_info", json={})
+
+if __name__ == "__main__":
+    unittest.main()
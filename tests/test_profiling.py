@@ -0,0 +1,99 @@
+import asyncio
+import pstats
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from chaimcp.profiling import profile_tool, sample_profile, _sampling
+
+def busy_wait(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def test_collapsed_stacks(self):
+        """Test samples of other threads are written as flamegraph collapsed stacks."""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_wait, args=(stop,), name="busy")
+        worker.start()
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                result = sample_profile(0.05, interval=0.001, directory=Path(tmp))
+                lines = Path(result["path"]).read_text().splitlines()
+        finally:
+            stop.set()
+            worker.join()
+        self.assertTrue(result["success"])
+        self.assertTrue(result["path"].endswith(".folded"))
+        self.assertGreater(result["samples"], 1)
+        busy = [line for line in lines if line.startswith("busy;")]
+        self.assertTrue(busy)
+        stack, count = busy[0].rsplit(" ", 1)
+        self.assertIn("busy_wait (", stack)
+        self.assertGreater(int(count), 0)
+
+    def test_one_profile_at_a_time(self):
+        """Test a second profile is refused while one is running."""
+        with _sampling:
+            self.assertEqual(sample_profile(0), {"success": False, "error": "A profile is already being taken"})
+
+class TestProfileTool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_sampled_calls_profiled(self):
+        """Test sampled tool calls are dumped as cProfile stats, and sampling off leaves the tool untouched."""
+        async def tool(x):
+            await asyncio.sleep(0)
+            return x * 2
+
+        from chaimcp.profiling import _dump_stats
+        dump_threads = []
+
+        def dump(*args):
+            dump_threads.append(threading.get_ident())
+            return _dump_stats(*args)
+
+        self.assertIs(profile_tool("t", tool, sample_rate=0), tool)
+        with tempfile.TemporaryDirectory() as tmp, patch("chaimcp.profiling._dump_stats", side_effect=dump):
+            wrapped = profile_tool("t", tool, sample_rate=1, directory=Path(tmp))
+            self.assertEqual(await wrapped(2), 4)
+            # Written from a worker thread, not the event loop
+            self.assertNotEqual(dump_threads, [threading.get_ident()])
+            self.assertEqual(len(dump_threads), 1)
+            files = list(Path(tmp).glob("tool-t-*.prof"))
+            self.assertEqual(len(files), 1)
+            stats = pstats.Stats(str(files[0]))
+            self.assertTrue(any(func[2] == "tool" for func in stats.stats))
+
+class TestDebugProfileRoute(unittest.IsolatedAsyncioTestCase):
+
+    def request(self, authorization=None, seconds="0"):
+        request = MagicMock()
+        request.headers = {"authorization": authorization} if authorization else {}
+        request.query_params = {"seconds": seconds}
+        return request
+
+    async def test_requires_token(self):
+        """Test the route is hidden without a debug token and rejects wrong credentials."""
+        from chaimcp.main import debug_profile
+        with patch.dict("os.environ", {}, clear=True):
+            self.assertEqual((await debug_profile(self.request("Bearer x"))).status_code, 404)
+        with patch.dict("os.environ", {"MCP_DEBUG_TOKEN": "secret"}):
+            self.assertEqual((await debug_profile(self.request())).status_code, 401)
+            self.assertEqual((await debug_profile(self.request("Bearer wrong"))).status_code, 401)
+            self.assertEqual((await debug_profile(self.request("Bearer secret", "soon"))).status_code, 400)
+
+    async def test_takes_profile(self):
+        """Test an authorized request writes a capped profile to the configured directory."""
+        from chaimcp.main import debug_profile
+        with tempfile.TemporaryDirectory() as tmp, \
+             patch.dict("os.environ", {"MCP_DEBUG_TOKEN": "secret", "MCP_PROFILE_DIR": tmp, "MCP_PROFILE_MAX_SECONDS": "0.02"}), \
+             patch("chaimcp.main.sample_profile", wraps=sample_profile) as mock_sample:
+            response = await debug_profile(self.request("Bearer secret", "30"))
+            self.assertEqual(response.status_code, 200)
+            mock_sample.assert_called_once_with(0.02)
+            self.assertEqual(len(list(Path(tmp).glob("sample-*.folded"))), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import json
+import threading
+import unittest
+from unittest.mock import AsyncMock, patch
+from chaimcp.projection import compile_fields, project, project_raw, read_success
+
+DOC = {
+    "success": True,
+    "coin_records": [
+        {"coin": {"amount": 1, "parent_coin_info": "0x1", "puzzle_hash": "0xa"}, "spent": False, "memo": "has \"quotes\" and [brackets] {braces}"},
+        {"coin": {"amount": 2, "parent_coin_info": "0x2", "puzzle_hash": "0xa"}, "spent": True, "memo": None},
+    ],
+    "extra": {"nested": [1, 2, {"deep": [True, False, None]}], "num": -1.5e3},
+}
+
+class TestProjection(unittest.TestCase):
+
+    def test_compile_fields(self):
+        """Test path syntax variants compile to the same tree."""
+        expected = {"coin_records": {"coin": {"amount": True}}, "success": True, "error": True}
+        for path in ("coin_records.coin.amount", "$.coin_records.coin.amount", "coin_records[].coin.amount", "coin_records[*].coin.amount"):
+            self.assertEqual(compile_fields([path]), expected)
+        # A shorter path keeps the whole subtree
+        self.assertEqual(compile_fields(["a", "a.b"])["a"], True)
+        self.assertEqual(compile_fields(["a.b", "a"])["a"], True)
+
+    def test_project(self):
+        """Test projecting a decoded document through lists and wildcards."""
+        res = project(DOC, compile_fields(["coin_records.coin.amount", "coin_records.spent"]))
+        self.assertEqual(res, {"success": True, "coin_records": [
+            {"coin": {"amount": 1}, "spent": False},
+            {"coin": {"amount": 2}, "spent": True},
+        ]})
+        res = project(DOC, compile_fields(["coin_records.*.amount"]))
+        self.assertEqual(res["coin_records"], [{"coin": {"amount": 1}}, {"coin": {"amount": 2}}])
+        # Paths into scalars select nothing
+        self.assertEqual(project(DOC, compile_fields(["extra.num.x"])), {"success": True, "extra": {}})
+
+    def test_project_raw_matches_project(self):
+        """Test the streaming projector gives the same result as projecting the decoded document."""
+        for fields in (
+            ["coin_records.coin.amount"],
+            ["coin_records.memo", "extra.nested.deep"],
+            ["extra"],
+            ["*"],
+            ["missing.path"],
+        ):
+            for body in (json.dumps(DOC), json.dumps(DOC, indent=2), json.dumps(DOC, separators=(",", ":")).encode()):
+                tree = compile_fields(fields)
+                self.assertEqual(project_raw(body, tree), project(DOC, tree), (fields, body))
+
+    def test_project_raw_errors(self):
+        """Test malformed bodies raise ValueError."""
+        tree = compile_fields(["a"])
+        for body in ('{"a": 1', '{"a" 1}', '{"b": [1, 2}', '{"a": 1} x', '{"b": "unterminated}'):
+            with self.assertRaises(ValueError, msg=body):
+                project_raw(body, tree)
+
+    def test_read_success(self):
+        """Test success is read from the first or last member directly, and found anywhere else by scanning."""
+        self.assertIs(read_success(b'{"success": false, "error": "x"}'), False)
+        self.assertIs(read_success(b'{"blocks": [{"success": false}], "success": true}\n'), True)
+        self.assertIs(read_success(b'{"a": 1, "success": true, "b": {"success": false}}'), True)
+        self.assertIsNone(read_success(b'{"a": {"success": true}}'))
+        with self.assertRaises(ValueError):
+            read_success(b'{"a": [1, "success": true')
+
+class TestProjectedClient(unittest.IsolatedAsyncioTestCase):
+
+    async def test_client_projects_upstream_and_cached_responses(self):
+        """Test projected reads are served from fresh cache entries and are never cached themselves."""
+        from chaimcp.cache import ResponseCache
+        from chaimcp.chia_client import AsyncChiaRpcClient
+        cache = ResponseCache(max_entries=10, peak_ttl=60)
+        with patch("chaimcp.chia_client.load_chia_config", return_value={}):
+            client = AsyncChiaRpcClient("full_node", cache=cache)
+
+        body = json.dumps(DOC).encode()
+        client.endpoints[0].http = AsyncMock()
+        client.endpoints[0].http.post.return_value.content = body
+        client.endpoints[0].http.post.return_value.status_code = 200
+        client.endpoints[0].http.post.return_value.raise_for_status = lambda: None
+
+        data = {"puzzle_hash": "0xa"}
+        res = await client.get("get_coin_records_by_puzzle_hash", data, ["coin_records.coin.amount"])
+        self.assertEqual(res["coin_records"], [{"coin": {"amount": 1}}, {"coin": {"amount": 2}}])
+        self.assertIsNone(cache.get("get_coin_records_by_puzzle_hash", data))
+
+        cache.set_peak((1, "0x1"))
+        cache.put("get_coin_records_by_puzzle_hash", data, DOC)
+        client.endpoints[0].http.post.reset_mock()
+        res = await client.get("get_coin_records_by_puzzle_hash", data, ["coin_records.spent"])
+        self.assertEqual(res["coin_records"], [{"spent": False}, {"spent": True}])
+        client.endpoints[0].http.post.assert_not_called()
+
+    async def test_large_bodies_projected_off_loop(self):
+        """Test small bodies are decoded and projected inline, big ones scanned by project_raw in a thread."""
+        from chaimcp import chia_client
+        with patch("chaimcp.chia_client.load_chia_config", return_value={}):
+            client = chia_client.AsyncChiaRpcClient("full_node")
+        body = json.dumps(DOC).encode()
+        client.endpoints[0].http = AsyncMock()
+        client.endpoints[0].http.post.return_value.content = body
+        client.endpoints[0].http.post.return_value.status_code = 200
+        client.endpoints[0].http.post.return_value.raise_for_status = lambda: None
+
+        threads = []
+        def scan(*args):
+            threads.append(threading.get_ident())
+            return project_raw(*args)
+
+        fields = ["coin_records.coin.amount"]
+        expected = [{"coin": {"amount": 1}}, {"coin": {"amount": 2}}]
+        with patch("chaimcp.chia_client.project_raw", side_effect=scan):
+            res = await client.get("get_coin_records_by_puzzle_hash", {"puzzle_hash": "0xa"}, fields)
+            self.assertEqual(res["coin_records"], expected)
+            self.assertEqual(threads, [])
+            with patch("chaimcp.chia_client.PROJECT_RAW_MIN_BYTES", len(body)):
+                res = await client.get("get_coin_records_by_puzzle_hash", {"puzzle_hash": "0xb"}, fields)
+        self.assertEqual(res["coin_records"], expected)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+if __name__ == "__main__":
+    unittest.main()
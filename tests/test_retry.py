@@ -0,0 +1,29 @@
+import unittest
+from unittest.mock import patch
+from chaimcp.retry import RetryBudget, backoff_delay
+
+class TestRetry(unittest.TestCase):
+
+    def test_backoff_delay_bounds(self):
+        """Test jittered delays grow exponentially up to the cap."""
+        with patch("chaimcp.retry.random.uniform", side_effect=lambda lo, hi: hi):
+            self.assertEqual([backoff_delay(a, 0.1, cap=0.5) for a in range(4)], [0.1, 0.2, 0.4, 0.5])
+        for attempt in range(5):
+            self.assertTrue(0 <= backoff_delay(attempt, 0.1) <= 2.0)
+
+    def test_budget_refills_with_traffic(self):
+        """Test retries draw down the budget and normal requests slowly refill it."""
+        budget = RetryBudget(ratio=0.5, max_tokens=1)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+        for _ in range(10):
+            budget.deposit()
+        self.assertEqual(budget.tokens, 1)
+        self.assertEqual(budget.stats(), {"tokens": 1, "retries": 2, "exhausted": 2})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import unittest
+from unittest.mock import patch
+from chaimcp.serialization import RawJson, dumps, loads, dump_response
+
+class TestRawJson(unittest.TestCase):
+
+    def test_from_bytes(self):
+        """Test decoding keeps the original body."""
+        body = b'{"success": true, "peak": 1}'
+        response = RawJson.from_bytes(body)
+        self.assertEqual(response, {"success": True, "peak": 1})
+        self.assertEqual(response.raw, body)
+
+    def test_decoded_lazily(self):
+        """Test the body is only decoded once the dict is read, and success is answered without decoding."""
+        response = RawJson.from_bytes(b'{"block_records": [1, 2], "success": true}')
+        self.assertTrue(response.get("success"))
+        self.assertFalse(response.loaded)
+        self.assertEqual(dump_response(response), '{"block_records": [1, 2], "success": true}')
+        self.assertFalse(response.loaded)
+
+        self.assertEqual(response["block_records"], [1, 2])
+        self.assertTrue(response.loaded)
+        self.assertEqual({**RawJson.from_bytes(b'{"a": 1}')}, {"a": 1})
+        self.assertEqual(dumps(RawJson.from_bytes(b'{"a": 1}'), compact=True), '{"a":1}')
+
+    def test_mutation_drops_raw(self):
+        """Test any in-place modification invalidates the stored body."""
+        for mutate in (
+            lambda r: r.__setitem__("x", 1),
+            lambda r: r.__delitem__("success"),
+            lambda r: r.update(x=1),
+            lambda r: r.setdefault("x", 1),
+            lambda r: r.pop("success"),
+            lambda r: r.popitem(),
+            lambda r: r.clear(),
+        ):
+            response = RawJson.from_bytes(b'{"success": true}')
+            mutate(response)
+            self.assertIsNone(response.raw)
+
+        response = RawJson.from_bytes(b'{"success": true}')
+        response.setdefault("success", False)
+        self.assertIsNotNone(response.raw)
+
+class TestDumpResponse(unittest.TestCase):
+
+    def test_passthrough(self):
+        """Test unmodified upstream responses are passed through byte-for-byte."""
+        body = b'{"success":true,  "odd_spacing": 1}'
+        self.assertEqual(dump_response(RawJson.from_bytes(body)), body.decode())
+
+    @patch.dict(os.environ, {"MCP_JSON_PASSTHROUGH": "false"})
+    def test_passthrough_disabled(self):
+        """Test passthrough can be disabled, re-encoding as indented JSON."""
+        self.assertEqual(dump_response(RawJson.from_bytes(b'{"a":1}')), '{\n  "a": 1\n}')
+
+    def test_plain_dict_is_encoded(self):
+        """Test responses built locally are encoded (indented by default)."""
+        self.assertEqual(json.loads(dump_response({"a": [1, 2]})), {"a": [1, 2]})
+        self.assertIn("\n", dump_response({"a": 1}))
+
+    @patch.dict(os.environ, {"MCP_JSON_COMPACT": "true"})
+    def test_compact(self):
+        """Test compact mode drops indentation."""
+        self.assertEqual(dump_response({"a": 1, "b": [1]}), '{"a":1,"b":[1]}')
+
+    @patch("chaimcp.serialization.orjson", None)
+    def test_stdlib_fallback(self):
+        """Test the stdlib backend is used when orjson isn't installed."""
+        self.assertEqual(loads(b'{"a": 1}'), {"a": 1})
+        self.assertEqual(dumps({"a": 1}, compact=False), '{\n  "a": 1\n}')
+        self.assertEqual(dumps({"a": 1}, compact=True), '{"a":1}')
+
+    def test_orjson_type_fallback(self):
+        """Test values orjson rejects still serialize."""
+        self.assertEqual(json.loads(dumps({1: 2**70}, compact=True)), {"1": 2**70})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import json
 import sys
 import os
@@ -24,7 +24,7 @@ class TestAuth(unittest.IsolatedAsyncioTestCase):
         token = await verifier.verify_token("wrong-token")
         self.assertIsNone(token)
 
-class TestChaiMCP(unittest.TestCase):
+class TestChaiMCP(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.config_patcher = patch("chaimcp.chia_client.load_chia_config", return_value={"selected_network": "mainnet", "full_node": {"port": 8555}, "wallet": {"port": 9256}})
         self.mock_config = self.config_patcher.start()
@@ -32,8 +32,8 @@ class TestChaiMCP(unittest.TestCase):
     def tearDown(self):
         self.config_patcher.stop()
     
-    @patch("chaimcp.chia_client.ChiaRpcClient.get_blockchain_state")
-    def test_get_blockchain_state(self, mock_get):
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_blockchain_state", new_callable=AsyncMock)
+    async def test_get_blockchain_state(self, mock_get):
         """Test get_blockchain_state tool."""
         # Setup mock
         mock_get.return_value = {
@@ -46,15 +46,15 @@ class TestChaiMCP(unittest.TestCase):
         }
         
         # Run tool
-        result = get_blockchain_state()
+        result = await get_blockchain_state()
         data = json.loads(result)
         
         # Verify
         self.assertTrue(data["blockchain_state"]["sync"]["synced"])
         self.assertEqual(data["blockchain_state"]["peak"]["height"], 12345)
 
-    @patch("chaimcp.chia_client.ChiaRpcClient.get_wallet_balance")
-    def test_get_wallet_balance(self, mock_get):
+    @patch("chaimcp.chia_client.AsyncChiaRpcClient.get_wallet_balance", new_callable=AsyncMock)
+    async def test_get_wallet_balance(self, mock_get):
         """Test get_wallet_balance tool."""
         # Setup mock
         mock_get.return_value = {
@@ -66,7 +66,7 @@ class TestChaiMCP(unittest.TestCase):
         }
         
         # Run tool
-        result = get_wallet_balance(1)
+        result = await get_wallet_balance(1)
         data = json.loads(result)
         
         # Verify
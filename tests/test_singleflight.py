@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+from chaimcp.singleflight import SingleFlight
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_identical_calls_collapse(self):
+        """Test identical concurrent calls share one upstream call and its result."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"success": True}
+
+        results = await asyncio.gather(*[flight.do("k", upstream) for _ in range(5)])
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(flight.stats, {"calls": 5, "collapsed": 4})
+        self.assertEqual(len(flight), 0)
+
+        # Once finished, the next call goes upstream again
+        await flight.do("k", upstream)
+        self.assertEqual(calls, 2)
+
+    async def test_distinct_keys_not_collapsed(self):
+        """Test different keys run independently."""
+        flight = SingleFlight()
+        upstream = AsyncMock(return_value=1)
+        await asyncio.gather(flight.do("a", upstream), flight.do("b", upstream))
+        self.assertEqual(upstream.call_count, 2)
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Test cancelling the first caller leaves the shared call running for the rest."""
+        flight = SingleFlight()
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", upstream))
+        second = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, "done")
+
+    async def test_exception_shared(self):
+        """Test an upstream exception is raised to every waiter."""
+        flight = SingleFlight()
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(flight.do("k", upstream), flight.do("k", upstream), return_exceptions=True)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+    async def test_client_coalesces_reads_only(self):
+        """Test the async client coalesces read-only endpoints but never writes."""
+        from chaimcp.chia_client import AsyncChiaRpcClient
+
+        async def slow(endpoint, data, projection=None):
+            await asyncio.sleep(0.01)
+            return {"success": True}
+
+        with patch("chaimcp.chia_client.load_chia_config", return_value={}), \
+             patch.object(AsyncChiaRpcClient, "_request", side_effect=slow, autospec=False) as mock_request:
+            client = AsyncChiaRpcClient("wallet")
+            await asyncio.gather(*[client.get("get_transaction", {"transaction_id": "0x1"}) for _ in range(3)])
+            self.assertEqual(mock_request.call_count, 1)
+            await asyncio.gather(*[client.get("send_transaction", {"amount": 1}) for _ in range(3)])
+            self.assertEqual(mock_request.call_count, 4)
+
+if __name__ == "__main__":
+    unittest.main()
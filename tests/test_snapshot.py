@@ -0,0 +1,115 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from chaimcp.cache import ResponseCache
+from chaimcp.events import EventBus
+from chaimcp.snapshot import StateSnapshot, get_state_snapshot
+
+def state(height):
+    return {"success": True, "blockchain_state": {"peak": {"height": height, "header_hash": f"0x{height}"}}}
+
+class TestStateSnapshot(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.cache = ResponseCache(max_entries=10, peak_ttl=60)
+        self.client.get_blockchain_state = AsyncMock(return_value=state(1))
+        self.patcher = patch("chaimcp.snapshot.get_async_client", return_value=self.client)
+        self.patcher.start()
+        self.snapshot = StateSnapshot(interval=0)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    async def test_served_from_memory_within_staleness(self):
+        """Test callers share the snapshot until it is older than they accept."""
+        self.assertEqual(await self.snapshot.get(10), state(1))
+        self.assertEqual(await self.snapshot.get(10), state(1))
+        self.client.get_blockchain_state.assert_awaited_once_with(cached=False)
+        # The refresh also feeds the response cache's peak
+        self.assertEqual(self.client.cache.peak, (1, "0x1"))
+
+        self.client.get_blockchain_state.return_value = state(2)
+        self.assertEqual(await self.snapshot.get(0), state(2))
+        self.assertEqual(self.snapshot.hits, 1)
+
+    async def test_concurrent_refreshes_shared(self):
+        """Test many callers needing fresh data cause a single upstream request."""
+        async def slow(cached=True):
+            await asyncio.sleep(0.01)
+            return state(3)
+
+        self.client.get_blockchain_state.side_effect = slow
+        results = await asyncio.gather(*[self.snapshot.get(0) for _ in range(20)])
+        self.assertTrue(all(r == state(3) for r in results))
+        self.assertEqual(self.client.get_blockchain_state.await_count, 1)
+
+    async def test_failed_refresh_not_stored(self):
+        """Test errors are returned to the caller but never become the snapshot."""
+        self.client.get_blockchain_state.return_value = {"success": False, "error": "down"}
+        self.assertEqual(await self.snapshot.get(10), {"success": False, "error": "down"})
+        self.assertIsNone(self.snapshot.state)
+
+    async def test_lagging_state_ignored(self):
+        """Test a state from a node behind the snapshot doesn't roll it back."""
+        self.snapshot.update(state(5))
+        self.snapshot.update(state(4))
+        self.assertEqual(self.snapshot.peak_height, 5)
+        self.snapshot.update(state(6))
+        self.assertEqual(self.snapshot.peak_height, 6)
+
+    async def test_pushed_peaks_and_poller(self):
+        """Test pushed peaks update the snapshot and the poller refreshes it when nothing is pushed."""
+        bus = EventBus()
+        snapshot = StateSnapshot(interval=0.01)
+        snapshot.start(bus)
+        await asyncio.sleep(0.005)
+        self.assertEqual(snapshot.state, state(1))
+
+        bus.publish({"service": "full_node", "change": "new_peak", "data": state(5)})
+        self.assertEqual(await snapshot.get(1), state(5))
+
+        self.client.get_blockchain_state.return_value = state(6)
+        await asyncio.sleep(0.03)
+        self.assertEqual(snapshot.state, state(6))
+        await snapshot.stop()
+        bus.publish({"service": "full_node", "change": "new_peak", "data": state(7)})
+        self.assertEqual(snapshot.state, state(6))
+
+    async def test_waiters_share_peak_notifications(self):
+        """Test many waiters are woken by each peak change of one shared poller."""
+        snapshot = StateSnapshot(interval=0.005)
+        heights = iter(range(1, 100))
+
+        async def next_state(cached=True):
+            return state(next(heights))
+
+        self.client.get_blockchain_state.side_effect = next_state
+
+        async def check():
+            current = await snapshot.get(0.005)
+            return current, current["blockchain_state"]["peak"]["height"] >= 4
+
+        results = await asyncio.gather(*[snapshot.wait_until(check, 5) for _ in range(200)])
+        await snapshot.stop()
+        self.assertTrue(all(done for _, done in results))
+        # Upstream polls track peaks, not waiters
+        self.assertLess(self.client.get_blockchain_state.await_count, 20)
+
+    async def test_wait_until_timeout_and_error(self):
+        """Test waits end at the timeout, or early on a failed check."""
+        snapshot = StateSnapshot(interval=0)
+        check = AsyncMock(return_value=({"success": True}, False))
+        response, done = await snapshot.wait_until(check, 0.01)
+        self.assertFalse(done)
+        self.assertEqual(check.await_count, 2)
+
+        check = AsyncMock(return_value=({"success": False, "error": "down"}, False))
+        self.assertEqual(await snapshot.wait_until(check, 5), ({"success": False, "error": "down"}, False))
+
+    async def test_one_snapshot_per_loop(self):
+        """Test the running loop always gets the same snapshot."""
+        self.assertIs(get_state_snapshot(), get_state_snapshot())
+
+if __name__ == "__main__":
+    unittest.main()
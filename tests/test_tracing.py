@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+import httpx
+from chaimcp.cache import ResponseCache
+from chaimcp.chia_client import AsyncChiaRpcClient
+from chaimcp.serialization import dump_response
+from chaimcp.tracing import SpanExporter, JsonlFileExporter, load_exporter, set_exporter, span, trace_tool
+
+class MemoryExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+def memory_exporter():
+    return MemoryExporter()
+
+class TestSpans(unittest.TestCase):
+
+    def setUp(self):
+        self.exporter = MemoryExporter()
+        set_exporter(self.exporter)
+
+    def tearDown(self):
+        set_exporter(None)
+
+    def test_nesting_and_errors(self):
+        """Test child spans share the trace, point at their parent, and record exceptions."""
+        with span("tool", tool="t") as root:
+            with span("rpc", endpoint="e") as child:
+                child.set("cache", "miss")
+            with self.assertRaises(ValueError):
+                with span("serialize"):
+                    raise ValueError("bad")
+        rpc, serialize, tool = self.exporter.spans
+        self.assertIs(tool, root)
+        self.assertEqual(rpc.trace_id, tool.trace_id)
+        self.assertEqual(rpc.parent_id, tool.span_id)
+        self.assertIsNone(tool.parent_id)
+        self.assertEqual(rpc.attributes, {"endpoint": "e", "cache": "miss"})
+        self.assertEqual(serialize.attributes["error"], "ValueError: bad")
+        self.assertGreaterEqual(tool.duration, rpc.duration)
+
+    def test_disabled_and_unsampled(self):
+        """Test nothing is recorded without an exporter, or below an unsampled root."""
+        set_exporter(self.exporter, sample_rate=0)
+        with span("tool") as root:
+            with span("rpc") as child:
+                child.set("cache", "hit")
+        self.assertFalse(root.recording)
+        set_exporter(None)
+        with span("tool") as root:
+            self.assertFalse(root.recording)
+        self.assertEqual(self.exporter.spans, [])
+
+    def test_load_exporter(self):
+        """Test exporters are chosen by name or by module:factory."""
+        self.assertIsNone(load_exporter(""))
+        self.assertIsInstance(load_exporter(f"{__name__}:memory_exporter"), MemoryExporter)
+        with self.assertRaises(ValueError):
+            load_exporter("zipkin")
+
+    def test_jsonl_exporter(self):
+        """Test the JSONL exporter writes one span object per line."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces", "spans.jsonl")
+            exporter = JsonlFileExporter(path)
+            set_exporter(exporter)
+            with span("tool", tool="t"):
+                with span("rpc"):
+                    pass
+            set_exporter(None)
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual([r["name"] for r in records], ["rpc", "tool"])
+        self.assertEqual(records[0]["parent_id"], records[1]["span_id"])
+        self.assertEqual(records[1]["attributes"], {"tool": "t"})
+
+class TestTracedCall(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.patchers = [
+            patch("chaimcp.chia_client.load_chia_config", return_value={"full_node": {"rpc_port": 8555}}),
+            patch("chaimcp.chia_client.get_ssl_paths", return_value={"cert": "c", "key": "k", "ca": "ca"}),
+            patch("chaimcp.chia_client.create_ssl_context", return_value=False),
+        ]
+        for p in self.patchers:
+            p.start()
+        self.client = AsyncChiaRpcClient("full_node", cache=ResponseCache(max_entries=10, peak_ttl=60))
+        self.exporter = MemoryExporter()
+        set_exporter(self.exporter)
+
+    async def asyncTearDown(self):
+        set_exporter(None)
+        await self.client.close()
+        for p in self.patchers:
+            p.stop()
+
+    @patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+    async def test_tool_rpc_decode_serialize(self, mock_post):
+        """Test a tool call is traced through RPC, decode and serialize with cache status and sizes."""
+        async def post(url, json=None, timeout=None):
+            body = {"success": True, "blockchain_state": {"peak": {"height": 1, "header_hash": "0x1"}}} if url == "/get_blockchain_state" else {"success": True, "coin_records": []}
+            return httpx.Response(200, json=body, request=httpx.Request("POST", f"https://localhost:8555{url}"))
+
+        mock_post.side_effect = post
+
+        async def tool():
+            return dump_response(await self.client.get("get_coin_records_by_puzzle_hash", {"puzzle_hash": "0xa"}))
+
+        traced = trace_tool("get_coins", tool)
+        await traced()
+        await traced()
+
+        first = [s for s in self.exporter.spans if s.trace_id == self.exporter.spans[0].trace_id]
+        by_name = {}
+        for s in first:
+            by_name.setdefault(s.name, []).append(s)
+        tool_span = by_name["tool"][0]
+        self.assertEqual(tool_span.attributes, {"tool": "get_coins", "success": True})
+        rpc = by_name["rpc"][0]
+        self.assertEqual(rpc.attributes["cache"], "miss")
+        self.assertEqual(rpc.parent_id, tool_span.span_id)
+        # The peak check and the request itself each went upstream
+        self.assertEqual(len(by_name["http"]), 2)
+        self.assertTrue(all(s.attributes["bytes"] > 0 and s.attributes["backend"] == "localhost:8555" for s in by_name["http"]))
+        self.assertEqual(len(by_name["decode"]), 2)
+        self.assertTrue(by_name["serialize"][0].attributes["passthrough"])
+
+        second = [s for s in self.exporter.spans if s not in first]
+        self.assertEqual(sorted(s.name for s in second), ["rpc", "serialize", "tool"])
+        self.assertEqual(next(s for s in second if s.name == "rpc").attributes["cache"], "hit")
+
+if __name__ == "__main__":
+    unittest.main()